@@ -47,6 +47,9 @@ python manage.py migrate --noinput
 echo -e "${GREEN}[5/7] Raccolta file statici...${NC}"
 python manage.py collectstatic --noinput
 
+# Invalida cache pagine ed ETag: i template possono essere cambiati
+python manage.py shell -c "from portfolio.cache import bump_content_generation, bump_site_settings_version; bump_content_generation(); bump_site_settings_version()"
+
 # 7. Riavvia Gunicorn
 echo -e "${GREEN}[6/7] Riavvio Gunicorn...${NC}"
 sudo systemctl restart gunicorn
@@ -61,6 +64,21 @@ else
     exit 1
 fi
 
+# Riavvia il worker della outbox email (se installato)
+if systemctl list-unit-files | grep -q portfolio-outbox.service; then
+    sudo systemctl restart portfolio-outbox
+fi
+
+# Rigenera tutte le pagine pre-renderizzate con i nuovi template (se installato)
+if systemctl list-unit-files | grep -q portfolio-prerender.service; then
+    sudo systemctl restart portfolio-prerender
+fi
+
+# Riavvia il worker dei progetti correlati (se installato)
+if systemctl list-unit-files | grep -q portfolio-related.service; then
+    sudo systemctl restart portfolio-related
+fi
+
 # 8. Riavvia Nginx (opzionale, solo se hai modificato configurazioni)
 echo -e "${GREEN}[7/7] Riavvio Nginx...${NC}"
 sudo systemctl reload nginx
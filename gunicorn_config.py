@@ -2,7 +2,25 @@
 Gunicorn configuration file for Django portfolio project.
 """
 
+import gc
 import multiprocessing
+import os
+import shutil
+import time
+
+STARTED = time.monotonic()
+
+# Shared directory where every worker writes its Prometheus samples;
+# must be set (and exist) before prometheus_client is imported, which
+# happens in the master with preload_app
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/var/run/gunicorn/metrics")
+# Start with empty metrics: files left by a previous master would be summed
+# in. Cleaned here, before preload_app loads the app (and the master's own
+# samples), and once per master since a HUP re-reads this file.
+if os.environ.get("PORTFOLIO_METRICS_MASTER") != str(os.getpid()):
+    shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+    os.environ["PORTFOLIO_METRICS_MASTER"] = str(os.getpid())
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
 
 # Server socket
 bind = "127.0.0.1:8000"
@@ -10,7 +28,16 @@ backlog = 2048
 
 # Worker processes
 workers = multiprocessing.cpu_count() * 2 + 1
-worker_class = "sync"
+# "sync" serves portfolio_project.wsgi:application. To run the async views
+# natively use the uvicorn worker with the ASGI application instead:
+#   GUNICORN_WORKER_CLASS=uvicorn_worker.UvicornWorker \
+#   gunicorn -c gunicorn_config.py portfolio_project.asgi:application
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "sync")
+if worker_class != "sync":
+    # One event loop per worker handles many requests at once
+    workers = multiprocessing.cpu_count() + 1
+# Django sizes its database connection pools from it
+os.environ["GUNICORN_WORKERS"] = str(workers)
 worker_connections = 1000
 timeout = 120
 keepalive = 5
@@ -19,6 +46,11 @@ keepalive = 5
 max_requests = 1000
 max_requests_jitter = 50
 
+# Import Django and warm templates and URLs once in the master: workers
+# (including those replacing recycled ones) are forked warm and share that
+# memory copy-on-write. Code changes then need a restart, not a HUP.
+preload_app = os.environ.get("GUNICORN_PRELOAD", "True") == "True"
+
 # Logging
 accesslog = "/var/log/gunicorn/access.log"
 errorlog = "/var/log/gunicorn/error.log"
@@ -37,3 +69,44 @@ tmp_upload_dir = None
 # SSL (if needed, but usually handled by Nginx)
 # keyfile = "/path/to/key.pem"
 # certfile = "/path/to/cert.pem"
+
+
+# Server hooks
+def _log_warm_up(log, where):
+    from portfolio.warmup import warm_up
+    templates, patterns, seconds = warm_up()
+    log.info(
+        "%s warm: %d templates and %d URL patterns in %.2fs, %.2fs since start",
+        where, templates, patterns, seconds, time.monotonic() - STARTED
+    )
+
+
+def when_ready(server):
+    """With preload_app, warm the master and freeze its objects before the first fork."""
+    if not server.cfg.preload_app:
+        return
+    _log_warm_up(server.log, "Master")
+    # Move every object to a permanent generation the collector never
+    # scans, so collections in the workers don't write to (and copy) the
+    # pages shared with the master
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    """Warm workers that were not forked from a preloaded master; report memory."""
+    if not worker.cfg.preload_app:
+        _log_warm_up(worker.log, f"Worker {worker.pid}")
+    from portfolio.warmup import memory_usage
+    usage = memory_usage()
+    if usage:
+        worker.log.info(
+            "Worker %s memory: rss %d KiB, pss %d KiB, shared %d KiB, private %d KiB",
+            worker.pid, usage["rss"], usage["pss"], usage["shared"], usage["private"]
+        )
+
+
+def child_exit(server, worker):
+    """Count the worker restart (max_requests, timeouts, crashes)."""
+    # Not portfolio.metrics: without preload_app Django is not set up here
+    from portfolio.worker_metrics import worker_exited
+    worker_exited(worker.pid)
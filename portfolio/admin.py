@@ -3,20 +3,32 @@ Portfolio Admin Configuration
 
 Customized admin panel for managing portfolio content.
 Includes image previews, drag-drop ordering, and custom filters.
+Projects and contact messages use a large-table mode (LargeTableAdmin)
+that keeps their changelists fast with tens of thousands of rows.
 """
 
+from datetime import datetime
+
 from django.contrib import admin
+from django.db.models import Exists, F, Max, Min, QuerySet, Subquery
+from django.utils import timezone
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 
 from .models import (
     Project,
+    GalleryImage,
+    Tech,
     Testimonial,
     Skill,
     TimelineEvent,
     SiteSettings,
-    ContactMessage
+    ContactMessage,
+    OutboxEmail
 )
+from .pagination import EstimatedCountPaginator
+from .ratelimit import get_counters
+from .search import message_search_filter, project_search_filter
 
 
 # Custom Admin Site Configuration
@@ -25,13 +37,155 @@ admin.site.site_title = 'Portfolio Admin'
 admin.site.index_title = 'Gestione Contenuti'
 
 
+def _period_starts(first, last, kind):
+    """Naive start of every year, month or day from first to last, plus the next one."""
+    current = datetime(first.year, first.month if kind != 'year' else 1, first.day if kind == 'day' else 1)
+    starts = []
+    while True:
+        starts.append(current)
+        if current > last:
+            return starts
+        if kind == 'year':
+            current = current.replace(year=current.year + 1)
+        elif kind == 'month':
+            current = current.replace(year=current.year + current.month // 12, month=current.month % 12 + 1)
+        else:
+            current = datetime.fromordinal(current.toordinal() + 1)
+
+
+class IndexedDatesQuerySet(QuerySet):
+    """
+    QuerySet whose datetimes() answers the admin date hierarchy with one
+    EXISTS probe per year, month or day, each a seek on the index of the
+    field, instead of truncating the date of every row of the table.
+    """
+
+    def aggregate(self, *args, **kwargs):
+        """
+        Run plain MIN()/MAX() aggregates (the date hierarchy's first and
+        last date) as one index seek each: SQLite scans the whole index
+        when both are in the same SELECT. The result is kept on the
+        queryset, as the date hierarchy asks twice.
+        """
+        plain = kwargs and not args and all(
+            isinstance(aggregate, (Min, Max))
+            and not aggregate.filter
+            and isinstance(aggregate.get_source_expressions()[0], F)
+            for aggregate in kwargs.values()
+        )
+        if not plain:
+            return super().aggregate(*args, **kwargs)
+        key = tuple(
+            (alias, type(aggregate), aggregate.get_source_expressions()[0].name)
+            for alias, aggregate in sorted(kwargs.items())
+        )
+        known = self.__dict__.setdefault('_plain_aggregates', {})
+        if key not in known:
+            rows = self.order_by()
+            seeks = {}
+            for alias, aggregate in kwargs.items():
+                name = aggregate.get_source_expressions()[0].name
+                seeks[alias] = Subquery(
+                    rows.filter(**{f'{name}__isnull': False})
+                    .order_by(name if isinstance(aggregate, Min) else f'-{name}')
+                    .values(name)[:1]
+                )
+            # Filters (a search) are evaluated in the seeks only, not again for the outer row
+            found = self._unfiltered().values(**seeks)[:1]
+            known[key] = found[0] if found else dict.fromkeys(kwargs)
+        return dict(known[key])
+
+    def _unfiltered(self):
+        return self.model._default_manager.using(self.db).order_by()
+
+    def datetimes(self, field_name, kind, order='ASC', tzinfo=None):
+        if kind not in ('year', 'month', 'day'):
+            return super().datetimes(field_name, kind, order, tzinfo)
+        tzinfo = tzinfo or timezone.get_current_timezone()
+        bounds = self.aggregate(first=Min(field_name), last=Max(field_name))
+        if bounds['first'] is None:
+            return []
+        first, last = (timezone.localtime(bounds[key], tzinfo).replace(tzinfo=None) for key in ('first', 'last'))
+        starts = [timezone.make_aware(start, tzinfo) for start in _period_starts(first, last, kind)]
+        rows = self.order_by()
+        everything = self._unfiltered()
+        # The period bounds go first: SQLite seeks on the first range it
+        # sees, which would otherwise be the (wider) year or month filter
+        probes = {
+            f'period_{i}': Exists(everything.filter(**{f'{field_name}__gte': start, f'{field_name}__lt': end}) & rows)
+            for i, (start, end) in enumerate(zip(starts, starts[1:]))
+        }
+        found = everything.values(**probes)[0]
+        periods = [start for i, start in enumerate(starts[:-1]) if found[f'period_{i}']]
+        return periods[::-1] if order == 'DESC' else periods
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Changelist for tables with tens of thousands of rows.
+
+    No second COUNT(*) for "show all", an estimated total on the
+    unfiltered list (EstimatedCountPaginator), and search through the
+    full-text index given by search_filter instead of one icontains scan
+    per search field. Subclasses pair it with indexed ordering and an
+    indexed date_hierarchy, whose drill-down levels IndexedDatesQuerySet
+    finds by index seeks.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    # Rendering the rows, not the queries, dominates past this size
+    list_per_page = 50
+    search_help_text = 'Cerca parole intere o iniziali (es. "djan" trova "Django").'
+
+    # Callable(search term) -> Q; search_fields only enables the search box
+    search_filter = None
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        return IndexedDatesQuerySet(queryset.model, queryset.query, queryset._db, queryset._hints)
+
+    def get_search_results(self, request, queryset, search_term):
+        """Filter through the full-text index instead of icontains."""
+        if self.search_filter is None or not search_term.strip():
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(self.search_filter(search_term)), False
+
+
+class GalleryImageInline(admin.TabularInline):
+    """Gallery images edited inline in the project form."""
+
+    model = GalleryImage
+    extra = 1
+    fields = ['preview', 'image', 'external_url', 'alt', 'order', 'dimensions']
+    readonly_fields = ['preview', 'dimensions']
+    ordering = ['order', 'id']
+
+    def preview(self, obj):
+        """Display the stored placeholder and thumbnail."""
+        if not obj.url:
+            return '-'
+        return format_html(
+            '<img src="{}" style="width: 80px; height: 50px; object-fit: cover; '
+            'border-radius: 4px; background: {} url({}) center / cover;"/>',
+            obj.url, obj.dominant_color or '#1a1a1a', obj.placeholder
+        )
+    preview.short_description = 'Preview'
+
+    def dimensions(self, obj):
+        if not obj.width:
+            return '-'
+        return f'{obj.width}×{obj.height} · {obj.byte_size // 1024} KB'
+    dimensions.short_description = 'Dimensioni'
+
+
 @admin.register(Project)
-class ProjectAdmin(admin.ModelAdmin):
+class ProjectAdmin(LargeTableAdmin):
     """
     Admin configuration for Project model.
     Features: image preview, tech stack display, ordering.
     """
-    
+
     list_display = [
         'thumbnail_preview',
         'title',
@@ -45,11 +199,14 @@ class ProjectAdmin(admin.ModelAdmin):
     ]
     list_display_links = ['thumbnail_preview', 'title']
     list_editable = ['order', 'is_visible', 'featured']
-    list_filter = ['category', 'featured', 'is_visible', 'created_at']
+    list_filter = ['category', 'featured', 'is_visible']
+    date_hierarchy = 'created_at'
     search_fields = ['title', 'description', 'tech_stack']
+    search_filter = staticmethod(project_search_filter)
     prepopulated_fields = {'slug': ('title',)}
     ordering = ['order', '-created_at']
-    
+    inlines = [GalleryImageInline]
+
     fieldsets = (
         ('Informazioni Base', {
             'fields': ('title', 'slug', 'description', 'category')
@@ -59,7 +216,7 @@ class ProjectAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
         ('Immagini', {
-            'fields': ('image_thumbnail', 'image_hero', 'gallery'),
+            'fields': ('image_thumbnail', 'image_hero'),
             'description': 'Carica immagini ottimizzate (WebP consigliato)'
         }),
         ('Tecnologie & Link', {
@@ -69,7 +226,7 @@ class ProjectAdmin(admin.ModelAdmin):
             'fields': ('featured', 'is_visible', 'order')
         }),
     )
-    
+
     def thumbnail_preview(self, obj):
         """Display thumbnail preview in list view."""
         if obj.image_thumbnail:
@@ -85,7 +242,7 @@ class ProjectAdmin(admin.ModelAdmin):
             'justify-content: center; color: #666;">No img</div>'
         )
     thumbnail_preview.short_description = 'Preview'
-    
+
     def tech_tags(self, obj):
         """Display tech stack as colored tags."""
         if not obj.tech_stack_list:
@@ -101,7 +258,7 @@ class ProjectAdmin(admin.ModelAdmin):
             tags += f'<span style="color: #666;">+{len(obj.tech_stack_list) - 4}</span>'
         return mark_safe(tags)
     tech_tags.short_description = 'Tech Stack'
-    
+
     def featured_badge(self, obj):
         """Display featured status as badge."""
         if obj.featured:
@@ -114,10 +271,27 @@ class ProjectAdmin(admin.ModelAdmin):
     featured_badge.short_description = 'Featured'
 
 
+@admin.register(Tech)
+class TechAdmin(admin.ModelAdmin):
+    """
+    Read-only view of the normalized tech tags.
+    Tags are maintained automatically from Project.tech_stack.
+    """
+
+    list_display = ['name', 'visible_project_count']
+    search_fields = ['name']
+    ordering = ['name']
+    readonly_fields = ['name', 'visible_project_count']
+
+    def has_add_permission(self, request):
+        """Tags are created from the project tech stack."""
+        return False
+
+
 @admin.register(Testimonial)
 class TestimonialAdmin(admin.ModelAdmin):
     """Admin configuration for Testimonial model."""
-    
+
     list_display = [
         'photo_preview',
         'name',
@@ -128,10 +302,12 @@ class TestimonialAdmin(admin.ModelAdmin):
     ]
     list_display_links = ['photo_preview', 'name']
     list_editable = ['order', 'is_visible']
-    list_filter = ['is_visible', 'project']
+    list_select_related = ['project']
+    # Only the projects that have testimonials, not the whole catalog
+    list_filter = ['is_visible', ('project', admin.RelatedOnlyFieldListFilter)]
     search_fields = ['name', 'role', 'quote']
     ordering = ['order']
-    
+
     def photo_preview(self, obj):
         """Display photo preview in list view."""
         if obj.photo:
@@ -151,7 +327,7 @@ class TestimonialAdmin(admin.ModelAdmin):
 @admin.register(Skill)
 class SkillAdmin(admin.ModelAdmin):
     """Admin configuration for Skill model."""
-    
+
     list_display = [
         'name',
         'category',
@@ -165,7 +341,7 @@ class SkillAdmin(admin.ModelAdmin):
     search_fields = ['name']
     ordering = ['category', 'order']
     filter_horizontal = ['related_projects']
-    
+
     def proficiency_bar(self, obj):
         """Display proficiency as progress bar."""
         color = '#00d9ff' if obj.proficiency >= 70 else '#00b8cc'
@@ -185,7 +361,7 @@ class SkillAdmin(admin.ModelAdmin):
 @admin.register(TimelineEvent)
 class TimelineEventAdmin(admin.ModelAdmin):
     """Admin configuration for TimelineEvent model."""
-    
+
     list_display = [
         'color_dot',
         'year',
@@ -197,7 +373,7 @@ class TimelineEventAdmin(admin.ModelAdmin):
     list_editable = ['order', 'is_visible']
     list_filter = ['is_visible']
     ordering = ['order']
-    
+
     def color_dot(self, obj):
         """Display timeline color dot."""
         return format_html(
@@ -214,7 +390,7 @@ class SiteSettingsAdmin(admin.ModelAdmin):
     Admin configuration for SiteSettings.
     Singleton model - only one instance allowed.
     """
-    
+
     fieldsets = (
         ('Informazioni Base', {
             'fields': ('site_name', 'tagline', 'profile_image')
@@ -239,20 +415,20 @@ class SiteSettingsAdmin(admin.ModelAdmin):
             'description': 'Numeri mostrati nella sezione statistiche'
         }),
     )
-    
+
     def has_add_permission(self, request):
         """Prevent creating more than one instance."""
         return not SiteSettings.objects.exists()
-    
+
     def has_delete_permission(self, request, obj=None):
         """Prevent deletion of settings."""
         return False
 
 
 @admin.register(ContactMessage)
-class ContactMessageAdmin(admin.ModelAdmin):
+class ContactMessageAdmin(LargeTableAdmin):
     """Admin configuration for ContactMessage model."""
-    
+
     list_display = [
         'read_status',
         'name',
@@ -261,11 +437,13 @@ class ContactMessageAdmin(admin.ModelAdmin):
         'created_at'
     ]
     list_display_links = ['name', 'email']
-    list_filter = ['is_read', 'created_at']
+    list_filter = ['is_read']
+    date_hierarchy = 'created_at'
     search_fields = ['name', 'email', 'subject', 'message']
+    search_filter = staticmethod(message_search_filter)
     ordering = ['-created_at']
     readonly_fields = ['name', 'email', 'subject', 'message', 'created_at']
-    
+
     def read_status(self, obj):
         """Display read status as icon."""
         if obj.is_read:
@@ -276,11 +454,16 @@ class ContactMessageAdmin(admin.ModelAdmin):
             '<span style="color: #00d9ff; font-weight: bold;">●</span>'
         )
     read_status.short_description = ''
-    
+
     def has_add_permission(self, request):
         """Prevent adding messages manually."""
         return False
-    
+
+    def changelist_view(self, request, extra_context=None):
+        """Show the contact rate limiter counters above the message list."""
+        extra_context = {**(extra_context or {}), 'ratelimit_counters': get_counters()}
+        return super().changelist_view(request, extra_context)
+
     def change_view(self, request, object_id, form_url='', extra_context=None):
         """Mark message as read when viewing."""
         obj = self.get_object(request, object_id)
@@ -288,3 +471,39 @@ class ContactMessageAdmin(admin.ModelAdmin):
             obj.is_read = True
             obj.save()
         return super().change_view(request, object_id, form_url, extra_context)
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    """Admin configuration for the contact email outbox."""
+
+    list_display = [
+        'recipient',
+        'subject',
+        'status',
+        'attempts',
+        'next_attempt_at',
+        'sent_at'
+    ]
+    list_filter = ['status']
+    ordering = ['-created_at']
+    readonly_fields = [
+        'contact_message', 'subject', 'body', 'recipient', 'attempts',
+        'last_error', 'created_at', 'sent_at'
+    ]
+    actions = ['retry_now']
+
+    def has_add_permission(self, request):
+        """Emails are queued by the contact form."""
+        return False
+
+    @admin.action(description='Riprova subito l\'invio')
+    def retry_now(self, request, queryset):
+        """Put failed or delayed emails back at the head of the queue."""
+        updated = queryset.exclude(
+            status__in=[OutboxEmail.STATUS_SENT, OutboxEmail.STATUS_SENDING]
+        ).update(
+            status=OutboxEmail.STATUS_PENDING,
+            next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f'{updated} email rimesse in coda.')
@@ -0,0 +1,170 @@
+"""
+Benchmarks
+
+Deterministic synthetic content and the per-view query/time budgets
+checked by `manage.py benchmark`.
+"""
+
+import random
+from collections import namedtuple
+from datetime import timedelta
+
+from django.utils import timezone
+
+from . import search
+from .models import (
+    ContactMessage,
+    Project,
+    SiteSettings,
+    Skill,
+    Testimonial,
+    TimelineEvent
+)
+from .related import build_related
+
+
+TECH_POOL = [
+    'Python', 'Django', 'PostgreSQL', 'Redis', 'JavaScript', 'TypeScript',
+    'React', 'Vue.js', 'Node JS', 'HTML', 'CSS', 'Sass', 'Docker', 'Nginx',
+    'Celery', 'GraphQL', 'Tailwind', 'Figma', 'Flutter', 'Swift',
+]
+
+WORDS = (
+    'sito web piattaforma gestionale negozio online dashboard analisi dati '
+    'prenotazioni portale clienti app mobile api integrazione pagamenti '
+    'ricerca catalogo blog landing page automazione report performance'
+).split()
+
+
+# A view passes when a warm request runs at most max_queries SQL queries and
+# the 95th percentile latency stays within p95_ms. Views that by design render every
+# project get p95_ms per 1000 projects instead (scales=True).
+Budget = namedtuple('Budget', 'max_queries p95_ms scales')
+
+BUDGETS = {
+    'index': Budget(8, 600, True),
+    'projects_list': Budget(4, 100, False),
+    'projects_list?category': Budget(4, 100, False),
+    'projects_list?tech': Budget(4, 100, False),
+    'projects_list?page=last': Budget(4, 100, False),
+    'project_detail': Budget(4, 60, False),
+    'api_projects': Budget(1, 30, False),
+    'api_projects?tech': Budget(2, 60, True),
+    'sitemap.xml': Budget(1, 50, False),
+    'sitemap page': Budget(2, 500, True),
+    # Admin changelists: the project list also renders a list_editable
+    # formset (three widgets per row), and filtered lists resolve the
+    # changelist URL once per row to preserve the filters in the links
+    'admin projects': Budget(8, 250, False),
+    'admin projects?q': Budget(8, 250, False),
+    'admin messages': Budget(8, 100, False),
+    # Two words found in most generated messages: every query on the
+    # page (count, date bounds, period probes) goes through the whole
+    # match set, unlike the usual lookup of a single sender
+    'admin messages?q': Budget(8, 800, False),
+    'admin messages?q=sender': Budget(8, 100, False),
+    'admin messages?date': Budget(8, 150, False),
+}
+
+
+def _sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def seed(projects, seed=0, batch_size=1000):
+    """
+    Fill an empty database with `projects` projects plus proportional
+    skills, testimonials and timeline events. The same seed always
+    produces the same content.
+    """
+    rng = random.Random(seed)
+    categories = [value for value, label in Project.CATEGORY_CHOICES]
+
+    created = []
+    for start in range(0, projects, batch_size):
+        batch = []
+        for i in range(start, min(start + batch_size, projects)):
+            batch.append(Project(
+                title=f'{_sentence(rng, 3)} {i}',
+                description=_sentence(rng, 20),
+                long_description=_sentence(rng, 120),
+                challenge=_sentence(rng, 40),
+                solution=_sentence(rng, 40),
+                results=_sentence(rng, 30),
+                image_thumbnail=f'benchmarks/thumbnail-{i % 50}.jpg',
+                image_hero=f'benchmarks/hero-{i % 50}.jpg',
+                tech_stack=rng.sample(TECH_POOL, rng.randint(2, 6)),
+                category=rng.choice(categories),
+                featured=i % 97 == 0,
+                order=rng.randint(0, 100),
+                is_visible=rng.random() < 0.95,
+            ))
+        created += Project.objects.bulk_create(batch)
+
+    skills = Skill.objects.bulk_create([
+        Skill(
+            name=name,
+            category=rng.choice(['frontend', 'backend', 'tools']),
+            years_experience=rng.randint(1, 10),
+            proficiency=rng.randint(40, 100),
+            order=i,
+        )
+        for i, name in enumerate(TECH_POOL)
+    ])
+    Skill.related_projects.through.objects.bulk_create(
+        [
+            Skill.related_projects.through(skill_id=skill.pk, project_id=project.pk)
+            for skill in skills
+            for project in rng.sample(created, min(len(created), 10))
+        ],
+        batch_size=batch_size
+    )
+
+    Testimonial.objects.bulk_create([
+        Testimonial(
+            name=f'Cliente {i}',
+            role=_sentence(rng, 2),
+            quote=_sentence(rng, 30),
+            project=rng.choice(created) if created else None,
+            order=i,
+        )
+        for i in range(max(3, min(projects // 20, 50)))
+    ])
+    TimelineEvent.objects.bulk_create([
+        TimelineEvent(
+            title=_sentence(rng, 3),
+            description=_sentence(rng, 25),
+            tech_stack=rng.sample(TECH_POOL, 3),
+            year=str(2010 + i),
+            order=i,
+        )
+        for i in range(12)
+    ])
+    SiteSettings.get_settings()
+    build_related(full=True)
+
+
+def seed_messages(messages, seed=0, batch_size=1000):
+    """
+    Add `messages` contact messages, one batch per day going back from
+    today, so the admin date hierarchy has several years to list.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    for day, start in enumerate(range(0, messages, batch_size)):
+        created = ContactMessage.objects.bulk_create([
+            ContactMessage(
+                name=f'Cliente {i}',
+                email=f'cliente{i}@example.com',
+                subject=_sentence(rng, 4),
+                message=_sentence(rng, 60),
+                is_read=rng.random() < 0.8,
+            )
+            for i in range(start, min(start + batch_size, messages))
+        ])
+        # created_at is auto_now_add: backdate the batch afterwards
+        ContactMessage.objects.filter(
+            pk__gte=created[0].pk, pk__lte=created[-1].pk
+        ).update(created_at=now - timedelta(days=day * 10))
+        # bulk_create() sends no post_save: index the batch for the admin search
+        search.index_messages(created)
@@ -0,0 +1,234 @@
+"""
+Portfolio Cache
+
+Helpers around Django's cache framework: a global content generation
+counter bumped on every content edit, an anonymous full-page cache
+keyed on that generation so an admin edit invalidates every page at once,
+per-model versions for the template fragment cache, and conditional GET
+(304 Not Modified) for the public pages.
+"""
+
+import hashlib
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .metrics import PAGE_CACHE
+
+
+CONTENT_GENERATION_KEY = 'portfolio:content_generation'
+SITE_SETTINGS_VERSION_KEY = 'portfolio:site_settings_version'
+LAST_CHANGE_KEY = 'portfolio:last_change_at'
+MODEL_VERSION_KEY = 'portfolio:model_version:{}'
+
+# Cached responses expire on their own after this many seconds, even if no
+# content edit bumps the generation (e.g. after a manual DB change).
+PAGE_CACHE_TIMEOUT = getattr(settings, 'PAGE_CACHE_TIMEOUT', 60 * 60)
+FRAGMENT_CACHE_TIMEOUT = getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', 24 * 60 * 60)
+
+
+def _initial_generation():
+    # Seeded from the clock so a counter lost to eviction or a cache flush
+    # never restarts at a value that older cached pages were stored under.
+    return int(time.time() * 1000)
+
+
+def get_content_generation():
+    """Return the current content generation, initialising it if missing."""
+    generation = cache.get(CONTENT_GENERATION_KEY)
+    if generation is None:
+        cache.add(CONTENT_GENERATION_KEY, _initial_generation(), timeout=None)
+        generation = cache.get(CONTENT_GENERATION_KEY)
+    return generation
+
+
+def get_last_change():
+    """Timestamp of the last content or settings change, initialising it if missing."""
+    last_change = cache.get(LAST_CHANGE_KEY)
+    if last_change is None:
+        # Lost to eviction or a flush: treat everything as just changed
+        cache.add(LAST_CHANGE_KEY, time.time(), timeout=None)
+        last_change = cache.get(LAST_CHANGE_KEY)
+    return last_change or time.time()
+
+
+def bump_content_generation():
+    """Invalidate every generation-keyed cache entry in one operation."""
+    cache.set(LAST_CHANGE_KEY, time.time(), timeout=None)
+    try:
+        return cache.incr(CONTENT_GENERATION_KEY)
+    except ValueError:
+        generation = _initial_generation()
+        cache.set(CONTENT_GENERATION_KEY, generation, timeout=None)
+        return generation
+
+
+def get_site_settings_version():
+    """Return the shared SiteSettings version, initialising it if missing."""
+    version = cache.get(SITE_SETTINGS_VERSION_KEY)
+    if version is None:
+        cache.add(SITE_SETTINGS_VERSION_KEY, _initial_generation(), timeout=None)
+        version = cache.get(SITE_SETTINGS_VERSION_KEY)
+    return version
+
+
+def bump_site_settings_version():
+    """Tell every worker that its in-memory SiteSettings copy is stale."""
+    cache.set(LAST_CHANGE_KEY, time.time(), timeout=None)
+    try:
+        return cache.incr(SITE_SETTINGS_VERSION_KEY)
+    except ValueError:
+        version = _initial_generation()
+        cache.set(SITE_SETTINGS_VERSION_KEY, version, timeout=None)
+        return version
+
+
+def get_model_version(model):
+    """
+    Return the shared version of a model without updated_at, which keys
+    the cached fragments rendering its rows.
+    """
+    key = MODEL_VERSION_KEY.format(model._meta.label_lower)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_generation(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_model_version(model):
+    """Invalidate the cached fragments of every row of a model."""
+    key = MODEL_VERSION_KEY.format(model._meta.label_lower)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = _initial_generation()
+        cache.set(key, version, timeout=None)
+        return version
+
+
+def page_cache_key(request, generation):
+    """Build the cache key for a page from its absolute URL and generation."""
+    url = hashlib.md5(request.build_absolute_uri().encode('utf-8')).hexdigest()
+    return f'portfolio:page:{generation}:{url}'
+
+
+def _cacheable(request, user):
+    return (
+        getattr(settings, 'PAGE_CACHE_ENABLED', True)
+        and request.method in ('GET', 'HEAD')
+        and not user.is_authenticated
+    )
+
+
+def _cached_response(cached):
+    if cached is None:
+        PAGE_CACHE.labels('miss').inc()
+        return None
+    PAGE_CACHE.labels('hit').inc()
+    content, content_type = cached
+    response = HttpResponse(content, content_type=content_type)
+    response['X-Page-Cache'] = 'HIT'
+    return response
+
+
+def _storable(response):
+    return response.status_code == 200 and not response.streaming and not response.cookies
+
+
+def cache_public_page(view_func):
+    """
+    Cache the rendered response of a public view for anonymous GET requests.
+    
+    Only successful responses are stored. Pages are served with no cookies,
+    so visitors never share a session or CSRF token through the cache.
+    Works on both sync and async views.
+    """
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            if not _cacheable(request, await request.auser()):
+                return await view_func(request, *args, **kwargs)
+            
+            key = page_cache_key(request, await sync_to_async(get_content_generation)())
+            response = _cached_response(await cache.aget(key))
+            if response is not None:
+                return response
+            
+            response = await view_func(request, *args, **kwargs)
+            if _storable(response):
+                await cache.aset(key, (response.content, response['Content-Type']), PAGE_CACHE_TIMEOUT)
+                response['X-Page-Cache'] = 'MISS'
+            return response
+        return async_wrapper
+    
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if not _cacheable(request, request.user):
+            return view_func(request, *args, **kwargs)
+        
+        key = page_cache_key(request, get_content_generation())
+        response = _cached_response(cache.get(key))
+        if response is not None:
+            return response
+        
+        response = view_func(request, *args, **kwargs)
+        if _storable(response):
+            cache.set(key, (response.content, response['Content-Type']), PAGE_CACHE_TIMEOUT)
+            response['X-Page-Cache'] = 'MISS'
+        return response
+    return wrapper
+
+
+def _apply_validators(request, response, etag, last_modified):
+    if request.method in ('GET', 'HEAD'):
+        if last_modified and not response.has_header('Last-Modified'):
+            response.headers['Last-Modified'] = http_date(last_modified)
+        if etag:
+            response.headers.setdefault('ETag', etag)
+    return response
+
+
+def conditional_page(validators_func):
+    """
+    Answer conditional GETs of a public view with 304 Not Modified.
+    
+    Like django.views.decorators.http.condition(), but both validators
+    come from one call of validators_func(request, *args, **kwargs), which
+    returns (etag, last_modified timestamp) or None when there is nothing
+    to validate (the view then runs as usual, e.g. to return a 404). On
+    async views it runs in a thread, so it may query the database.
+    """
+    def check(request, *args, **kwargs):
+        validators = validators_func(request, *args, **kwargs)
+        if validators is None:
+            return None, None, None
+        etag, last_modified = validators
+        etag = f'"{etag}"'
+        last_modified = int(last_modified)
+        return get_conditional_response(request, etag=etag, last_modified=last_modified), etag, last_modified
+    
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                response, etag, last_modified = await sync_to_async(check)(request, *args, **kwargs)
+                if response is None:
+                    response = await view_func(request, *args, **kwargs)
+                return _apply_validators(request, response, etag, last_modified)
+            return async_wrapper
+        
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            response, etag, last_modified = check(request, *args, **kwargs)
+            if response is None:
+                response = view_func(request, *args, **kwargs)
+            return _apply_validators(request, response, etag, last_modified)
+        return wrapper
+    return decorator
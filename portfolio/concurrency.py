@@ -0,0 +1,91 @@
+"""
+Concurrent Queries
+
+Run the independent sections of an async view (settings, projects,
+testimonials, ...) at the same time, so a page waits for its slowest
+query instead of the sum of all of them.
+
+Django's async ORM hands every query to the same thread, one after the
+other, so the sections run on a small pool of threads instead, each with
+its own database connection (reused or closed per CONN_MAX_AGE, as in a
+normal request). Size the pool with CONCURRENT_QUERY_THREADS: every
+Gunicorn worker may keep that many extra connections open.
+"""
+
+import asyncio
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+
+# (pid, pool) of the current process. Created on first use: a pool built
+# at import time would read settings too early and, with preload_app, be
+# inherited by the workers from the master across fork()
+_executor = (None, None)
+_executor_lock = threading.Lock()
+
+# execute_wrapper() hooks of the current request, re-installed on the
+# connections of the pool threads
+_query_wrappers = contextvars.ContextVar('portfolio_query_wrappers', default=())
+
+
+@contextmanager
+def observe_queries(wrapper):
+    """
+    Install a connection.execute_wrapper() hook for the current request,
+    including the queries its concurrent sections run on other threads.
+    """
+    token = _query_wrappers.set(_query_wrappers.get() + (wrapper,))
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(wrapper))
+            yield
+    finally:
+        _query_wrappers.reset(token)
+
+
+def _get_executor():
+    global _executor
+    pid, executor = _executor
+    if pid != os.getpid():
+        with _executor_lock:
+            pid, executor = _executor
+            if pid != os.getpid():
+                executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'CONCURRENT_QUERY_THREADS', 8),
+                    thread_name_prefix='portfolio-queries'
+                )
+                _executor = (os.getpid(), executor)
+    return executor
+
+
+def _run_section(func):
+    close_old_connections()
+    try:
+        with ExitStack() as stack:
+            for wrapper in _query_wrappers.get():
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(wrapper))
+            return func()
+    finally:
+        close_old_connections()
+
+
+async def gather_sections(*funcs):
+    """
+    Call the synchronous callables concurrently and return their results
+    in order. Each one must fully evaluate its querysets (list(), first(),
+    ...) since the results are used back on the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    executor = _get_executor()
+    return await asyncio.gather(*(
+        loop.run_in_executor(executor, contextvars.copy_context().run, _run_section, func)
+        for func in funcs
+    ))
@@ -0,0 +1,156 @@
+"""
+Responsive Images
+
+Generates resized WebP/AVIF derivatives of uploaded images with Pillow,
+stores them next to the original and describes them in a small dict that
+the responsive_image template tag turns into srcset/sizes markup.
+"""
+
+import base64
+import logging
+import posixpath
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from PIL import Image, ImageFilter, ImageOps, features
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_WIDTHS = (320, 640, 960, 1280, 1920)
+
+# Format name -> (Pillow format, file extension, save options)
+FORMATS = {
+    'avif': ('AVIF', 'avif', {'quality': 60}),
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 6}),
+}
+
+
+def available_formats():
+    """Modern formats supported by the installed Pillow build, best first."""
+    return [name for name in FORMATS if features.check(name)]
+
+
+def generate_derivatives(field_file):
+    """
+    Build the derivatives of an image field file.
+    
+    Returns a dict like:
+        {'source': 'projects/thumbnails/a.jpg', 'width': 1600, 'height': 900,
+         'formats': {'webp': [[320, 'projects/thumbnails/a-320w.webp'], ...]}}
+    """
+    storage = field_file.storage
+    with field_file.open('rb') as fh:
+        image = Image.open(fh)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    width, height = image.size
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+    
+    widths = getattr(settings, 'RESPONSIVE_IMAGE_WIDTHS', DEFAULT_WIDTHS)
+    targets = sorted({w for w in widths if w < width} | {width})
+    
+    stem, _ext = posixpath.splitext(field_file.name)
+    result = {'source': field_file.name, 'width': width, 'height': height, 'formats': {}}
+    for name in available_formats():
+        pil_format, extension, options = FORMATS[name]
+        entries = []
+        for target in targets:
+            resized = image if target == width else image.resize(
+                (target, round(height * target / width)), Image.LANCZOS
+            )
+            buffer = BytesIO()
+            resized.save(buffer, pil_format, **options)
+            saved = storage.save(f'{stem}-{target}w.{extension}', ContentFile(buffer.getvalue()))
+            entries.append([target, saved])
+        result['formats'][name] = entries
+    return result
+
+
+def compute_image_metadata(field_file, placeholder_width=16):
+    """
+    Measure an image once at upload time.
+    
+    Returns width, height, byte size, the dominant (average) colour as hex
+    and a tiny blurred data URI usable as an inline placeholder.
+    """
+    with field_file.open('rb') as fh:
+        image = Image.open(fh)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    width, height = image.size
+    rgb = image.convert('RGB')
+    
+    red, green, blue = rgb.resize((1, 1), Image.BOX).getpixel((0, 0))
+    
+    tiny = rgb.resize(
+        (placeholder_width, max(1, round(height * placeholder_width / width))),
+        Image.BOX
+    ).filter(ImageFilter.GaussianBlur(1))
+    buffer = BytesIO()
+    if features.check('webp'):
+        tiny.save(buffer, 'WEBP', quality=30)
+        mime = 'image/webp'
+    else:
+        tiny.save(buffer, 'PNG', optimize=True)
+        mime = 'image/png'
+    
+    return {
+        'width': width,
+        'height': height,
+        'byte_size': field_file.size,
+        'dominant_color': f'#{red:02x}{green:02x}{blue:02x}',
+        'placeholder': f'data:{mime};base64,{base64.b64encode(buffer.getvalue()).decode("ascii")}',
+    }
+
+
+def delete_derivatives(variants, storage):
+    """Remove the files listed in a variants dict."""
+    for entries in (variants or {}).get('formats', {}).values():
+        for _width, name in entries:
+            storage.delete(name)
+
+
+class ResponsiveImagesMixin:
+    """
+    Model mixin that keeps *_variants JSON fields in sync with image fields.
+    
+    Subclasses declare responsive_image_fields = {'image_field': 'variants_field'}
+    and call update_image_variants() after saving, passing on the
+    update_fields of save(): image fields it leaves out are not checked.
+    """
+    
+    responsive_image_fields = {}
+    
+    def update_image_variants(self, update_fields=None):
+        changed = {}
+        for image_name, variants_name in self.responsive_image_fields.items():
+            if update_fields is not None and image_name not in update_fields:
+                continue
+            field_file = getattr(self, image_name)
+            variants = getattr(self, variants_name) or {}
+            current = field_file.name if field_file else ''
+            if variants.get('source', '') == current:
+                continue
+            
+            storage = self._meta.get_field(image_name).storage
+            delete_derivatives(variants, storage)
+            new_variants = {}
+            if current:
+                try:
+                    new_variants = generate_derivatives(field_file)
+                except (OSError, ValueError) as exc:
+                    logger.warning('Impossibile generare le varianti di %s: %s', current, exc)
+                    new_variants = {'source': current, 'formats': {}}
+            setattr(self, variants_name, new_variants)
+            changed[variants_name] = new_variants
+        
+        if changed:
+            if hasattr(self, 'updated_at'):
+                # Cached template fragments are keyed on updated_at
+                self.updated_at = changed['updated_at'] = timezone.now()
+            # Plain UPDATE: no second save() and no extra post_save signals
+            type(self).objects.filter(pk=self.pk).update(**changed)
@@ -0,0 +1,172 @@
+"""
+Request Instrumentation
+
+Per-request timing breakdown (SQL, template rendering, SiteSettings
+lookup, view) for a sampled share of requests, sent back as a
+Server-Timing header and logged as one JSON line per request.
+
+Enable with SERVER_TIMING_ENABLED = True and tune SERVER_TIMING_SAMPLE_RATE
+(0.0 - 1.0); requests that are not sampled only pay for a random() call.
+"""
+
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.template.backends.django import Template as DjangoBackendTemplate
+
+from .concurrency import observe_queries
+
+
+logger = logging.getLogger('portfolio.performance')
+
+# Timings of the request being measured in the current thread/task
+_current = ContextVar('portfolio_request_timings', default=None)
+
+
+class RequestTimings:
+    """
+    Accumulated durations (ms) and counters of one request. Concurrent
+    sections add to it from several threads, so "db" is the summed time
+    of all queries and may exceed "total".
+    """
+
+    def __init__(self):
+        self.durations = {}
+        self.queries = 0
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds):
+        with self._lock:
+            self.durations[name] = self.durations.get(name, 0.0) + seconds * 1000
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper() hook
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            with self._lock:
+                self.queries += 1
+            self.add('db', time.perf_counter() - started)
+
+
+@contextmanager
+def measure(name):
+    """Add the time spent in the block to the current request, if sampled."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started)
+
+
+def _instrument_templates():
+    """Time every top-level template render (includes are part of it)."""
+    render = DjangoBackendTemplate.render
+    if getattr(render, 'instrumented', False):
+        return
+
+    def timed_render(self, context=None, request=None):
+        with measure('template'):
+            return render(self, context, request)
+
+    timed_render.instrumented = True
+    DjangoBackendTemplate.render = timed_render
+
+
+class ServerTimingMiddleware:
+    """
+    Measure a sample of requests and report where their time went.
+
+    Place it near the top of MIDDLEWARE so "total" covers the other
+    middleware too.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SERVER_TIMING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'SERVER_TIMING_SAMPLE_RATE', 0.05)
+        _instrument_templates()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        started = time.perf_counter()
+        try:
+            with observe_queries(timings):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.report(request, response, timings, started)
+
+    async def __acall__(self, request):
+        if random.random() >= self.sample_rate:
+            return await self.get_response(request)
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        started = time.perf_counter()
+        try:
+            with observe_queries(timings):
+                response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.report(request, response, timings, started)
+
+    def report(self, request, response, timings, started):
+        """Add the Server-Timing header and log the breakdown."""
+        total = (time.perf_counter() - started) * 1000
+
+        view_started = getattr(request, '_timing_view_started', None)
+        if view_started is not None:
+            timings.durations['view'] = (time.perf_counter() - view_started) * 1000
+
+        response['Server-Timing'] = ', '.join(
+            [f'db;dur={timings.durations.get("db", 0.0):.1f};desc="{timings.queries} queries"']
+            + [
+                f'{name};dur={duration:.1f}'
+                for name, duration in timings.durations.items()
+                if name != 'db'
+            ]
+            + [f'total;dur={total:.1f}']
+        )
+
+        match = request.resolver_match
+        logger.info(json.dumps({
+            'view': match.view_name if match else None,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': timings.queries,
+            'total_ms': round(total, 2),
+            **{f'{name}_ms': round(duration, 2) for name, duration in timings.durations.items()},
+        }))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if _current.get() is not None:
+            request._timing_view_started = time.perf_counter()
+        return None
@@ -0,0 +1,250 @@
+"""
+Benchmark the public views and the admin changelists on synthetic
+datasets of increasing size.
+
+Each size is seeded into a throwaway test database (the configured
+database and cache are never touched), together with --messages contact
+messages for the admin. For every view the command reports SQL queries,
+latency percentiles and peak allocated memory, and fails when a view
+exceeds its budget in portfolio/benchmarks.py or returns no results (an
+empty page is fast for the wrong reason).
+
+Usage:
+    python manage.py benchmark
+    python manage.py benchmark --sizes 10,1000,100000 --runs 50
+    python manage.py benchmark --messages 0
+"""
+
+import gc
+import json
+import math
+import statistics
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from portfolio.benchmarks import BUDGETS, seed, seed_messages
+from portfolio.concurrency import observe_queries
+from portfolio.models import Project, Tech
+from portfolio.views import PROJECTS_PER_PAGE
+
+
+BENCHMARK_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+
+class Command(BaseCommand):
+    help = 'Misura query, latenza e memoria delle viste pubbliche e dell\'admin su dataset sintetici.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            default='10,1000',
+            help='Numero di progetti dei dataset, separati da virgola (default: 10,1000)'
+        )
+        parser.add_argument(
+            '--runs',
+            type=int,
+            default=30,
+            help='Richieste misurate per vista (default: 30)'
+        )
+        parser.add_argument(
+            '--messages',
+            type=int,
+            default=100000,
+            help='Messaggi di contatto per le liste dell\'admin (default: 100000, 0 per saltarle)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Seme del generatore di dati (default: 0)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError('--sizes deve essere una lista di interi, es. 10,1000')
+        runs = max(options['runs'], 2)
+
+        failures = []
+        setup_test_environment()
+        try:
+            # Measure the views themselves: no page cache, private cache, and
+            # every read on the test database (never on a configured replica)
+            with override_settings(
+                CACHES=BENCHMARK_CACHES,
+                PAGE_CACHE_ENABLED=False,
+                DATABASE_REPLICA=None
+            ):
+                for size in sizes:
+                    failures += self.run_size(size, runs, options['seed'], options['messages'])
+        finally:
+            teardown_test_environment()
+
+        if failures:
+            raise CommandError('Budget superati:\n' + '\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('Tutte le viste sono entro i budget.'))
+
+    def run_size(self, size, runs, seed_value, messages):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            cache.clear()
+            started = time.monotonic()
+            seed(size, seed=seed_value)
+            seed_messages(messages, seed=seed_value)
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'\n{size} progetti, {messages} messaggi (dati generati in {time.monotonic() - started:.1f}s)'
+            ))
+            self.stdout.write(
+                f'{"vista":<26}{"query":>7}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"mem KiB":>10}'
+            )
+
+            failures = []
+            client = Client()
+            admin_client = Client()
+            admin_user, created = get_user_model().objects.get_or_create(
+                username='benchmark', defaults={'is_staff': True, 'is_superuser': True}
+            )
+            admin_client.force_login(admin_user)
+            scenarios = [(client, name, url) for name, url in self.scenarios()]
+            if messages:
+                scenarios += [(admin_client, name, url) for name, url in self.admin_scenarios(messages)]
+            for client, name, url in scenarios:
+                result = self.measure(client, url, runs)
+                budget = BUDGETS[name]
+                p95_budget = budget.p95_ms * max(1, size / 1000) if budget.scales else budget.p95_ms
+                problems = []
+                if result['queries'] > budget.max_queries:
+                    problems.append(f'{result["queries"]} query (max {budget.max_queries})')
+                if result['p95'] > p95_budget:
+                    problems.append(f'p95 {result["p95"]:.1f} ms (max {p95_budget:.0f})')
+
+                line = (
+                    f'{name:<26}{result["queries"]:>7}{result["p50"]:>9.1f}'
+                    f'{result["p95"]:>9.1f}{result["p99"]:>9.1f}{result["peak_kib"]:>10.0f}'
+                )
+                if problems:
+                    self.stdout.write(self.style.ERROR(line))
+                    failures.append(f'{size} progetti, {name}: ' + ', '.join(problems))
+                else:
+                    self.stdout.write(line)
+            return failures
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def scenarios(self):
+        """(budget name, URL) pairs exercised on the seeded data."""
+        visible = Project.objects.filter(is_visible=True).order_by('order', '-created_at')
+        project = visible.first()
+        techs = Tech.filter_names()
+        tech = 'Python' if 'Python' in techs else techs[0]
+        last_page = max(1, math.ceil(visible.count() / PROJECTS_PER_PAGE))
+        list_url = reverse('portfolio:projects_list')
+        api_url = reverse('portfolio:api_projects')
+        return [
+            ('index', reverse('portfolio:index')),
+            ('projects_list', list_url),
+            ('projects_list?category', f'{list_url}?category={project.category}'),
+            ('projects_list?tech', f'{list_url}?tech={tech}'),
+            ('projects_list?page=last', f'{list_url}?page={last_page}'),
+            ('project_detail', project.get_absolute_url()),
+            ('api_projects', api_url),
+            ('api_projects?tech', f'{api_url}?tech={tech}'),
+            ('sitemap.xml', reverse('portfolio:sitemap_index')),
+            ('sitemap page', reverse('portfolio:sitemap_page', kwargs={'section': 'projects', 'page': 1})),
+        ]
+
+    def admin_scenarios(self, messages):
+        """(budget name, URL) pairs of the admin changelists."""
+        projects_url = reverse('admin:portfolio_project_changelist')
+        messages_url = reverse('admin:portfolio_contactmessage_changelist')
+        year = timezone.now().year
+        return [
+            ('admin projects', projects_url),
+            ('admin projects?q', f'{projects_url}?q=dashb'),
+            ('admin messages', messages_url),
+            ('admin messages?q', f'{messages_url}?q=pagamenti+report'),
+            ('admin messages?q=sender', f'{messages_url}?q=cliente{messages - 1}'),
+            ('admin messages?date', f'{messages_url}?created_at__year={year}'),
+        ]
+
+    def measure(self, client, url, runs):
+        # Warm up lazily built caches (snapshots, settings) before counting
+        response, body = self.get(client, url)
+        if response.status_code != 200:
+            raise CommandError(f'{url} ha risposto {response.status_code}')
+        if not self.result_count(response, body):
+            raise CommandError(f'{url} non ha restituito risultati')
+
+        # Counted on every thread: async views run their queries concurrently
+        queries = []
+        
+        def record(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+        
+        with observe_queries(record):
+            self.get(client, url)
+        query_count = len(queries)
+
+        tracemalloc.start()
+        self.get(client, url)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        # Like timeit, no garbage collection while timing: the test client
+        # keeps a copy of the context of every rendered template, and
+        # collecting those made p95 measure the collector, not the view
+        timings = []
+        gc.collect()
+        gc.disable()
+        try:
+            for _ in range(runs):
+                started = time.perf_counter()
+                self.get(client, url)
+                timings.append((time.perf_counter() - started) * 1000)
+        finally:
+            gc.enable()
+        percentiles = statistics.quantiles(timings, n=100, method='inclusive')
+        return {
+            'queries': query_count,
+            'p50': percentiles[49],
+            'p95': percentiles[94],
+            'p99': percentiles[98],
+            'peak_kib': peak / 1024,
+        }
+
+    def get(self, client, url):
+        """Request url, reading streamed responses to the end; return it with its body."""
+        response = client.get(url)
+        if response.streaming:
+            return response, b''.join(response.streaming_content)
+        return response, response.content
+
+    def result_count(self, response, body):
+        """Number of results the response lists (projects, URLs or changelist rows)."""
+        content_type = response.get('Content-Type', '')
+        if content_type.startswith('application/json'):
+            return len(json.loads(body)['projects'])
+        if content_type.startswith('application/xml'):
+            return body.count(b'<loc>')
+        context = response.context
+        if 'cl' in context:
+            return context['cl'].result_count
+        if 'project' in context:
+            return 1
+        return len(context['projects'])
@@ -0,0 +1,50 @@
+"""
+Recompute the precomputed related projects (see portfolio/related.py).
+
+Usage:
+    python manage.py build_related            # recompute the edited projects, then exit
+    python manage.py build_related --all      # recompute every project (after an upgrade)
+    python manage.py build_related --loop     # recompute after each edit (systemd)
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from portfolio.related import build_related
+
+
+class Command(BaseCommand):
+    help = 'Ricalcola i progetti correlati dei progetti modificati (o di tutti con --all).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Ricalcola i correlati di tutti i progetti'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Resta in attesa e ricalcola dopo ogni modifica ai progetti'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Secondi tra due controlli con --loop (default: 5)'
+        )
+
+    def handle(self, *args, **options):
+        full = options['all']
+        while True:
+            started = time.monotonic()
+            recomputed = build_related(full=full)
+            if recomputed or not options['loop']:
+                self.stdout.write(
+                    f'Progetti ricalcolati: {recomputed} ({time.monotonic() - started:.1f}s)'
+                )
+            full = False
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,93 @@
+"""
+Export all portfolio content as NDJSON (one Django serialized object
+per line), streaming rows from the database in chunks.
+
+Usage:
+    python manage.py export_portfolio backup.jsonl
+    python manage.py export_portfolio backup.jsonl.gz
+    python manage.py export_portfolio - > backup.jsonl
+
+The file can be restored with import_portfolio (or loaddata). Uploaded
+media files are not included: copy MEDIA_ROOT alongside it.
+"""
+
+import gzip
+import sys
+
+from django.core import serializers
+from django.core.management.base import BaseCommand
+from django.db.models import Prefetch
+
+from portfolio.models import (
+    GalleryImage,
+    Project,
+    SiteSettings,
+    Skill,
+    Testimonial,
+    TimelineEvent
+)
+
+
+def export_querysets():
+    """Querysets to export, in an order that keeps references resolvable."""
+    return [
+        Project.objects.order_by('pk'),
+        GalleryImage.objects.order_by('pk'),
+        Testimonial.objects.order_by('pk'),
+        Skill.objects.prefetch_related(
+            Prefetch('related_projects', queryset=Project.objects.only('pk'))
+        ).order_by('pk'),
+        TimelineEvent.objects.order_by('pk'),
+        SiteSettings.objects.order_by('pk'),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Esporta progetti, galleria, testimonianze, skill, timeline e impostazioni in formato NDJSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'output',
+            help='File di destinazione (.jsonl o .jsonl.gz), oppure - per stdout'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Righe lette dal database per volta (default: 2000)'
+        )
+
+    def handle(self, *args, **options):
+        output = options['output']
+        if output == '-':
+            stream = sys.stdout
+            log = self.stderr
+        elif output.endswith('.gz'):
+            stream = gzip.open(output, 'wt', encoding='utf-8')
+            log = self.stdout
+        else:
+            stream = open(output, 'w', encoding='utf-8')
+            log = self.stdout
+
+        serializer = serializers.get_serializer('jsonl')()
+        try:
+            for queryset in export_querysets():
+                counter = _Counter(queryset.iterator(chunk_size=options['chunk_size']))
+                serializer.serialize(counter, stream=stream)
+                log.write(f'{queryset.model._meta.verbose_name_plural}: {counter.count} esportati')
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+
+
+class _Counter:
+    """Iterable wrapper counting the objects passed to the serializer."""
+
+    def __init__(self, iterable):
+        self.iterable = iterable
+        self.count = 0
+
+    def __iter__(self):
+        for obj in self.iterable:
+            self.count += 1
+            yield obj
@@ -0,0 +1,52 @@
+"""
+Generate responsive image derivatives for images uploaded before the
+pipeline existed (or after changing RESPONSIVE_IMAGE_WIDTHS), and measure
+gallery images migrated without metadata.
+
+Usage:
+    python manage.py generate_image_variants
+    python manage.py generate_image_variants --force
+"""
+
+from django.core.management.base import BaseCommand
+
+from portfolio.cache import bump_content_generation, bump_model_version, bump_site_settings_version
+from portfolio.models import GalleryImage, Project, SiteSettings, Testimonial
+
+
+class Command(BaseCommand):
+    help = 'Genera le varianti WebP/AVIF ridimensionate delle immagini caricate.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Rigenera anche le varianti già presenti'
+        )
+    
+    def handle(self, *args, **options):
+        for model in (Project, Testimonial, SiteSettings):
+            count = 0
+            for obj in model.objects.iterator(chunk_size=100):
+                if options['force']:
+                    for variants_name in obj.responsive_image_fields.values():
+                        variants = getattr(obj, variants_name) or {}
+                        variants.pop('source', None)
+                obj.update_image_variants()
+                count += 1
+            self.stdout.write(f'{model._meta.verbose_name_plural}: {count} elaborati')
+        
+        gallery = GalleryImage.objects.exclude(image='')
+        if not options['force']:
+            gallery = gallery.filter(width__isnull=True)
+        count = 0
+        for image in gallery.iterator(chunk_size=100):
+            image.update_metadata()
+            image.save()
+            count += 1
+        self.stdout.write(f'{GalleryImage._meta.verbose_name_plural}: {count} elaborate')
+        
+        # update_image_variants() sends no signals: refresh pages and fragments
+        bump_model_version(Testimonial)
+        bump_site_settings_version()
+        bump_content_generation()
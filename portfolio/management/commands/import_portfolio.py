@@ -0,0 +1,244 @@
+"""
+Import an NDJSON file written by export_portfolio, reading it line by
+line and writing rows in batches. Objects are matched by primary key:
+existing rows are updated, missing ones created.
+
+Usage:
+    python manage.py import_portfolio backup.jsonl
+    python manage.py import_portfolio backup.jsonl.gz --batch-size 1000
+    cat backup.jsonl | python manage.py import_portfolio -
+"""
+
+import gzip
+import json
+import sys
+from contextlib import contextmanager
+
+from django.core import serializers
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.core.serializers.base import DeserializationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+
+from portfolio import search
+from portfolio.cache import bump_content_generation, bump_site_settings_version
+from portfolio.models import (
+    GalleryImage,
+    Project,
+    ProjectTech,
+    SiteSettings,
+    Skill,
+    Tech,
+    Testimonial,
+    TimelineEvent,
+    _chunks
+)
+from portfolio.signals import FRAGMENT_VERSION_BUMPS, on_commit_once
+from portfolio.snapshots import mark_catalog_stale
+
+
+IMPORTABLE_MODELS = (Project, GalleryImage, Testimonial, Skill, TimelineEvent, SiteSettings)
+
+
+@contextmanager
+def _exported_timestamps(model):
+    """
+    Let bulk_create() write the exported created_at/updated_at values
+    instead of stamping the current time (the command is single threaded).
+    """
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    flags = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, flags):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _encode(value):
+    # Compare values as exported: the encoder keeps milliseconds only
+    return json.dumps(value, cls=DjangoJSONEncoder, sort_keys=True)
+
+
+class Command(BaseCommand):
+    help = 'Importa un file NDJSON creato da export_portfolio (crea o aggiorna per chiave primaria).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'input',
+            help='File da importare (.jsonl o .jsonl.gz), oppure - per stdin'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Oggetti scritti per query (default: 500)'
+        )
+
+    def handle(self, *args, **options):
+        path = options['input']
+        if path == '-':
+            stream = sys.stdin
+        elif path.endswith('.gz'):
+            stream = gzip.open(path, 'rt', encoding='utf-8')
+        else:
+            stream = open(path, encoding='utf-8')
+
+        self.batch_size = options['batch_size']
+        self.counts = {model: [0, 0, 0] for model in IMPORTABLE_MODELS}
+        try:
+            with transaction.atomic():
+                self.import_stream(stream)
+                self.reset_sequences()
+                on_commit_once(mark_catalog_stale)
+                on_commit_once(bump_content_generation)
+        except DeserializationError as exc:
+            raise CommandError(f'File non valido: {exc}')
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        for model, (created, updated, unchanged) in self.counts.items():
+            if created or updated or unchanged:
+                self.stdout.write(
+                    f'{model._meta.verbose_name_plural}: {created} creati, '
+                    f'{updated} aggiornati, {unchanged} invariati'
+                )
+
+    def import_stream(self, stream):
+        """Group consecutive objects of the same model into batches."""
+        batch = []
+        for item in serializers.deserialize('jsonl', stream, ignorenonexistent=True):
+            model = type(item.object)
+            if model not in IMPORTABLE_MODELS:
+                raise CommandError(f'Modello non supportato: {model._meta.label}')
+            if batch and (type(batch[0].object) is not model or len(batch) >= self.batch_size):
+                self.write_batch(batch)
+                batch = []
+            batch.append(item)
+        if batch:
+            self.write_batch(batch)
+
+    def write_batch(self, batch):
+        model = type(batch[0].object)
+        objects = [item.object for item in batch]
+        existing = set(
+            model.objects.filter(pk__in=[obj.pk for obj in objects]).values_list('pk', flat=True)
+        )
+        to_create = [obj for obj in objects if obj.pk not in existing]
+        to_update = [obj for obj in objects if obj.pk in existing]
+
+        if model is Project:
+            # Exported flags describe the source database
+            for obj in to_create:
+                obj.related_stale = True
+        if to_create:
+            with _exported_timestamps(model):
+                model.objects.bulk_create(to_create, batch_size=self.batch_size)
+
+        to_update, fields = self.changed_objects(model, to_update)
+        if to_update:
+            model.objects.bulk_update(to_update, fields, batch_size=self.batch_size)
+            if model is Project:
+                self.refresh_projects(to_update)
+
+        m2m_links = {}
+        for item in batch:
+            for name, related_pks in (item.m2m_data or {}).items():
+                m2m_links.setdefault(name, {})[item.object.pk] = related_pks
+        for name, links in m2m_links.items():
+            self.set_m2m(model, name, links)
+
+        self.counts[model][0] += len(to_create)
+        self.counts[model][1] += len(to_update)
+        self.counts[model][2] += len(objects) - len(to_create) - len(to_update)
+        if model in FRAGMENT_VERSION_BUMPS:
+            on_commit_once(FRAGMENT_VERSION_BUMPS[model])
+        if model is SiteSettings:
+            SiteSettings._cached = None
+            on_commit_once(bump_site_settings_version)
+
+    def changed_objects(self, model, objects):
+        """
+        Keep only the objects that differ from their stored row, and the
+        attnames of the fields that differ: bulk_update() cost grows with
+        rows x fields, and a restore mostly rewrites identical data.
+        """
+        if not objects:
+            return [], []
+        fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+        names = [field.name for field in fields]
+        stored = {
+            row['pk']: row['fields']
+            for row in serializers.serialize(
+                'python', model.objects.filter(pk__in=[obj.pk for obj in objects]), fields=names
+            )
+        }
+        changed_objects = []
+        changed_names = set()
+        for row in serializers.serialize('python', objects, fields=names):
+            old = stored[row['pk']]
+            diff = {name for name in names if _encode(row['fields'][name]) != _encode(old[name])}
+            if diff:
+                changed_objects.append(row['pk'])
+                changed_names |= diff
+        changed_pks = set(changed_objects)
+        return (
+            [obj for obj in objects if obj.pk in changed_pks],
+            [field.attname for field in fields if field.name in changed_names]
+        )
+
+    def set_m2m(self, model, name, links):
+        """
+        Replace the many-to-many links ({owner_pk: [related_pk, ...]}) via
+        the through table, writing only the links that changed.
+        """
+        field = model._meta.get_field(name)
+        through = field.remote_field.through
+        source = field.m2m_field_name()
+        target = field.m2m_reverse_field_name()
+        existing = through.objects.filter(**{f'{source}__in': list(links)})
+        old = set(existing.values_list(f'{source}_id', f'{target}_id'))
+        new = {(owner_pk, related_pk) for owner_pk, related_pks in links.items() for related_pk in related_pks}
+        if through is Skill.related_projects.through:
+            # Skills are features of the related projects: flag the projects
+            # whose links change
+            for pks in _chunks(sorted({project_pk for _, project_pk in old ^ new})):
+                Project.objects.filter(pk__in=pks).update(related_stale=True)
+        removed = {}
+        for owner_pk, related_pk in old - new:
+            removed.setdefault(owner_pk, []).append(related_pk)
+        for owner_pk, related_pks in removed.items():
+            existing.filter(**{f'{source}_id': owner_pk, f'{target}_id__in': related_pks}).delete()
+        through.objects.bulk_create(
+            [
+                through(**{f'{source}_id': owner_pk, f'{target}_id': related_pk})
+                for owner_pk, related_pk in sorted(new - old)
+            ],
+            batch_size=self.batch_size,
+            ignore_conflicts=True
+        )
+
+    def refresh_projects(self, projects):
+        """Rebuild tags, search entries and related projects of updated projects."""
+        links = ProjectTech.objects.filter(project__in=projects)
+        old_tech_ids = set(links.values_list('tech_id', flat=True))
+        links.delete()
+        Project.sync_techs_bulk(projects)
+        Tech.refresh_counts(old_tech_ids)
+        search.index_projects(projects)
+        Project.objects.filter(pk__in=[project.pk for project in projects]).update(related_stale=True)
+
+    def reset_sequences(self):
+        """Move auto-increment sequences past the imported primary keys."""
+        statements = connection.ops.sequence_reset_sql(no_style(), IMPORTABLE_MODELS)
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
@@ -0,0 +1,55 @@
+"""
+Pre-render the public pages to PRERENDER_ROOT for nginx to serve.
+
+Usage:
+    python manage.py prerender            # rebuild what changed, then exit
+    python manage.py prerender --all      # rebuild every page (after a deploy)
+    python manage.py prerender --loop     # rebuild after each content edit (systemd)
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from portfolio.cache import get_content_generation
+from portfolio.prerender import prerender
+
+
+class Command(BaseCommand):
+    help = 'Genera le pagine pubbliche come file HTML statici, aggiornando solo quelle cambiate.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Rigenera tutte le pagine, ad esempio dopo un cambio di template'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Resta in attesa e rigenera dopo ogni modifica ai contenuti'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            help='Secondi tra due controlli con --loop (default: 2)'
+        )
+
+    def handle(self, *args, **options):
+        full = options['all']
+        generation = None
+        while True:
+            current = get_content_generation()
+            if current != generation:
+                started = time.monotonic()
+                written, removed = prerender(full=full)
+                self.stdout.write(
+                    f'Pagine generate: {written}, rimosse: {removed} '
+                    f'({time.monotonic() - started:.1f}s)'
+                )
+                generation = current
+                full = False
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,173 @@
+"""
+Deliver queued contact notification emails.
+
+Usage:
+    python manage.py send_outbox            # one pass, then exit
+    python manage.py send_outbox --loop     # keep polling (systemd service)
+"""
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection, send_mail
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from portfolio.models import OutboxEmail
+
+
+class Command(BaseCommand):
+    help = 'Invia le email in coda nella outbox, con retry e backoff esponenziale.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Continua a controllare la coda invece di uscire dopo un passaggio'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Secondi di attesa tra due passaggi con --loop (default: 5)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Numero massimo di email prese per passaggio (default: 50)'
+        )
+    
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = self.process_batch(options['batch_size'])
+            if sent or failed:
+                self.stdout.write(f'Inviate: {sent}, fallite: {failed}')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+    
+    def process_batch(self, batch_size):
+        """Claim the due emails, send them and record the outcome."""
+        emails = self.claim(batch_size)
+        if not emails:
+            return 0, 0
+        
+        mail_connection = get_connection()
+        threshold = getattr(settings, 'CONTACT_DIGEST_THRESHOLD', 0)
+        if threshold and len(emails) >= threshold:
+            return self.send_digest(emails, mail_connection)
+        
+        sent = failed = 0
+        for email in emails:
+            try:
+                send_mail(
+                    email.subject,
+                    email.body,
+                    settings.DEFAULT_FROM_EMAIL,
+                    [email.recipient],
+                    connection=mail_connection,
+                )
+            except Exception as exc:
+                self.mark_failed([email], exc)
+                failed += 1
+            else:
+                self.mark_sent([email])
+                sent += 1
+        return sent, failed
+    
+    def claim(self, batch_size):
+        """
+        Reserve up to batch_size due emails for this worker.
+        
+        The rows are switched to 'sending' with a lease in a short
+        transaction, so no row lock is held while SMTP is slow. Rows whose
+        lease has expired (the worker died mid-send) are due again. Each
+        claim counts as an attempt, so an email that keeps killing its
+        worker still gives up after OUTBOX_MAX_ATTEMPTS.
+        """
+        now = timezone.now()
+        max_attempts = getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 8)
+        with transaction.atomic():
+            due = OutboxEmail.objects.filter(
+                status__in=[OutboxEmail.STATUS_PENDING, OutboxEmail.STATUS_SENDING],
+                next_attempt_at__lte=now
+            ).order_by('next_attempt_at', 'id')
+            if connection.features.has_select_for_update_skip_locked:
+                due = due.select_for_update(skip_locked=True)
+            emails = list(due[:batch_size])
+            exhausted = [e.pk for e in emails if e.attempts >= max_attempts]
+            emails = [e for e in emails if e.attempts < max_attempts]
+            if exhausted:
+                # The lease of their last attempt expired without an outcome
+                OutboxEmail.objects.filter(pk__in=exhausted).update(
+                    status=OutboxEmail.STATUS_FAILED,
+                    last_error='Invio interrotto: tentativi esauriti'
+                )
+            if emails:
+                lease = getattr(settings, 'OUTBOX_LEASE', 300)
+                OutboxEmail.objects.filter(pk__in=[e.pk for e in emails]).update(
+                    status=OutboxEmail.STATUS_SENDING,
+                    attempts=F('attempts') + 1,
+                    next_attempt_at=now + timedelta(seconds=lease)
+                )
+                for email in emails:
+                    email.attempts += 1
+        if exhausted:
+            self.stderr.write(f'Email abbandonate dopo {max_attempts} tentativi interrotti: {len(exhausted)}')
+        return emails
+    
+    def send_digest(self, emails, mail_connection):
+        """Send a burst of notifications as a single digest email per recipient."""
+        sent = failed = 0
+        by_recipient = {}
+        for email in emails:
+            by_recipient.setdefault(email.recipient, []).append(email)
+        
+        for recipient, group in by_recipient.items():
+            body = '\n\n----------------------------------------\n'.join(e.body.strip() for e in group)
+            try:
+                send_mail(
+                    f"[Portfolio] {len(group)} nuovi messaggi",
+                    body,
+                    settings.DEFAULT_FROM_EMAIL,
+                    [recipient],
+                    connection=mail_connection,
+                )
+            except Exception as exc:
+                self.mark_failed(group, exc)
+                failed += len(group)
+            else:
+                self.mark_sent(group)
+                sent += len(group)
+        return sent, failed
+    
+    def mark_sent(self, emails):
+        """Record a successful delivery; each call is its own short transaction."""
+        OutboxEmail.objects.filter(pk__in=[e.pk for e in emails]).update(
+            status=OutboxEmail.STATUS_SENT,
+            sent_at=timezone.now(),
+            last_error=''
+        )
+    
+    def mark_failed(self, emails, exc):
+        """
+        Schedule a retry with exponential backoff, or give up after too
+        many attempts (already counted by claim()).
+        """
+        max_attempts = getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 8)
+        base_delay = getattr(settings, 'OUTBOX_RETRY_BASE_DELAY', 30)
+        with transaction.atomic():
+            for email in emails:
+                email.last_error = f'{type(exc).__name__}: {exc}'
+                if email.attempts >= max_attempts:
+                    email.status = OutboxEmail.STATUS_FAILED
+                else:
+                    email.status = OutboxEmail.STATUS_PENDING
+                    delay = min(base_delay * 2 ** (email.attempts - 1), 60 * 60)
+                    email.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+                email.save(update_fields=['last_error', 'status', 'next_attempt_at'])
+        self.stderr.write(f'Invio fallito ({len(emails)} email): {exc}')
@@ -0,0 +1,116 @@
+"""
+Prometheus Metrics
+
+Request, SQL, page cache, contact form and worker restart metrics
+aggregated across all Gunicorn workers.
+
+With several worker processes each one writes its samples to files in
+PROMETHEUS_MULTIPROC_DIR (set by gunicorn_config.py) and the /metrics
+view merges them at scrape time. Without that variable (runserver) the
+metrics of the single process are reported.
+"""
+
+import os
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    REGISTRY,
+)
+
+from .concurrency import observe_queries
+from .worker_metrics import WORKER_RESTARTS  # noqa: F401 (registered with the other metrics)
+
+
+REQUESTS = Counter(
+    'portfolio_http_requests_total',
+    'HTTP requests by URL name, method and status code',
+    ['view', 'method', 'status']
+)
+LATENCY = Histogram(
+    'portfolio_http_request_duration_seconds',
+    'Time to produce the response, by URL name',
+    ['view'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+DB_QUERIES = Counter(
+    'portfolio_db_queries_total',
+    'SQL queries executed, by URL name',
+    ['view']
+)
+PAGE_CACHE = Counter(
+    'portfolio_page_cache_requests_total',
+    'Public page cache lookups by result (hit/miss)',
+    ['result']
+)
+CONTACT_SUBMISSIONS = Counter(
+    'portfolio_contact_submissions_total',
+    'Contact form submissions by outcome (accepted/invalid/rate_limited)',
+    ['outcome']
+)
+
+
+def render_latest():
+    """(body, content type) of the current metrics of every worker."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    """Record count, latency and SQL queries of every request by URL name."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        queries = _QueryCounter()
+        started = time.perf_counter()
+        with observe_queries(queries):
+            response = self.get_response(request)
+        return self.record(request, response, queries, started)
+
+    async def __acall__(self, request):
+        queries = _QueryCounter()
+        started = time.perf_counter()
+        with observe_queries(queries):
+            response = await self.get_response(request)
+        return self.record(request, response, queries, started)
+
+    def record(self, request, response, queries, started):
+        duration = time.perf_counter() - started
+        match = request.resolver_match
+        view = match.view_name if match else 'unmatched'
+        REQUESTS.labels(view, request.method, str(response.status_code)).inc()
+        LATENCY.labels(view).observe(duration)
+        if queries.count:
+            DB_QUERIES.labels(view).inc(queries.count)
+        return response
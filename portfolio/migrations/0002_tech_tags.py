@@ -0,0 +1,84 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_techs(apps, schema_editor):
+    """Populate Tech/ProjectTech from the existing tech_stack JSON lists."""
+    Project = apps.get_model('portfolio', 'Project')
+    Tech = apps.get_model('portfolio', 'Tech')
+    ProjectTech = apps.get_model('portfolio', 'ProjectTech')
+    
+    tech_ids = {}
+    links = []
+    for project in Project.objects.only('pk', 'tech_stack').iterator(chunk_size=500):
+        stack = project.tech_stack
+        if isinstance(stack, str):
+            stack = stack.split(',')
+        if not isinstance(stack, list):
+            continue
+        for name in {str(t).strip()[:50] for t in stack}:
+            if not name:
+                continue
+            if name not in tech_ids:
+                tech_ids[name] = Tech.objects.get_or_create(name=name)[0].pk
+            links.append(ProjectTech(project_id=project.pk, tech_id=tech_ids[name]))
+    ProjectTech.objects.bulk_create(links, batch_size=500, ignore_conflicts=True)
+    
+    counts = (
+        ProjectTech.objects.filter(project__is_visible=True)
+        .values('tech').annotate(n=Count('pk'))
+    )
+    for row in counts:
+        Tech.objects.filter(pk=row['tech']).update(visible_project_count=row['n'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tech',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='Nome')),
+                ('visible_project_count', models.PositiveIntegerField(db_index=True, default=0, verbose_name='Progetti visibili')),
+            ],
+            options={
+                'verbose_name': 'Tecnologia',
+                'verbose_name_plural': 'Tecnologie',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProjectTech',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='project_techs', to='portfolio.project')),
+                ('tech', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='project_techs', to='portfolio.tech')),
+            ],
+            options={
+                'verbose_name': 'Tecnologia progetto',
+                'verbose_name_plural': 'Tecnologie progetto',
+            },
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='techs',
+            field=models.ManyToManyField(blank=True, help_text='Sincronizzato automaticamente dal Tech Stack', related_name='projects', through='portfolio.ProjectTech', to='portfolio.tech', verbose_name='Tecnologie'),
+        ),
+        migrations.AddIndex(
+            model_name='projecttech',
+            index=models.Index(fields=['tech', 'project'], name='projecttech_tech_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='projecttech',
+            constraint=models.UniqueConstraint(fields=('project', 'tech'), name='unique_project_tech'),
+        ),
+        migrations.RunPython(backfill_techs, migrations.RunPython.noop),
+    ]
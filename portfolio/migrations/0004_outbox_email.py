@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:22
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0003_project_listing_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=255, verbose_name='Oggetto')),
+                ('body', models.TextField(verbose_name='Testo')),
+                ('recipient', models.EmailField(max_length=254, verbose_name='Destinatario')),
+                ('status', models.CharField(choices=[('pending', 'In coda'), ('sent', 'Inviata'), ('failed', 'Fallita')], default='pending', max_length=10, verbose_name='Stato')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Tentativi')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Prossimo tentativo')),
+                ('last_error', models.TextField(blank=True, verbose_name='Ultimo errore')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Data creazione')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Data invio')),
+                ('contact_message', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='outbox_emails', to='portfolio.contactmessage', verbose_name='Messaggio')),
+            ],
+            options={
+                'verbose_name': 'Email in uscita',
+                'verbose_name_plural': 'Email in uscita',
+                'ordering': ['next_attempt_at', 'id'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0004_outbox_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='image_hero_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Varianti hero'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='image_thumbnail_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Varianti thumbnail'),
+        ),
+        migrations.AddField(
+            model_name='sitesettings',
+            name='profile_image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Varianti foto profilo'),
+        ),
+        migrations.AddField(
+            model_name='testimonial',
+            name='photo_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Varianti foto'),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def gallery_json_to_rows(apps, schema_editor):
+    """
+    Create a GalleryImage per URL of the legacy Project.gallery lists.
+    URLs under MEDIA_URL become managed images; the others stay external.
+    Metadata is filled later by `manage.py generate_image_variants`.
+    """
+    Project = apps.get_model('portfolio', 'Project')
+    GalleryImage = apps.get_model('portfolio', 'GalleryImage')
+    media_url = settings.MEDIA_URL
+    
+    rows = []
+    for project in Project.objects.only('pk', 'gallery').iterator(chunk_size=500):
+        if not isinstance(project.gallery, list):
+            continue
+        for order, url in enumerate(project.gallery):
+            url = str(url).strip()
+            if not url:
+                continue
+            if url.startswith(media_url):
+                rows.append(GalleryImage(project_id=project.pk, image=url[len(media_url):], order=order))
+            else:
+                rows.append(GalleryImage(project_id=project.pk, external_url=url[:500], order=order))
+    GalleryImage.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0005_image_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='project',
+            name='gallery',
+            field=models.JSONField(blank=True, default=list, help_text='Vecchia lista di URL, migrata in GalleryImage. Usa la sezione Galleria.', verbose_name='Galleria immagini (legacy)'),
+        ),
+        migrations.CreateModel(
+            name='GalleryImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image', models.ImageField(blank=True, upload_to='projects/gallery/', verbose_name='Immagine')),
+                ('external_url', models.URLField(blank=True, help_text="Usato solo se non è caricata un'immagine", max_length=500, verbose_name='URL esterno')),
+                ('alt', models.CharField(blank=True, max_length=200, verbose_name='Testo alternativo')),
+                ('width', models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Larghezza')),
+                ('height', models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Altezza')),
+                ('byte_size', models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Dimensione (byte)')),
+                ('dominant_color', models.CharField(blank=True, editable=False, max_length=7, verbose_name='Colore dominante')),
+                ('placeholder', models.TextField(blank=True, editable=False, verbose_name='Placeholder')),
+                ('order', models.PositiveIntegerField(default=0, verbose_name='Ordine')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='gallery_images', to='portfolio.project', verbose_name='Progetto')),
+            ],
+            options={
+                'verbose_name': 'Immagine galleria',
+                'verbose_name_plural': 'Immagini galleria',
+                'ordering': ['order', 'id'],
+                'indexes': [models.Index(fields=['project', 'order'], name='galleryimage_project_idx')],
+            },
+        ),
+        migrations.RunPython(gallery_json_to_rows, migrations.RunPython.noop),
+    ]
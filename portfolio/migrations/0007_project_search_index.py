@@ -0,0 +1,82 @@
+# Full-text search index: FTS5 on SQLite, tsvector + GIN on PostgreSQL
+
+from django.conf import settings
+from django.db import OperationalError, migrations
+
+
+COLUMNS = ('title', 'description', 'long_description', 'challenge', 'solution', 'results')
+WEIGHTS = {'title': 'A', 'description': 'B', 'long_description': 'C',
+           'challenge': 'D', 'solution': 'D', 'results': 'D'}
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    Project = apps.get_model('portfolio', 'Project')
+    
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            try:
+                cursor.execute(
+                    "CREATE VIRTUAL TABLE portfolio_project_fts USING fts5("
+                    "title, description, long_description, challenge, solution, results, tech, "
+                    "tokenize = 'unicode61 remove_diacritics 2')"
+                )
+            except OperationalError:
+                # SQLite built without FTS5: search falls back to icontains
+                return
+            for project in Project.objects.iterator(chunk_size=500):
+                stack = project.tech_stack
+                if isinstance(stack, str):
+                    stack = stack.split(',')
+                tech = ' '.join(str(t).strip() for t in stack) if isinstance(stack, list) else ''
+                cursor.execute(
+                    "INSERT INTO portfolio_project_fts (rowid, title, description, long_description, "
+                    "challenge, solution, results, tech) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
+                    [project.pk] + [getattr(project, name) for name in COLUMNS] + [tech]
+                )
+    
+    elif connection.vendor == 'postgresql':
+        config = getattr(settings, 'SEARCH_TS_CONFIG', 'italian')
+        vector = ' || '.join(
+            f"setweight(to_tsvector(%s::regconfig, {name}), '{WEIGHTS[name]}')" for name in COLUMNS
+        )
+        tech = (
+            "setweight(to_tsvector(%s::regconfig, CASE WHEN jsonb_typeof(tech_stack) = 'array' "
+            "THEN array_to_string(ARRAY(SELECT jsonb_array_elements_text(tech_stack)), ' ') "
+            "ELSE tech_stack #>> '{}' END), 'A')"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE TABLE portfolio_project_search ("
+                "project_id bigint PRIMARY KEY REFERENCES portfolio_project (id) "
+                "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+                "document tsvector NOT NULL)"
+            )
+            cursor.execute(
+                "CREATE INDEX portfolio_project_search_gin ON portfolio_project_search USING GIN (document)"
+            )
+            cursor.execute(
+                f"INSERT INTO portfolio_project_search (project_id, document) "
+                f"SELECT id, {vector} || {tech} FROM portfolio_project",
+                [config] * (len(COLUMNS) + 1)
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute("DROP TABLE IF EXISTS portfolio_project_fts")
+        elif connection.vendor == 'postgresql':
+            cursor.execute("DROP TABLE IF EXISTS portfolio_project_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0006_gallery_image'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0007_project_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedProject',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+            ],
+            options={
+                'verbose_name': 'Progetto correlato',
+                'verbose_name_plural': 'Progetti correlati',
+            },
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='related_stale',
+            field=models.BooleanField(default=True, editable=False, help_text='Impostato a ogni modifica, azzerato da manage.py build_related', verbose_name='Correlati da ricalcolare'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(condition=models.Q(('related_stale', True)), fields=['related_stale'], name='project_related_stale_idx'),
+        ),
+        migrations.AddField(
+            model_name='relatedproject',
+            name='project',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_links', to='portfolio.project'),
+        ),
+        migrations.AddField(
+            model_name='relatedproject',
+            name='related',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='portfolio.project'),
+        ),
+        migrations.AddConstraint(
+            model_name='relatedproject',
+            constraint=models.UniqueConstraint(fields=('project', 'rank'), name='unique_related_project_rank'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:36
+
+from django.db import OperationalError, migrations, models
+
+
+COLUMNS = ('name', 'email', 'subject', 'message')
+
+
+def create_message_search_index(apps, schema_editor):
+    # Full-text index of the contact messages for the admin search:
+    # FTS5 on SQLite, a GIN expression index on PostgreSQL
+    connection = schema_editor.connection
+    ContactMessage = apps.get_model('portfolio', 'ContactMessage')
+    
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            try:
+                cursor.execute(
+                    "CREATE VIRTUAL TABLE portfolio_contactmessage_fts USING fts5("
+                    "name, email, subject, message, "
+                    "tokenize = 'unicode61 remove_diacritics 2')"
+                )
+            except OperationalError:
+                # SQLite built without FTS5: search falls back to icontains
+                return
+            cursor.execute(
+                "INSERT INTO portfolio_contactmessage_fts (rowid, name, email, subject, message) "
+                "SELECT id, name, email, subject, message FROM portfolio_contactmessage"
+            )
+    
+    elif connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE INDEX portfolio_contactmessage_search_gin ON portfolio_contactmessage "
+                "USING GIN (to_tsvector('simple'::regconfig, name || ' ' || translate(email, '@.', '  ') "
+                "|| ' ' || subject || ' ' || message))"
+            )
+
+
+def drop_message_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute("DROP TABLE IF EXISTS portfolio_contactmessage_fts")
+        elif connection.vendor == 'postgresql':
+            cursor.execute("DROP INDEX IF EXISTS portfolio_contactmessage_search_gin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0008_related_projects'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contactmessage',
+            index=models.Index(fields=['created_at'], name='contactmessage_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactmessage',
+            index=models.Index(fields=['is_read', 'created_at'], name='contactmessage_read_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['order', '-created_at'], name='project_admin_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['created_at'], name='project_created_idx'),
+        ),
+        migrations.RunPython(create_message_search_index, drop_message_search_index),
+    ]
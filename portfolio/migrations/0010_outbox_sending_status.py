@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0009_admin_large_tables'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='outboxemail',
+            name='status',
+            field=models.CharField(choices=[('pending', 'In coda'), ('sending', 'In invio'), ('sent', 'Inviata'), ('failed', 'Fallita')], default='pending', max_length=10, verbose_name='Stato'),
+        ),
+    ]
@@ -2,15 +2,59 @@
 Portfolio Models
 
 This module contains all the database models for the portfolio website,
-including Project, Testimonial, Skill, and TimelineEvent models.
+including Project, Tech, GalleryImage, Testimonial, Skill, TimelineEvent
+and the contact message outbox.
 """
 
-from django.db import models
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.dispatch import Signal
+from django.db.models.functions import Coalesce
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.text import slugify
 
+from .cache import bump_site_settings_version, get_site_settings_version
+from .images import ResponsiveImagesMixin, compute_image_metadata
+from .instrumentation import measure
+
+
+# Sent by ProjectManager.bulk_create(), which bypasses save() and post_save
+projects_bulk_created = Signal()
+
+# Room kept at the end of an automatic slug for a "-N" suffix
+SLUG_SUFFIX_RESERVE = 6
+
+# Attempts at saving with a fresh slug after losing a race on the unique index
+SLUG_SAVE_ATTEMPTS = 5
+
+
+def _chunks(items, size=500):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class ProjectManager(models.Manager):
+    """
+    Manager whose bulk_create() also allocates slugs, links tech tags and
+    notifies listeners, which Model.save() would otherwise do per row.
+    """
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        with transaction.atomic(using=self.db):
+            self.model.allocate_slugs([obj for obj in objs if not obj.slug])
+            created = super().bulk_create(objs, *args, **kwargs)
+            self.model.sync_techs_bulk(created)
+            projects_bulk_created.send(sender=self.model, projects=created)
+        return created
+
 
-class Project(models.Model):
+class Project(ResponsiveImagesMixin, models.Model):
     """
     Main Project model for portfolio showcases.
     
@@ -73,11 +117,23 @@ class Project(models.Model):
         verbose_name='Immagine hero',
         help_text='Immagine grande per la pagina dettaglio'
     )
+    image_thumbnail_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Varianti thumbnail'
+    )
+    image_hero_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Varianti hero'
+    )
     gallery = models.JSONField(
         default=list,
         blank=True,
-        verbose_name='Galleria immagini',
-        help_text='Lista di URL immagini aggiuntive (JSON array)'
+        verbose_name='Galleria immagini (legacy)',
+        help_text='Vecchia lista di URL, migrata in GalleryImage. Usa la sezione Galleria.'
     )
     tech_stack = models.JSONField(
         default=list,
@@ -123,25 +179,168 @@ class Project(models.Model):
         verbose_name='Visibile',
         help_text='Rendi il progetto visibile nel portfolio'
     )
+    techs = models.ManyToManyField(
+        'Tech',
+        through='ProjectTech',
+        blank=True,
+        related_name='projects',
+        verbose_name='Tecnologie',
+        help_text='Sincronizzato automaticamente dal Tech Stack'
+    )
+    related_stale = models.BooleanField(
+        default=True,
+        editable=False,
+        verbose_name='Correlati da ricalcolare',
+        help_text='Impostato a ogni modifica, azzerato da manage.py build_related'
+    )
+    
+    objects = ProjectManager()
     
     class Meta:
         verbose_name = 'Progetto'
         verbose_name_plural = 'Progetti'
         ordering = ['order', '-created_at']
+        indexes = [
+            models.Index(
+                fields=['is_visible', 'order', '-created_at', 'id'],
+                name='project_listing_idx'
+            ),
+            models.Index(
+                fields=['related_stale'],
+                condition=Q(related_stale=True),
+                name='project_related_stale_idx'
+            ),
+            # Admin changelist: default ordering and date hierarchy
+            models.Index(fields=['order', '-created_at'], name='project_admin_order_idx'),
+            models.Index(fields=['created_at'], name='project_created_idx'),
+        ]
+    
+    responsive_image_fields = {
+        'image_thumbnail': 'image_thumbnail_variants',
+        'image_hero': 'image_hero_variants',
+    }
     
     def __str__(self):
         return self.title
     
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.title)
-            # Ensure unique slug
-            original_slug = self.slug
-            counter = 1
-            while Project.objects.filter(slug=self.slug).exclude(pk=self.pk).exists():
-                self.slug = f"{original_slug}-{counter}"
-                counter += 1
-        super().save(*args, **kwargs)
+        if self.slug:
+            super().save(*args, **kwargs)
+        else:
+            # Ensure unique slug: allocate in one query, and if a concurrent
+            # save takes it first, allocate again instead of failing
+            for attempt in range(SLUG_SAVE_ATTEMPTS):
+                Project.allocate_slugs([self])
+                try:
+                    with transaction.atomic():
+                        super().save(*args, **kwargs)
+                    break
+                except IntegrityError:
+                    slug_taken = Project.objects.filter(slug=self.slug).exclude(pk=self.pk).exists()
+                    if not slug_taken or attempt == SLUG_SAVE_ATTEMPTS - 1:
+                        raise
+                    self.slug = ''
+        update_fields = kwargs.get('update_fields')
+        # The tag counts only include visible projects
+        if update_fields is None or {'tech_stack', 'is_visible'} & set(update_fields):
+            self.sync_techs()
+        self.update_image_variants(update_fields)
+    
+    @classmethod
+    def allocate_slugs(cls, projects):
+        """
+        Give each project the first free slug derived from its title
+        ("title", "title-1", "title-2", ...), reading the taken slugs of
+        up to 500 distinct titles per query.
+        """
+        max_length = cls._meta.get_field('slug').max_length
+        by_base = {}
+        for project in projects:
+            base = slugify(project.title)
+            if len(base) > max_length - SLUG_SUFFIX_RESERVE:
+                base = base[:max_length - SLUG_SUFFIX_RESERVE].rstrip('-')
+            by_base.setdefault(base, []).append(project)
+        
+        exclude_pks = [project.pk for project in projects if project.pk]
+        taken = set()
+        for bases in _chunks(by_base):
+            condition = Q(slug__in=bases)
+            for base in bases:
+                condition |= Q(slug__startswith=f'{base}-')
+            taken.update(
+                cls.objects.filter(condition).exclude(pk__in=exclude_pks).values_list('slug', flat=True)
+            )
+        
+        for base, group in by_base.items():
+            counter = 0
+            for project in group:
+                slug = base
+                while slug in taken:
+                    counter += 1
+                    slug = f'{base}-{counter}'
+                project.slug = slug
+                taken.add(slug)
+    
+    def _tech_names(self):
+        names = []
+        for name in self.tech_stack_list:
+            name = str(name).strip()[:50]
+            if name and name not in names:
+                names.append(name)
+        return names
+    
+    def sync_techs(self):
+        """
+        Mirror tech_stack into the normalized Tech/ProjectTech tables
+        and refresh the visible project count of every affected tag.
+        """
+        names = self._tech_names()
+        
+        existing = dict(
+            Tech.objects.filter(name__in=names).values_list('name', 'pk')
+        )
+        missing = [Tech(name=name) for name in names if name not in existing]
+        if missing:
+            Tech.objects.bulk_create(missing, ignore_conflicts=True)
+            existing = dict(
+                Tech.objects.filter(name__in=names).values_list('name', 'pk')
+            )
+        wanted = {existing[name] for name in names}
+        
+        current = set(
+            ProjectTech.objects.filter(project=self).values_list('tech_id', flat=True)
+        )
+        removed = current - wanted
+        if removed:
+            ProjectTech.objects.filter(project=self, tech_id__in=removed).delete()
+        ProjectTech.objects.bulk_create(
+            [ProjectTech(project=self, tech_id=tech_id) for tech_id in wanted - current],
+            ignore_conflicts=True
+        )
+        Tech.refresh_counts(current | wanted)
+    
+    @classmethod
+    def sync_techs_bulk(cls, projects):
+        """Link newly created projects to their tags with batched queries."""
+        names_by_project = {project.pk: project._tech_names() for project in projects if project.pk}
+        all_names = set().union(*names_by_project.values()) if names_by_project else set()
+        if not all_names:
+            return
+        
+        Tech.objects.bulk_create([Tech(name=name) for name in all_names], ignore_conflicts=True)
+        tech_ids = {}
+        for names in _chunks(all_names):
+            tech_ids.update(Tech.objects.filter(name__in=names).values_list('name', 'pk'))
+        ProjectTech.objects.bulk_create(
+            [
+                ProjectTech(project_id=pk, tech_id=tech_ids[name])
+                for pk, names in names_by_project.items()
+                for name in names
+            ],
+            batch_size=1000,
+            ignore_conflicts=True
+        )
+        Tech.refresh_counts(set(tech_ids.values()))
     
     def get_absolute_url(self):
         return reverse('portfolio:project_detail', kwargs={'slug': self.slug})
@@ -149,14 +348,233 @@ class Project(models.Model):
     @property
     def tech_stack_list(self):
         """Return tech stack as list even if stored as string."""
-        if isinstance(self.tech_stack, list):
-            return self.tech_stack
-        if isinstance(self.tech_stack, str):
-            return [t.strip() for t in self.tech_stack.split(',')]
+        return self.normalize_tech_stack(self.tech_stack)
+    
+    @staticmethod
+    def normalize_tech_stack(value):
+        """Return a raw tech_stack value as a list (it may be stored as a string)."""
+        if isinstance(value, list):
+            return value
+        if isinstance(value, str):
+            return [t.strip() for t in value.split(',')]
         return []
 
 
-class Testimonial(models.Model):
+class GalleryImage(models.Model):
+    """
+    Image of a project gallery.
+    
+    Dimensions, byte size, dominant colour and a tiny blurred placeholder
+    are computed once at upload, so the detail page can reserve the right
+    space and show an instant preview before the full image loads.
+    """
+    
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.CASCADE,
+        related_name='gallery_images',
+        verbose_name='Progetto'
+    )
+    image = models.ImageField(
+        upload_to='projects/gallery/',
+        blank=True,
+        verbose_name='Immagine'
+    )
+    external_url = models.URLField(
+        max_length=500,
+        blank=True,
+        verbose_name='URL esterno',
+        help_text='Usato solo se non è caricata un\'immagine'
+    )
+    alt = models.CharField(
+        max_length=200,
+        blank=True,
+        verbose_name='Testo alternativo'
+    )
+    width = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Larghezza'
+    )
+    height = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Altezza'
+    )
+    byte_size = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Dimensione (byte)'
+    )
+    dominant_color = models.CharField(
+        max_length=7,
+        blank=True,
+        editable=False,
+        verbose_name='Colore dominante'
+    )
+    placeholder = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Placeholder'
+    )
+    order = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Ordine'
+    )
+    
+    class Meta:
+        verbose_name = 'Immagine galleria'
+        verbose_name_plural = 'Immagini galleria'
+        ordering = ['order', 'id']
+        indexes = [
+            models.Index(fields=['project', 'order'], name='galleryimage_project_idx'),
+        ]
+    
+    def __str__(self):
+        return self.alt or self.image.name or self.external_url
+    
+    def save(self, *args, **kwargs):
+        # Measure new uploads (and rows migrated without metadata) only once
+        if self.image and (not self.image._committed or self.width is None):
+            if not self.image._committed:
+                self.image.save(self.image.name, self.image.file, save=False)
+            self.update_metadata()
+        super().save(*args, **kwargs)
+    
+    def update_metadata(self):
+        try:
+            metadata = compute_image_metadata(self.image)
+        except (OSError, ValueError):
+            return
+        for name, value in metadata.items():
+            setattr(self, name, value)
+    
+    @property
+    def url(self):
+        return self.image.url if self.image else self.external_url
+
+
+class Tech(models.Model):
+    """
+    Normalized technology tag.
+    
+    Kept in sync with Project.tech_stack on save, so tag filtering is an
+    indexed join instead of a scan over the JSON field, and the filter bar
+    reads the precomputed visible_project_count instead of every project.
+    """
+    
+    name = models.CharField(
+        max_length=50,
+        unique=True,
+        verbose_name='Nome'
+    )
+    visible_project_count = models.PositiveIntegerField(
+        default=0,
+        db_index=True,
+        verbose_name='Progetti visibili'
+    )
+    
+    class Meta:
+        verbose_name = 'Tecnologia'
+        verbose_name_plural = 'Tecnologie'
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+    
+    @classmethod
+    def refresh_counts(cls, tech_ids=None):
+        """Recompute visible_project_count for the given tags (or all of them)."""
+        techs = cls.objects.all()
+        if tech_ids is not None:
+            if not tech_ids:
+                return
+            techs = techs.filter(pk__in=tech_ids)
+        visible = ProjectTech.objects.filter(
+            tech=OuterRef('pk'),
+            project__is_visible=True
+        ).order_by().values('tech').annotate(n=Count('pk')).values('n')
+        techs.update(visible_project_count=Coalesce(Subquery(visible), 0))
+    
+    @classmethod
+    def filter_names(cls):
+        """Sorted names of the tags used by at least one visible project."""
+        return list(
+            cls.objects.filter(visible_project_count__gt=0).values_list('name', flat=True)
+        )
+
+
+class ProjectTech(models.Model):
+    """
+    Through table linking a Project to its Tech tags.
+    """
+    
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.CASCADE,
+        related_name='project_techs'
+    )
+    tech = models.ForeignKey(
+        Tech,
+        on_delete=models.CASCADE,
+        related_name='project_techs'
+    )
+    
+    class Meta:
+        verbose_name = 'Tecnologia progetto'
+        verbose_name_plural = 'Tecnologie progetto'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['project', 'tech'],
+                name='unique_project_tech'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['tech', 'project'], name='projecttech_tech_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.project_id} - {self.tech_id}"
+
+
+class RelatedProject(models.Model):
+    """
+    One precomputed neighbour of a project, shown in its "related
+    projects" section. Rows are written by `manage.py build_related`
+    (see portfolio/related.py), never edited by hand.
+    """
+    
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.CASCADE,
+        related_name='related_links'
+    )
+    related = models.ForeignKey(
+        Project,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    
+    class Meta:
+        verbose_name = 'Progetto correlato'
+        verbose_name_plural = 'Progetti correlati'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['project', 'rank'],
+                name='unique_related_project_rank'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.project_id} -> {self.related_id}"
+
+
+class Testimonial(ResponsiveImagesMixin, models.Model):
     """
     Testimonial model for client/collaborator reviews.
     """
@@ -179,6 +597,12 @@ class Testimonial(models.Model):
         null=True,
         verbose_name='Foto profilo'
     )
+    photo_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Varianti foto'
+    )
     project = models.ForeignKey(
         Project,
         on_delete=models.SET_NULL,
@@ -204,8 +628,14 @@ class Testimonial(models.Model):
         verbose_name_plural = 'Testimonianze'
         ordering = ['order', '-created_at']
     
+    responsive_image_fields = {'photo': 'photo_variants'}
+    
     def __str__(self):
         return f"{self.name} - {self.role}"
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.update_image_variants(kwargs.get('update_fields'))
 
 
 class Skill(models.Model):
@@ -321,7 +751,7 @@ class TimelineEvent(models.Model):
         return f"{self.year} - {self.title}"
 
 
-class SiteSettings(models.Model):
+class SiteSettings(ResponsiveImagesMixin, models.Model):
     """
     Singleton model for site-wide settings.
     Only one instance should exist.
@@ -356,6 +786,12 @@ class SiteSettings(models.Model):
         null=True,
         verbose_name='Foto profilo'
     )
+    profile_image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Varianti foto profilo'
+    )
     email = models.EmailField(
         blank=True,
         verbose_name='Email'
@@ -407,10 +843,15 @@ class SiteSettings(models.Model):
         verbose_name='Clienti soddisfatti'
     )
     
+    # Process-local copy used by get_settings(): (instance, version, checked_at)
+    _cached = None
+    
     class Meta:
         verbose_name = 'Impostazioni Sito'
         verbose_name_plural = 'Impostazioni Sito'
     
+    responsive_image_fields = {'profile_image': 'profile_image_variants'}
+    
     def __str__(self):
         return 'Impostazioni Sito'
     
@@ -418,11 +859,49 @@ class SiteSettings(models.Model):
         # Ensure only one instance exists
         self.pk = 1
         super().save(*args, **kwargs)
+        self.update_image_variants(kwargs.get('update_fields'))
+        SiteSettings._cached = None
+        transaction.on_commit(self._settings_changed)
+    
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        SiteSettings._cached = None
+        transaction.on_commit(self._settings_changed)
+        return result
+    
+    @staticmethod
+    def _settings_changed():
+        # Bumped only once the change is visible, so no worker can reload
+        # and pin the old row under the new version
+        SiteSettings._cached = None
+        bump_site_settings_version()
     
     @classmethod
+    @measure('settings')
     def get_settings(cls):
-        """Get or create the site settings instance."""
-        obj, created = cls.objects.get_or_create(pk=1)
+        """
+        Get or create the site settings instance.
+        
+        Each worker keeps the row in memory and only checks the shared
+        version counter every SITE_SETTINGS_CACHE_TTL seconds, so an edit
+        reaches every worker within that delay.
+        """
+        now = time.monotonic()
+        ttl = getattr(settings, 'SITE_SETTINGS_CACHE_TTL', 5)
+        cached = cls._cached
+        if cached is not None:
+            obj, version, checked_at = cached
+            if now - checked_at < ttl:
+                return obj
+            if get_site_settings_version() == version:
+                cls._cached = (obj, version, now)
+                return obj
+        
+        version = get_site_settings_version()
+        obj = cls.objects.filter(pk=1).first()
+        if obj is None:
+            obj, created = cls.objects.get_or_create(pk=1)
+        cls._cached = (obj, version, now)
         return obj
 
 
@@ -459,6 +938,110 @@ class ContactMessage(models.Model):
         verbose_name = 'Messaggio'
         verbose_name_plural = 'Messaggi'
         ordering = ['-created_at']
+        indexes = [
+            # Admin changelist: ordering, date hierarchy and the is_read filter
+            models.Index(fields=['created_at'], name='contactmessage_created_idx'),
+            models.Index(fields=['is_read', 'created_at'], name='contactmessage_read_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.subject or 'Nessun oggetto'}"
+
+
+class OutboxEmail(models.Model):
+    """
+    Email waiting to be delivered by the send_outbox command.
+    
+    Rows are written in the same transaction as the ContactMessage, so the
+    request never waits on SMTP and no message is lost if delivery fails.
+    While a row is being sent, next_attempt_at holds the end of the sender's
+    lease: a row left in 'sending' by a crashed worker is claimed again once
+    the lease has expired.
+    """
+    
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'In coda'),
+        (STATUS_SENDING, 'In invio'),
+        (STATUS_SENT, 'Inviata'),
+        (STATUS_FAILED, 'Fallita'),
+    ]
+    
+    contact_message = models.ForeignKey(
+        ContactMessage,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='outbox_emails',
+        verbose_name='Messaggio'
+    )
+    subject = models.CharField(
+        max_length=255,
+        verbose_name='Oggetto'
+    )
+    body = models.TextField(
+        verbose_name='Testo'
+    )
+    recipient = models.EmailField(
+        verbose_name='Destinatario'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        verbose_name='Stato'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Tentativi'
+    )
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Prossimo tentativo'
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Ultimo errore'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Data creazione'
+    )
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Data invio'
+    )
+    
+    class Meta:
+        verbose_name = 'Email in uscita'
+        verbose_name_plural = 'Email in uscita'
+        ordering = ['next_attempt_at', 'id']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.recipient} - {self.subject}"
+    
+    @classmethod
+    def for_contact_message(cls, message):
+        """Queue the notification email for a new contact message."""
+        return cls.objects.create(
+            contact_message=message,
+            subject=f"[Portfolio] Nuovo messaggio da {message.name}",
+            body=f"""
+Nuovo messaggio dal portfolio:
+
+Nome: {message.name}
+Email: {message.email}
+Oggetto: {message.subject or 'Nessun oggetto'}
+
+Messaggio:
+{message.message}
+            """,
+            recipient=settings.CONTACT_EMAIL,
+        )
@@ -0,0 +1,200 @@
+"""
+Portfolio Pagination
+
+Opaque keyset cursors over the project listing order
+(order, -created_at, id), so deep pages cost the same as the first one,
+a numbered paginator built on the same keys, and an admin paginator that
+estimates the size of large tables instead of counting them.
+"""
+
+import base64
+import hashlib
+import json
+from datetime import datetime
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+from django.utils.functional import cached_property
+
+from .cache import PAGE_CACHE_TIMEOUT, get_content_generation
+
+
+# Listing order shared by every keyset-paginated project query
+PROJECT_KEYSET_ORDERING = ('order', '-created_at', 'id')
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor that cannot be decoded."""
+
+
+def encode_cursor(row):
+    """Encode the (order, created_at, id) of the last row into an opaque token."""
+    payload = [row['order'], row['created_at'].isoformat(), row['id']]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """Decode a token produced by encode_cursor()."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        order, created_at, pk = json.loads(raw)
+        return int(order), datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor('Cursore non valido') from exc
+
+
+def _keyset_filter(queryset, order, created_at, pk, inclusive=False):
+    last = Q(id__gte=pk) if inclusive else Q(id__gt=pk)
+    # The redundant order__gte bound lets the listing index seek to the
+    # key instead of filtering every row before it
+    return queryset.filter(
+        Q(order__gte=order),
+        Q(order__gt=order)
+        | Q(order=order, created_at__lt=created_at)
+        | Q(last, order=order, created_at=created_at)
+    )
+
+
+def keyset_after(queryset, token):
+    """Filter a queryset ordered by PROJECT_KEYSET_ORDERING to rows after token."""
+    return _keyset_filter(queryset, *decode_cursor(token))
+
+
+# Page start keys stored per cache entry
+STARTS_PER_ENTRY = 1000
+
+
+class KeysetPaginator(Paginator):
+    """
+    Numbered pages over a queryset ordered by PROJECT_KEYSET_ORDERING,
+    fetched by keyset instead of OFFSET and without a COUNT(*) per request.
+    
+    The total and the first key of every page (numbered in the database,
+    so only one row per page reaches Python) are computed the first time
+    a listing is paginated, and cached under the content
+    generation, so any project edit invalidates them. `cache_key` tells
+    apart the listings (filters) of the same queryset shape.
+    """
+
+    def __init__(self, object_list, per_page, cache_key, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        digest = hashlib.md5(cache_key.encode('utf-8')).hexdigest()
+        self.cache_prefix = f'portfolio:listing:{get_content_generation()}:{digest}'
+
+    @cached_property
+    def count(self):
+        count = cache.get(f'{self.cache_prefix}:count')
+        if count is None:
+            count, starts = self._build()
+        return count
+
+    def _build(self):
+        count = self.object_list.count()
+        starts = self._page_starts() if count else []
+        entries = {
+            f'{self.cache_prefix}:starts:{i // STARTS_PER_ENTRY}': starts[i:i + STARTS_PER_ENTRY]
+            for i in range(0, len(starts), STARTS_PER_ENTRY)
+        }
+        entries[f'{self.cache_prefix}:count'] = count
+        cache.set_many(entries, PAGE_CACHE_TIMEOUT)
+        return count, starts
+
+    def _page_starts(self):
+        """
+        Key of the first row of every page, numbering the rows in listing
+        order in the database so only one row per page is fetched.
+        """
+        queryset = self.object_list
+        numbered = queryset.order_by().values(
+            row_index=Window(
+                RowNumber(),
+                order_by=[F('order').asc(), F('created_at').desc(), F('id').asc()]
+            ),
+            row_order=F('order'),
+            row_created_at=F('created_at'),
+            row_id=F('id'),
+        )
+        sql, params = numbered.query.sql_with_params()
+        connection = connections[queryset.db]
+        created_at = queryset.model._meta.get_field('created_at').cached_col
+        converters = connection.ops.get_db_converters(created_at)
+        with connection.cursor() as cursor:
+            # Window functions cannot be filtered on directly: pick the
+            # page starts in an outer query
+            cursor.execute(
+                f'SELECT row_order, row_created_at, row_id FROM ({sql}) numbered '
+                f'WHERE (row_index - 1) %% %s = 0 ORDER BY row_index',
+                (*params, self.per_page)
+            )
+            starts = []
+            for order, start_created_at, pk in cursor.fetchall():
+                for converter in converters:
+                    start_created_at = converter(start_created_at, created_at, connection)
+                starts.append((order, start_created_at, pk))
+        return starts
+
+    def _page_start(self, number):
+        index = number - 1
+        entry = cache.get(f'{self.cache_prefix}:starts:{index // STARTS_PER_ENTRY}')
+        if entry is None:
+            # Evicted separately from the count
+            count, starts = self._build()
+            return starts[index]
+        return entry[index % STARTS_PER_ENTRY]
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if self.count == 0:
+            return self._get_page([], number, self)
+        start = self._page_start(number)
+        object_list = list(_keyset_filter(self.object_list, *start, inclusive=True)[:self.per_page])
+        return self._get_page(object_list, number, self)
+
+    def page_window(self, number, around=2):
+        """Page numbers shown next to the current one, without walking page_range."""
+        return range(max(1, number - around), min(self.num_pages, number + around) + 1)
+
+
+# Tables the planner estimates below this many rows are still counted exactly
+ESTIMATED_COUNT_THRESHOLD = 10000
+
+
+def estimated_row_count(model, using):
+    """
+    Row count of a model's table from the PostgreSQL planner statistics
+    (kept current by autovacuum), or None on other databases or before
+    the table was first analyzed.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+        row = cursor.fetchone()
+    if row is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for admin changelists over large tables.
+    
+    The unfiltered changelist is counted from the planner statistics
+    instead of a COUNT(*) over the whole table, so the total is
+    approximate. Filtered lists (search, filters, date hierarchy), small
+    tables and databases without statistics are counted exactly.
+    """
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where and not query.distinct:
+            estimate = estimated_row_count(self.object_list.model, self.object_list.db)
+            if estimate is not None and estimate >= ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
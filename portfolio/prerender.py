@@ -0,0 +1,253 @@
+"""
+Static Pre-rendering
+
+Renders the public pages (homepage, every projects list filter/page,
+every project detail and the sitemaps) to files that nginx serves
+without reaching Django.
+
+Each page is stored with the dependency keys it was rendered from. A run
+fingerprints the current content, compares it with the previous run and
+re-renders only the pages depending on what changed: editing a project
+rebuilds its detail page, the list pages showing it and the homepage.
+"""
+
+import hashlib
+import json
+import os
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.serializers.json import DjangoJSONEncoder
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from .models import (
+    GalleryImage,
+    Project,
+    ProjectTech,
+    RelatedProject,
+    SiteSettings,
+    Skill,
+    Tech,
+    Testimonial,
+    TimelineEvent
+)
+from .cache import get_content_generation
+from .sitemaps import SITEMAPS, sitemap_pages
+from .views import PROJECTS_PER_PAGE, listing_projects, listing_query
+
+
+MANIFEST_NAME = '.manifest.json'
+
+# Dependency keys of every page, besides the per-project ones
+HOMEPAGE_DEPENDENCIES = ['projects', 'techs', 'testimonials', 'skills', 'timeline', 'settings']
+# The index shows the lastmod of every sitemap page
+SITEMAP_DEPENDENCIES = ['projects']
+
+
+def _digest(value):
+    return hashlib.md5(
+        json.dumps(value, cls=DjangoJSONEncoder, sort_keys=True).encode()
+    ).hexdigest()
+
+
+def page_file(url):
+    """
+    Relative file path of a page URL, matching the nginx rule
+    try_files $uri ${uri}index${prerender_args}.html.
+    """
+    parts = urlsplit(url)
+    path = parts.path.lstrip('/')
+    if not parts.path.endswith('/'):
+        return path
+    return f'{path}index.{parts.query}.html' if parts.query else f'{path}index.html'
+
+
+def content_state():
+    """Fingerprint everything the public pages render."""
+    gallery = defaultdict(list)
+    for row in GalleryImage.objects.order_by('project_id', 'order', 'id').values().iterator(chunk_size=2000):
+        gallery[row['project_id']].append(row)
+    techs = defaultdict(list)
+    for project_id, name in ProjectTech.objects.order_by('project_id', 'tech__name').values_list(
+        'project_id', 'tech__name'
+    ).iterator(chunk_size=2000):
+        techs[project_id].append(name)
+
+    related = defaultdict(list)
+    for project_id, related_id in RelatedProject.objects.order_by('project_id', 'rank').values_list(
+        'project_id', 'related_id'
+    ).iterator(chunk_size=2000):
+        related[str(project_id)].append(related_id)
+
+    projects = {}
+    for row in Project.objects.order_by('pk').values().iterator(chunk_size=2000):
+        pk = row['id']
+        projects[str(pk)] = {
+            'content': _digest([row, gallery.get(pk, []), techs.get(pk, [])]),
+            'ranking': [row['category'], row['is_visible'], _digest([row['order'], row['created_at']])],
+            'techs': techs.get(pk, []),
+        }
+
+    return {
+        'projects': projects,
+        'related': related,
+        'techs': _digest(Tech.filter_names()),
+        'testimonials': _digest(list(Testimonial.objects.order_by('pk').values())),
+        'skills': _digest(list(Skill.objects.order_by('pk').values())),
+        'timeline': _digest(list(TimelineEvent.objects.order_by('pk').values())),
+        'settings': _digest(list(SiteSettings.objects.order_by('pk').values())),
+    }
+
+
+def dirty_keys(old_state, new_state):
+    """Dependency keys invalidated between two content states."""
+    keys = set()
+    for section in ('techs', 'testimonials', 'skills', 'timeline', 'settings'):
+        if old_state.get(section) != new_state[section]:
+            keys.add(section)
+
+    old_related = old_state.get('related', {})
+    new_related = new_state['related']
+    for pk in old_related.keys() | new_related.keys():
+        if old_related.get(pk) != new_related.get(pk):
+            keys.add(f'related:{pk}')
+
+    old_projects = old_state.get('projects', {})
+    new_projects = new_state['projects']
+    for pk in old_projects.keys() | new_projects.keys():
+        before, after = old_projects.get(pk), new_projects.get(pk)
+        if before == after:
+            continue
+        keys.update(['projects', f'project:{pk}'])
+        if before and after and (before['ranking'], before['techs']) == (after['ranking'], after['techs']):
+            continue
+        # Added, removed, moved or re-tagged: the pagination of every list
+        # it is (or was) part of shifts
+        keys.add(f'listing:{listing_query()}')
+        for state in (before, after):
+            if state:
+                category = state['ranking'][0]
+                keys.add(f'listing:{listing_query(category=category)}')
+                keys.update(f'listing:{listing_query(tech=name)}' for name in state['techs'])
+    return keys
+
+
+def public_pages():
+    """Map every public page URL to its dependency keys."""
+    pages = {
+        reverse('portfolio:index'): HOMEPAGE_DEPENDENCIES,
+        reverse('portfolio:sitemap_index'): SITEMAP_DEPENDENCIES,
+    }
+    # A projects sitemap page lists the visible projects by pk: it depends
+    # on them, and on the unfiltered listing key, set when one is added,
+    # removed or hidden and the pages shift
+    sitemap_pks = list(Project.objects.filter(is_visible=True).order_by('pk').values_list('pk', flat=True))
+    sitemap_limit = SITEMAPS['projects'].limit
+    for section, number in sitemap_pages(get_content_generation()):
+        url = reverse('portfolio:sitemap_page', kwargs={'section': section, 'page': number})
+        if section == 'projects':
+            chunk = sitemap_pks[(number - 1) * sitemap_limit:number * sitemap_limit]
+            pages[url] = [f'listing:{listing_query()}'] + [f'project:{pk}' for pk in chunk]
+        else:
+            pages[url] = []
+    list_url = reverse('portfolio:projects_list')
+    filters = [{}]
+    filters += [{'category': category} for category, label in Project.CATEGORY_CHOICES]
+    filters += [{'tech': name} for name in Tech.filter_names()]
+    for params in filters:
+        pks = list(listing_projects(**params).values_list('pk', flat=True))
+        chunks = [pks[i:i + PROJECTS_PER_PAGE] for i in range(0, len(pks), PROJECTS_PER_PAGE)] or [[]]
+        key = f'listing:{listing_query(**params)}'
+        for number, chunk in enumerate(chunks, start=1):
+            dependencies = [key, 'techs', 'settings'] + [f'project:{pk}' for pk in chunk]
+            if number == 1:
+                pages[_url(list_url, listing_query(**params))] = dependencies
+            pages[_url(list_url, listing_query(**params, page=number))] = dependencies
+
+    # A detail page shows its precomputed related projects
+    related = defaultdict(list)
+    for project_id, related_id in RelatedProject.objects.filter(related__is_visible=True).values_list(
+        'project_id', 'related_id'
+    ):
+        related[project_id].append(related_id)
+    for pk, slug in Project.objects.filter(is_visible=True).values_list('pk', 'slug'):
+        url = reverse('portfolio:project_detail', args=[slug])
+        pages[url] = [f'project:{pk}', f'related:{pk}', 'settings'] + [
+            f'project:{other}' for other in related[pk]
+        ]
+    return pages
+
+
+def _url(path, query):
+    return f'{path}?{query}' if query else path
+
+
+async def _anonymous_user():
+    return AnonymousUser()
+
+
+def render_page(url):
+    """Render a public page through its view, as an anonymous visitor would see it."""
+    base = urlsplit(getattr(settings, 'PRERENDER_BASE_URL', 'http://localhost:8000'))
+    request = RequestFactory().get(url, HTTP_HOST=base.netloc, secure=base.scheme == 'https')
+    request.user = AnonymousUser()
+    request.auser = _anonymous_user
+    match = resolve(urlsplit(url).path)
+    view = async_to_sync(match.func) if iscoroutinefunction(match.func) else match.func
+    response = view(request, *match.args, **match.kwargs)
+    if hasattr(response, 'render'):
+        response.render()
+    if response.status_code != 200:
+        raise ValueError(f'{url} returned {response.status_code}')
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+def _write(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(f'.{path.name}.tmp')
+    temporary.write_bytes(content)
+    os.replace(temporary, path)
+
+
+def _remove(root, path):
+    path.unlink(missing_ok=True)
+    directory = path.parent
+    while directory != root and not any(directory.iterdir()):
+        directory.rmdir()
+        directory = directory.parent
+
+
+def prerender(full=False, root=None):
+    """
+    Bring the pre-rendered tree up to date. Returns the number of pages
+    written and removed.
+    """
+    root = root or settings.PRERENDER_ROOT
+    manifest_path = root / MANIFEST_NAME
+    manifest = {}
+    if not full and manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text())
+
+    state = content_state()
+    pages = public_pages()
+    previous = manifest.get('pages', {})
+    dirty = dirty_keys(manifest.get('state', {}), state) if manifest else None
+
+    written = 0
+    for url, dependencies in pages.items():
+        if dirty is None or url not in previous or dirty.intersection(dependencies):
+            _write(root / page_file(url), render_page(url))
+            written += 1
+    removed = 0
+    for url in previous.keys() - pages.keys():
+        _remove(root, root / page_file(url))
+        removed += 1
+
+    _write(manifest_path, json.dumps({'state': state, 'pages': pages}).encode())
+    return written, removed
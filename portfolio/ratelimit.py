@@ -0,0 +1,113 @@
+"""
+Rate Limiting
+
+Token buckets stored in the shared cache, so every gunicorn worker sees
+the same state. Used to reject contact form floods before any form
+validation, database write or email work happens.
+"""
+
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+COUNTER_KEYS = {
+    'allowed': 'portfolio:ratelimit:allowed',
+    'rejected_ip': 'portfolio:ratelimit:rejected_ip',
+    'rejected_global': 'portfolio:ratelimit:rejected_global',
+}
+
+DEFAULT_CONTACT_RATELIMIT = {
+    'ENABLED': True,
+    'IP_CAPACITY': 5,  # burst per IP
+    'IP_REFILL_SECONDS': 120,  # one token every N seconds per IP
+    'GLOBAL_CAPACITY': 60,  # burst for the whole site
+    'GLOBAL_REFILL_SECONDS': 2,
+    'TRUST_X_FORWARDED_FOR': True,  # behind Nginx
+}
+
+
+class TokenBucket:
+    """
+    A token bucket whose state lives in the cache.
+    
+    The read-modify-write is not atomic, so a few extra requests may slip
+    through under heavy contention; that is acceptable for flood control.
+    """
+    
+    def __init__(self, name, capacity, refill_seconds):
+        self.name = name
+        self.capacity = capacity
+        self.refill_seconds = refill_seconds
+    
+    def consume(self, key):
+        """Take one token. Returns (allowed, seconds until a token is available)."""
+        cache_key = f'portfolio:ratelimit:{self.name}:{key}'
+        now = time.time()
+        tokens, updated_at = cache.get(cache_key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated_at) / self.refill_seconds)
+        
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        # Keep the state until the bucket would be full again
+        timeout = math.ceil((self.capacity - tokens) * self.refill_seconds) + 1
+        cache.set(cache_key, (tokens, now), timeout)
+        
+        retry_after = 0 if allowed else math.ceil((1 - tokens) * self.refill_seconds)
+        return allowed, retry_after
+
+
+def get_config():
+    return {**DEFAULT_CONTACT_RATELIMIT, **getattr(settings, 'CONTACT_RATELIMIT', {})}
+
+
+def get_client_ip(request, trust_forwarded=True):
+    """Client address, taking the hop appended by Nginx when trusted."""
+    if trust_forwarded:
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+        if forwarded:
+            return forwarded.split(',')[-1].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def check_contact_rate(request):
+    """
+    Apply the per-IP and global contact buckets.
+    Returns 0 if the request may proceed, otherwise the Retry-After seconds.
+    """
+    config = get_config()
+    if not config['ENABLED']:
+        return 0
+    
+    ip = get_client_ip(request, config['TRUST_X_FORWARDED_FOR'])
+    per_ip = TokenBucket('contact_ip', config['IP_CAPACITY'], config['IP_REFILL_SECONDS'])
+    allowed, retry_after = per_ip.consume(ip)
+    if not allowed:
+        _count('rejected_ip')
+        return retry_after
+    
+    site = TokenBucket('contact_global', config['GLOBAL_CAPACITY'], config['GLOBAL_REFILL_SECONDS'])
+    allowed, retry_after = site.consume('all')
+    if not allowed:
+        _count('rejected_global')
+        return retry_after
+    
+    _count('allowed')
+    return 0
+
+
+def get_counters():
+    """Totals of allowed and rejected contact submissions, for the admin."""
+    values = cache.get_many(COUNTER_KEYS.values())
+    return {name: values.get(key, 0) for name, key in COUNTER_KEYS.items()}
+
+
+def _count(name):
+    key = COUNTER_KEYS[name]
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
@@ -0,0 +1,427 @@
+"""
+Related Projects
+
+Precomputed "related projects" of every visible project: its
+RELATED_PROJECTS_COUNT nearest neighbours by cosine similarity of
+one-hot feature vectors (tech tags, category and the skills linking to
+it), stored in RelatedProject.
+
+The vectors are sparse, but the category and the popular tags are
+shared by most projects, so scoring every pair with a feature in common
+is still quadratic. Instead, projects with the same features are scored
+once as a signature, and each signature is first compared only with the
+signatures close to it (lacking at most one of its tags and category,
+with up to two more), found through an index of the signatures minus up
+to two features. Signatures further away cannot score above a bound that
+depends on the weights of the source; the few signatures whose
+candidates don't beat it look one feature further, and only then are
+scored against all the others, with a sparse product.
+
+Edits only flag projects with Project.related_stale; `manage.py
+build_related` then recomputes the stale projects and every project
+whose neighbours they may have changed.
+"""
+
+from itertools import combinations
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, Min
+from scipy import sparse
+
+from .cache import bump_content_generation
+from .models import Project, ProjectTech, RelatedProject, Skill, _chunks
+from .pagination import PROJECT_KEYSET_ORDERING
+
+
+RELATED_PROJECTS_COUNT = 3
+
+# Weight of each kind of feature (a shared tech tag counts 1)
+CATEGORY_WEIGHT = 1.0
+SKILL_WEIGHT = 0.5
+
+# Signatures scored against all the others at once (BLOCK_SIZE x signatures floats)
+BLOCK_SIZE = 256
+
+
+class Signatures:
+    """
+    The distinct feature sets of the projects. Projects with the same
+    features score the same against everything, so neighbours are
+    searched once per signature and then handed out to its rows.
+
+    Signatures are ranked by squared similarity, overlap**2 / (norm *
+    norm), one rounding away from sums of squared weights: equal
+    similarities compare equal and ties are decided by listing order
+    only.
+    """
+
+    def __init__(self, row_columns, weights, indexed):
+        index_of = {}
+        self.columns = []
+        self.of_row = np.empty(len(row_columns), dtype=np.int64)
+        for row, columns in enumerate(row_columns):
+            signature = index_of.get(columns)
+            if signature is None:
+                signature = index_of[columns] = len(self.columns)
+                self.columns.append(columns)
+            self.of_row[row] = signature
+        count = len(self.columns)
+
+        # Rows of each signature, in listing order
+        self.rows = np.argsort(self.of_row, kind='stable')
+        self.starts = np.searchsorted(self.of_row[self.rows], np.arange(count + 1))
+
+        self.squared_weights = np.asarray(weights, dtype=np.float64) ** 2
+        self.indexed = np.asarray(indexed, dtype=bool)
+        self.matrix = self._matrix(self.columns)
+        self.norms = np.asarray(self.matrix.multiply(self.matrix).sum(axis=1)).ravel()
+        # Features left out of the index (skills), scored pair by pair
+        self.keys = [tuple(column for column in columns if self.indexed[column]) for columns in self.columns]
+        self.extra = self._matrix([
+            tuple(column for column in columns if not self.indexed[column]) for columns in self.columns
+        ])
+        self.has_extra = np.diff(self.extra.indptr) > 0
+        self.key_norms = self.norms - np.asarray(self.extra.multiply(self.extra).sum(axis=1)).ravel()
+
+    def __len__(self):
+        return len(self.columns)
+
+    def _matrix(self, columns):
+        """CSR matrix of the weights, one row per signature."""
+        lengths = np.array([len(row) for row in columns], dtype=np.int64)
+        indices = np.fromiter((column for row in columns for column in row), dtype=np.int64, count=int(lengths.sum()))
+        return sparse.csr_matrix(
+            (np.sqrt(self.squared_weights[indices]), indices, np.concatenate(([0], np.cumsum(lengths)))),
+            shape=(len(columns), len(self.squared_weights))
+        )
+
+    def scores(self, signatures):
+        """Yield (signatures, their squared similarity to every signature) per block."""
+        for start in range(0, len(signatures), BLOCK_SIZE):
+            block = signatures[start:start + BLOCK_SIZE]
+            # Sparse times a dense block: no features x signatures dense matrix
+            overlap = (self.matrix @ self.matrix[block].T.toarray()).T
+            yield block, overlap * overlap / (self.norms[block][:, None] * self.norms)
+
+    def _bounds(self, signatures, depth):
+        """
+        Highest squared score a signature outside the candidates of each of
+        `signatures` (see _candidate_pairs) can reach: it either lacks
+        more than `depth` of its indexed features (at best the lightest)
+        or has three more, so at least 3 - depth more indexed features in
+        all (at best the lightest indexed features overall).
+        """
+        indexed_weights = self.squared_weights[self.indexed]
+        lightest = indexed_weights.min() if len(indexed_weights) else 0.0
+        longest = max((len(key) for key in self.keys), default=0)
+        bounds = np.empty(len(signatures))
+        for position, signature in enumerate(signatures.tolist()):
+            key = self.keys[signature]
+            weights = sorted(self.squared_weights[list(key)].tolist())
+            norm = self.norms[signature]
+            kept = norm - sum(weights[:depth + 1]) if len(weights) > depth else 0.0
+            added = norm / (norm + 3 * lightest) if len(key) - depth + 3 <= longest else 0.0
+            bounds[position] = max(kept / norm, added)
+        return bounds
+
+    def _key_index(self):
+        """
+        File every signature under its indexed features minus up to two
+        of them. Returns (keys, owners, first dropped, second dropped)
+        sorted by key, -1 for no feature dropped, and where each key
+        starts.
+        """
+        lengths = np.array([len(key) for key in self.keys], dtype=np.int64)
+        longest = int(lengths.max(initial=1))
+        keys, owners, first_dropped, second_dropped = [], [], [], []
+        for length in np.unique(lengths).tolist():
+            members = np.flatnonzero(lengths == length)
+            columns = np.array([self.keys[signature] for signature in members.tolist()], dtype=np.int64)
+            columns = columns.reshape(len(members), length)
+            for removed in (0, 1, 2):
+                for dropped in combinations(range(length), removed):
+                    kept = [position for position in range(length) if position not in dropped]
+                    key = np.full((len(members), longest), -1, dtype=np.int64)
+                    key[:, :len(kept)] = columns[:, kept]
+                    keys.append(key)
+                    owners.append(members)
+                    dropped_columns = [columns[:, position] for position in dropped] + [np.full(len(members), -1)] * 2
+                    first_dropped.append(dropped_columns[0])
+                    second_dropped.append(dropped_columns[1])
+        keys = np.concatenate(keys)
+        order = np.lexsort(keys.T[::-1])
+        keys = keys[order]
+        new_key = np.ones(len(keys), dtype=bool)
+        new_key[1:] = np.any(keys[1:] != keys[:-1], axis=1)
+        return (
+            np.cumsum(new_key) - 1,
+            np.concatenate(owners)[order],
+            np.concatenate(first_dropped)[order],
+            np.concatenate(second_dropped)[order],
+            np.append(np.flatnonzero(new_key), len(keys)),
+        )
+
+    def _candidate_pairs(self, index, signatures, depth):
+        """
+        Return (sources, targets, squared scores) for every target signature
+        lacking at most `depth` and adding at most two of the indexed
+        features of one of `signatures` (including the source itself).
+
+        Sources look up their indexed features minus up to `depth` of
+        them in the index: they meet a target on a key exactly in those
+        cases, and the key tells their indexed overlap: its weight, plus
+        the features the source dropped that the target dropped too.
+        """
+        key_ids, owners, first_dropped, second_dropped, group_starts = index
+        wanted = np.zeros(len(self), dtype=bool)
+        wanted[signatures] = True
+        removed = (first_dropped >= 0).astype(np.int64) + (second_dropped >= 0)
+        queries = np.flatnonzero(wanted[owners] & (removed <= depth))
+        query_keys = key_ids[queries]
+        sizes = group_starts[query_keys + 1] - group_starts[query_keys]
+        query = np.repeat(queries, sizes)
+        offsets = np.arange(len(query)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        partner = np.repeat(group_starts[query_keys], sizes) + offsets
+
+        sources, targets = owners[query], owners[partner]
+        # The same pair can meet under several keys, always with the same overlap
+        _, first = np.unique(sources * len(self) + targets, return_index=True)
+        sources, targets, query, partner = sources[first], targets[first], query[first], partner[first]
+
+        weight_of = np.append(self.squared_weights, 0.0)
+        overlap = self.key_norms[sources].copy()
+        for dropped in (first_dropped[query], second_dropped[query]):
+            shared = (first_dropped[partner] == dropped) | (second_dropped[partner] == dropped)
+            overlap -= np.where((dropped >= 0) & ~shared, weight_of[dropped], 0.0)
+        both = self.has_extra[sources] & self.has_extra[targets]
+        if both.any():
+            overlap[both] += np.asarray(
+                self.extra[sources[both]].multiply(self.extra[targets[both]]).sum(axis=1)
+            ).ravel()
+        return sources, targets, overlap * overlap / (self.norms[sources] * self.norms[targets])
+
+    def _ranked_rows(self, sources, targets, scores, limit):
+        """
+        Expand (source, target signature, score) to the target's rows and
+        return (sources, rows, scores, rank) of the best `limit` rows of
+        each source, best score first, then listing order.
+        """
+        # Only targets scoring at least the limit-th best row can make the list
+        order = np.lexsort((-scores, sources))
+        sources, targets, scores = sources[order], targets[order], scores[order]
+        sizes = np.minimum(self.starts[targets + 1] - self.starts[targets], limit)
+        rows_before = _group_cumsum(sources, sizes) - sizes
+        reaching = (rows_before < limit) & (rows_before + sizes >= limit)
+        cutoff = np.full(len(self), -np.inf)
+        cutoff[sources[reaching]] = scores[reaching]
+        keep = scores >= cutoff[sources]
+        sources, targets, scores, sizes = sources[keep], targets[keep], scores[keep], sizes[keep]
+
+        offsets = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        sources = np.repeat(sources, sizes)
+        scores = np.repeat(scores, sizes)
+        rows = self.rows[np.repeat(self.starts[targets], sizes) + offsets]
+
+        order = np.lexsort((rows, -scores, sources))
+        sources, rows, scores = sources[order], rows[order], scores[order]
+        rank = _group_cumsum(sources, np.ones(len(sources), dtype=np.int64)) - 1
+        keep = rank < limit
+        return sources[keep], rows[keep], scores[keep], rank[keep]
+
+    def nearest(self, signatures, limit):
+        """
+        Return (rows, squared scores), two len(signatures) x limit arrays
+        with the best rows for each signature, padded with row -1 and
+        score -1.
+        """
+        position_of = np.full(len(self), -1, dtype=np.int64)
+        position_of[signatures] = np.arange(len(signatures))
+        best_rows = np.full((len(signatures), limit), -1, dtype=np.int64)
+        best = np.full((len(signatures), limit), -1, dtype=np.float64)
+        if not len(signatures):
+            return best_rows, best
+
+        # Exact once no signature further away could still make the list
+        index = self._key_index()
+        unproven = signatures
+        for depth in (1, 2):
+            positions = position_of[unproven]
+            sources, rows, scores, rank = self._ranked_rows(
+                *self._candidate_pairs(index, unproven, depth), limit
+            )
+            best_rows[positions] = -1
+            best[positions] = -1
+            best_rows[position_of[sources], rank] = rows
+            best[position_of[sources], rank] = scores
+            unproven = unproven[best[positions, -1] <= self._bounds(unproven, depth)]
+            if not len(unproven):
+                break
+
+        for block, block_scores in self.scores(unproven):
+            # The candidates already found are a floor for the final list
+            # (less a margin for overlaps summed in another order)
+            floor = best[position_of[block], -1] - 1e-9
+            keep = (block_scores > 0) & (block_scores >= floor[:, None])
+            unbounded = np.flatnonzero(floor <= 0)
+            if len(self) > limit and len(unbounded):
+                # Only signatures reaching the limit-th best signature score can make the list
+                cutoff = -np.partition(-block_scores[unbounded], limit - 1, axis=1)[:, limit - 1]
+                keep[unbounded] &= block_scores[unbounded] >= cutoff[:, None]
+            sources, targets = np.nonzero(keep)
+            sources, rows, scores, rank = self._ranked_rows(sources, targets, block_scores[keep], limit)
+            best_rows[position_of[block]] = -1
+            best[position_of[block]] = -1
+            positions = position_of[block[sources]]
+            best_rows[positions, rank] = rows
+            best[positions, rank] = scores
+        return best_rows, best
+
+
+def _group_cumsum(groups, values):
+    """Running total of `values` within each run of equal, sorted `groups`."""
+    totals = np.cumsum(values)
+    starts = np.flatnonzero(np.diff(groups, prepend=groups[:1] - 1))
+    return totals - np.repeat(totals[starts] - values[starts], np.diff(np.append(starts, len(groups))))
+
+
+def project_signatures():
+    """
+    Return the visible project ids, in listing order, and the Signatures
+    of their feature sets (one row per project).
+
+    Equal scores go to the project listed first, so rows follow the
+    projects list order.
+    """
+    visible = Project.objects.filter(is_visible=True).order_by(*PROJECT_KEYSET_ORDERING)
+    ids = []
+    categories = []
+    for pk, category in visible.values_list('pk', 'category').iterator(chunk_size=5000):
+        ids.append(pk)
+        categories.append(category)
+    row_of = {pk: row for row, pk in enumerate(ids)}
+
+    row_columns = [set() for _ in ids]
+    weights, indexed = [], []
+    column_of = {}
+
+    def add(row, feature, weight):
+        column = column_of.get(feature)
+        if column is None:
+            column = column_of[feature] = len(weights)
+            weights.append(weight)
+            # Skills link few projects: they are scored, not indexed
+            indexed.append(feature[0] != 'skill')
+        row_columns[row].add(column)
+
+    for row, category in enumerate(categories):
+        add(row, ('category', category), CATEGORY_WEIGHT)
+    for project_id, tech_id in ProjectTech.objects.values_list('project_id', 'tech_id').iterator(chunk_size=5000):
+        if project_id in row_of:
+            add(row_of[project_id], ('tech', tech_id), 1.0)
+    links = Skill.related_projects.through.objects.values_list('project_id', 'skill_id')
+    for project_id, skill_id in links.iterator(chunk_size=5000):
+        if project_id in row_of:
+            add(row_of[project_id], ('skill', skill_id), SKILL_WEIGHT)
+
+    return ids, Signatures([tuple(sorted(columns)) for columns in row_columns], weights, indexed)
+
+
+def nearest_neighbours(signatures, sources):
+    """
+    Return (neighbours, scores), two len(sources) x RELATED_PROJECTS_COUNT
+    arrays with the best rows for each source row, best first.
+    """
+    wanted = np.unique(signatures.of_row[sources])
+    # One more than needed: the list of a signature includes its own rows
+    rows, scores = signatures.nearest(wanted, RELATED_PROJECTS_COUNT + 1)
+    positions = np.searchsorted(wanted, signatures.of_row[sources])
+    rows, scores = rows[positions], scores[positions]
+
+    # A project is never its own neighbour
+    own = rows == sources[:, None]
+    order = np.argsort(own, axis=1, kind='stable')[:, :RELATED_PROJECTS_COUNT]
+    neighbours = np.take_along_axis(rows, order, axis=1)
+    best = np.take_along_axis(scores, order, axis=1)
+    best = np.where(best >= 0, np.sqrt(np.maximum(best, 0)), -1)
+    neighbours[neighbours < 0] = 0
+    return neighbours, best
+
+
+def _affected_rows(ids, signatures, stale_rows, stale_pks):
+    """
+    Rows whose neighbours may change because the stale projects did:
+    those listing a stale project, and those a stale project now scores
+    at least as high as for their current weakest neighbour.
+    """
+    row_of = {pk: row for row, pk in enumerate(ids)}
+    affected = set(stale_rows.tolist())
+
+    thresholds = np.zeros(len(ids))
+    current = (
+        RelatedProject.objects
+        .values('project_id')
+        .annotate(weakest=Min('score'), total=Count('id'))
+        .filter(total__gte=RELATED_PROJECTS_COUNT)
+    )
+    for row in current.iterator(chunk_size=5000):
+        if row['project_id'] in row_of:
+            thresholds[row_of[row['project_id']]] = row['weakest']
+
+    for pks in _chunks(list(stale_pks)):
+        listing = RelatedProject.objects.filter(related_id__in=pks).values_list('project_id', flat=True)
+        affected.update(row_of[pk] for pk in listing if pk in row_of)
+
+    if len(stale_rows):
+        strongest = np.full(len(signatures), -1.0)
+        for block, scores in signatures.scores(np.unique(signatures.of_row[stale_rows])):
+            np.maximum(strongest, scores.max(axis=0), out=strongest)
+        strongest = np.sqrt(np.maximum(strongest, 0))[signatures.of_row]
+        affected.update(np.flatnonzero((strongest > 0) & (strongest >= thresholds)).tolist())
+    return np.array(sorted(affected), dtype=np.int64)
+
+
+def build_related(full=False, batch_size=2000):
+    """
+    Recompute the related projects of the stale projects (every visible
+    project with full=True) and of the projects they affect.
+    Returns the number of projects recomputed.
+    """
+    with transaction.atomic():
+        stale = Project.objects.filter(related_stale=True)
+        stale_pks = set(stale.values_list('pk', flat=True))
+        if not stale_pks and not full:
+            return 0
+        # Clear the flags first: edits committed from now on flag again
+        # and are picked up by the next run
+        for pks in _chunks(list(stale_pks)):
+            Project.objects.filter(pk__in=pks).update(related_stale=False)
+
+        ids, signatures = project_signatures()
+        if full:
+            sources = np.arange(len(ids), dtype=np.int64)
+        else:
+            row_of = {pk: row for row, pk in enumerate(ids)}
+            stale_rows = np.array(sorted(row_of[pk] for pk in stale_pks if pk in row_of), dtype=np.int64)
+            sources = _affected_rows(ids, signatures, stale_rows, stale_pks)
+
+        neighbours, scores = nearest_neighbours(signatures, sources)
+
+        source_pks = [ids[row] for row in sources]
+        if full:
+            RelatedProject.objects.all().delete()
+        else:
+            # Hidden or deleted stale projects keep no neighbours
+            for pks in _chunks(source_pks + list(stale_pks)):
+                RelatedProject.objects.filter(project_id__in=pks).delete()
+        RelatedProject.objects.bulk_create(
+            (
+                RelatedProject(project_id=pk, related_id=ids[neighbour], rank=rank, score=float(score))
+                for pk, row_neighbours, row_scores in zip(source_pks, neighbours.tolist(), scores.tolist())
+                for rank, (neighbour, score) in enumerate(zip(row_neighbours, row_scores))
+                if score > 0
+            ),
+            batch_size=batch_size
+        )
+        transaction.on_commit(bump_content_generation)
+    return len(sources)
@@ -0,0 +1,128 @@
+"""
+Read Replica Routing
+
+Reads of the public, read-only views marked with @replica_reads go to
+the replica configured as settings.DATABASE_REPLICA; everything else
+(contact form, admin, sessions, management commands) stays on the
+primary.
+
+Replicas lag behind the primary, so reads fall back to it:
+- for everyone, for REPLICA_STICKY_SECONDS after a content change, so
+  the page cache, catalog snapshots and SiteSettings are never rebuilt
+  from stale rows;
+- for a staff member, for REPLICA_STICKY_SECONDS after each of their
+  edits (read-your-writes).
+"""
+
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from .cache import get_last_change
+
+
+# Database alias the current request reads from (None: primary)
+_read_alias = ContextVar('portfolio_read_alias', default=None)
+
+STICKY_COOKIE = 'portfolio_primary'
+
+
+def replica_reads(view_func):
+    """Mark a view as read-only, so it may read from the replica."""
+    if iscoroutinefunction(view_func):
+        async def wrapper(*args, **kwargs):
+            return await view_func(*args, **kwargs)
+    else:
+        def wrapper(*args, **kwargs):
+            return view_func(*args, **kwargs)
+    wrapper.replica_reads = True
+    return wraps(view_func)(wrapper)
+
+
+class ReplicaRouter:
+    """Send the portfolio reads of replica-enabled requests to the replica."""
+
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias and model._meta.app_label == 'portfolio':
+            return alias
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Same data on both databases
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Choose the database of each request and make editors sticky to the
+    primary after their writes.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        _read_alias.set(None)
+        try:
+            response = self.get_response(request)
+        finally:
+            # Worker threads serve many requests: never leak the choice
+            _read_alias.set(None)
+        if self.is_edit(request, response) and request.user.is_staff:
+            self.stick_to_primary(response)
+        return response
+
+    async def __acall__(self, request):
+        _read_alias.set(None)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _read_alias.set(None)
+        if self.is_edit(request, response) and (await request.auser()).is_staff:
+            self.stick_to_primary(response)
+        return response
+
+    def is_edit(self, request, response):
+        return (
+            settings.DATABASE_REPLICA
+            and request.method not in ('GET', 'HEAD', 'OPTIONS')
+            and response.status_code < 400
+            and getattr(request, 'user', None) is not None
+        )
+
+    def stick_to_primary(self, response):
+        response.set_cookie(
+            STICKY_COOKIE,
+            '1',
+            max_age=settings.REPLICA_STICKY_SECONDS,
+            httponly=True,
+            samesite='Lax'
+        )
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            settings.DATABASE_REPLICA
+            and getattr(view_func, 'replica_reads', False)
+            and STICKY_COOKIE not in request.COOKIES
+            and time.time() - get_last_change() >= settings.REPLICA_STICKY_SECONDS
+        ):
+            _read_alias.set(settings.DATABASE_REPLICA)
+        return None
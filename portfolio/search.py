@@ -0,0 +1,309 @@
+"""
+Project Search
+
+Full-text search over the project catalog backed by a real inverted index:
+an FTS5 virtual table on SQLite and a tsvector column with a GIN index on
+PostgreSQL. Both are created by migration 0007 and kept current from the
+Project post_save/post_delete signals. Other databases fall back to
+unindexed icontains matching.
+
+The admin changelists of projects and contact messages search the same
+way (every word, or word prefix, must match) through the *_search_filter()
+helpers. Contact messages are indexed by migration 0009: an FTS5 table
+kept current from the ContactMessage signals on SQLite, a GIN expression
+index on PostgreSQL.
+"""
+
+import re
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+
+from .models import ContactMessage, Project
+
+
+FTS_TABLE = 'portfolio_project_fts'
+TSVECTOR_TABLE = 'portfolio_project_search'
+
+# Indexed columns, in FTS5 column order
+COLUMNS = ('title', 'description', 'long_description', 'challenge', 'solution', 'results', 'tech')
+
+# Relative weight of each column in the ranking (FTS5 bm25 / PostgreSQL setweight)
+BM25_WEIGHTS = (10.0, 5.0, 2.0, 1.0, 1.0, 1.0, 4.0)
+TS_WEIGHTS = {
+    'title': 'A', 'tech': 'A', 'description': 'B', 'long_description': 'C',
+    'challenge': 'D', 'solution': 'D', 'results': 'D',
+}
+
+MESSAGE_FTS_TABLE = 'portfolio_contactmessage_fts'
+MESSAGE_COLUMNS = ('name', 'email', 'subject', 'message')
+
+# Expression of the GIN index on portfolio_contactmessage (migration 0009):
+# queries must repeat it verbatim for PostgreSQL to use the index
+MESSAGE_TSVECTOR = (
+    "to_tsvector('simple'::regconfig, name || ' ' || translate(email, '@.', '  ') "
+    "|| ' ' || subject || ' ' || message)"
+)
+
+# Markers that survive HTML escaping and are turned into <mark> afterwards
+START, STOP = '\x02', '\x03'
+
+
+def _ts_config():
+    return getattr(settings, 'SEARCH_TS_CONFIG', 'italian')
+
+
+def _tokens(query):
+    return re.findall(r'\w+', query.lower())[:10]
+
+
+def _document(project):
+    """Text of each indexed column for a project."""
+    values = {name: getattr(project, name, '') or '' for name in COLUMNS if name != 'tech'}
+    values['tech'] = ' '.join(str(t) for t in project.tech_stack_list)
+    return values
+
+
+def _highlight(text):
+    return escape(text).replace(START, '<mark>').replace(STOP, '</mark>')
+
+
+def _read_connection(model):
+    # Searches of @replica_reads views run on the replica, like their other reads
+    return connections[router.db_for_read(model)]
+
+
+def _write_connection(model):
+    return connections[router.db_for_write(model)]
+
+
+def index_project(project):
+    """Insert or refresh the index entry of a project."""
+    index_projects([project])
+
+
+def index_projects(projects):
+    """Insert or refresh the index entries of many projects in one round trip each."""
+    rows = []
+    for project in projects:
+        document = _document(project)
+        rows.append([project.pk] + [document[name] for name in COLUMNS])
+    if not rows:
+        return
+    connection = _write_connection(Project)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite' and _has_table(connection, FTS_TABLE):
+            cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [row[:1] for row in rows])
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, {", ".join(COLUMNS)}) '
+                f'VALUES (%s, {", ".join(["%s"] * len(COLUMNS))})',
+                rows
+            )
+        elif connection.vendor == 'postgresql':
+            vector = ' || '.join(
+                f"setweight(to_tsvector(%s::regconfig, %s), '{TS_WEIGHTS[name]}')" for name in COLUMNS
+            )
+            params = []
+            for row in rows:
+                row_params = [row[0]]
+                for value in row[1:]:
+                    row_params += [_ts_config(), value]
+                params.append(row_params)
+            cursor.executemany(
+                f'INSERT INTO {TSVECTOR_TABLE} (project_id, document) VALUES (%s, {vector}) '
+                f'ON CONFLICT (project_id) DO UPDATE SET document = EXCLUDED.document',
+                params
+            )
+
+
+def remove_project(project_id):
+    """Drop a deleted project from the index (PostgreSQL cascades on its own)."""
+    connection = _write_connection(Project)
+    if connection.vendor == 'sqlite' and _has_table(connection, FTS_TABLE):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [project_id])
+
+
+def index_message(message):
+    """Insert or refresh the index entry of a contact message (SQLite only)."""
+    index_messages([message])
+
+
+def index_messages(messages):
+    """Insert or refresh the index entries of many contact messages (SQLite only)."""
+    rows = [[message.pk] + [getattr(message, name) for name in MESSAGE_COLUMNS] for message in messages]
+    connection = _write_connection(ContactMessage)
+    if rows and connection.vendor == 'sqlite' and _has_table(connection, MESSAGE_FTS_TABLE):
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {MESSAGE_FTS_TABLE} WHERE rowid = %s', [row[:1] for row in rows])
+            cursor.executemany(
+                f'INSERT INTO {MESSAGE_FTS_TABLE} (rowid, {", ".join(MESSAGE_COLUMNS)}) '
+                f'VALUES (%s, %s, %s, %s, %s)',
+                rows
+            )
+
+
+def remove_message(message_id):
+    """Drop a deleted contact message from the index (SQLite only)."""
+    connection = _write_connection(ContactMessage)
+    if connection.vendor == 'sqlite' and _has_table(connection, MESSAGE_FTS_TABLE):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {MESSAGE_FTS_TABLE} WHERE rowid = %s', [message_id])
+
+
+def search_projects(query, limit=20):
+    """
+    Return the visible projects matching query, best first, as
+    (project_id, rank, {'title': html, 'snippet': html}) tuples.
+    """
+    tokens = _tokens(query)
+    if not tokens:
+        return []
+    connection = _read_connection(Project)
+    if connection.vendor == 'sqlite' and _has_table(connection, FTS_TABLE):
+        return _search_sqlite(connection, tokens, limit)
+    if connection.vendor == 'postgresql':
+        return _search_postgresql(connection, tokens, limit)
+    return _search_fallback(tokens, limit)
+
+
+def _fts_match(tokens):
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def _tsquery(tokens):
+    return ' & '.join(f"'{token}':*" for token in tokens)
+
+
+def _search_sqlite(connection, tokens, limit):
+    match = _fts_match(tokens)
+    weights = ', '.join(str(w) for w in BM25_WEIGHTS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT f.rowid, bm25({FTS_TABLE}, {weights}) AS rank, "
+            f"highlight({FTS_TABLE}, 0, %s, %s), "
+            f"snippet({FTS_TABLE}, -1, %s, %s, '…', 16) "
+            f"FROM {FTS_TABLE} f JOIN {Project._meta.db_table} p ON p.id = f.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s AND p.is_visible "
+            f"ORDER BY rank LIMIT %s",
+            [START, STOP, START, STOP, match, limit]
+        )
+        rows = cursor.fetchall()
+    # bm25() is lower-is-better: expose a positive score
+    return [
+        (pk, -rank, {'title': _highlight(title), 'snippet': _highlight(snippet)})
+        for pk, rank, title, snippet in rows
+    ]
+
+
+def _search_postgresql(connection, tokens, limit):
+    tsquery = _tsquery(tokens)
+    options = f'StartSel={START}, StopSel={STOP}'
+    body = " || ' ' || ".join(f'p.{name}' for name in COLUMNS[1:-1])
+    with connection.cursor() as cursor:
+        # Rank and limit first, so ts_headline only runs on the returned rows
+        cursor.execute(
+            f"SELECT p.id, hits.rank, "
+            f"ts_headline(%s::regconfig, p.title, hits.q, %s), "
+            f"ts_headline(%s::regconfig, {body}, hits.q, %s) "
+            f"FROM ("
+            f"  SELECT s.project_id, ts_rank_cd(s.document, q) AS rank, q "
+            f"  FROM {TSVECTOR_TABLE} s "
+            f"  JOIN {Project._meta.db_table} p ON p.id = s.project_id, "
+            f"  to_tsquery(%s::regconfig, %s) q "
+            f"  WHERE s.document @@ q AND p.is_visible "
+            f"  ORDER BY rank DESC LIMIT %s"
+            f") hits JOIN {Project._meta.db_table} p ON p.id = hits.project_id "
+            f"ORDER BY hits.rank DESC",
+            [
+                _ts_config(), options + ', HighlightAll=true',
+                _ts_config(), options + ', MaxFragments=2, MaxWords=20, MinWords=8',
+                _ts_config(), tsquery, limit,
+            ]
+        )
+        rows = cursor.fetchall()
+    return [
+        (pk, rank, {'title': _highlight(title), 'snippet': _highlight(snippet)})
+        for pk, rank, title, snippet in rows
+    ]
+
+
+def _search_fallback(tokens, limit):
+    projects = Project.objects.filter(is_visible=True)
+    for token in tokens:
+        projects = projects.filter(
+            Q(title__icontains=token) | Q(description__icontains=token) | Q(long_description__icontains=token)
+        )
+    return [
+        (pk, 0.0, {'title': escape(title), 'snippet': escape(description)})
+        for pk, title, description in projects.values_list('pk', 'title', 'description')[:limit]
+    ]
+
+
+def _token_filter(tokens, fields):
+    """Unindexed fallback: every token in at least one of fields."""
+    condition = Q()
+    for token in tokens:
+        any_field = Q()
+        for field in fields:
+            any_field |= Q(**{f'{field}__icontains': token})
+        condition &= any_field
+    return condition
+
+
+def project_search_filter(query):
+    """
+    Q matching every project (visible or not) whose indexed text contains
+    each word of query, or a word starting with it. Used by the admin.
+    """
+    tokens = _tokens(query)
+    if not tokens:
+        return Q(pk__in=[])
+    connection = _read_connection(Project)
+    if connection.vendor == 'sqlite' and _has_table(connection, FTS_TABLE):
+        return Q(pk__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [_fts_match(tokens)]
+        ))
+    if connection.vendor == 'postgresql':
+        return Q(pk__in=RawSQL(
+            f'SELECT project_id FROM {TSVECTOR_TABLE} WHERE document @@ to_tsquery(%s::regconfig, %s)',
+            [_ts_config(), _tsquery(tokens)]
+        ))
+    return _token_filter(tokens, ['title', 'description', 'long_description'])
+
+
+def message_search_filter(query):
+    """
+    Q matching every contact message whose name, email, subject or text
+    contains each word of query, or a word starting with it.
+    """
+    tokens = _tokens(query)
+    if not tokens:
+        return Q(pk__in=[])
+    connection = _read_connection(ContactMessage)
+    if connection.vendor == 'sqlite' and _has_table(connection, MESSAGE_FTS_TABLE):
+        return Q(pk__in=RawSQL(
+            f'SELECT rowid FROM {MESSAGE_FTS_TABLE} WHERE {MESSAGE_FTS_TABLE} MATCH %s',
+            [_fts_match(tokens)]
+        ))
+    if connection.vendor == 'postgresql':
+        return Q(pk__in=RawSQL(
+            f"SELECT id FROM {ContactMessage._meta.db_table} "
+            f"WHERE {MESSAGE_TSVECTOR} @@ to_tsquery('simple'::regconfig, %s)",
+            [_tsquery(tokens)]
+        ))
+    return _token_filter(tokens, MESSAGE_COLUMNS)
+
+
+_known_tables = {}
+
+
+def _has_table(connection, name):
+    # FTS5 may be missing from the SQLite build; migrations 0007 and 0009 then skip it
+    alias = connection.alias
+    if (alias, name) not in _known_tables:
+        _known_tables[(alias, name)] = name in connection.introspection.table_names()
+    return _known_tables[(alias, name)]
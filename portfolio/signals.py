@@ -0,0 +1,179 @@
+"""
+Portfolio Signals
+
+Model signal handlers that keep derived data in sync with content edits.
+"""
+
+import weakref
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import search
+from .cache import bump_content_generation, bump_model_version
+from .snapshots import mark_catalog_stale
+from .models import (
+    Project,
+    GalleryImage,
+    ProjectTech,
+    RelatedProject,
+    Tech,
+    Testimonial,
+    Skill,
+    TimelineEvent,
+    SiteSettings,
+    ContactMessage,
+    projects_bulk_created
+)
+
+
+# Models whose edits change what the public pages render
+CONTENT_MODELS = (Project, GalleryImage, Testimonial, Skill, TimelineEvent, SiteSettings)
+
+# Models rendered in cached fragments that have no updated_at, and the
+# callable bumping their version (one object each, for on_commit_once)
+FRAGMENT_VERSION_BUMPS = {
+    model: partial(bump_model_version, model) for model in (Testimonial, Skill, TimelineEvent)
+}
+
+
+# Callbacks queued by on_commit_once(), per connection: func -> weak
+# reference to the scheduled wrapper. Django drops the wrapper once it ran
+# or when its transaction (or savepoint) rolls back, which empties the
+# reference, so the callback can be queued again.
+_scheduled = weakref.WeakKeyDictionary()
+
+
+def on_commit_once(func):
+    """
+    Schedule func after the current transaction unless it is already
+    queued, so bulk edits rebuild derived data once instead of per row.
+    """
+    scheduled = _scheduled.setdefault(transaction.get_connection(), {})
+    queued = scheduled.get(func)
+    if queued is not None and queued() is not None:
+        return
+
+    def run():
+        scheduled.pop(func, None)
+        func()
+
+    scheduled[func] = weakref.ref(run)
+    transaction.on_commit(run)
+
+
+@receiver(pre_delete, sender=Project)
+def remember_project_techs(sender, instance, **kwargs):
+    """Capture the tags of a project before its ProjectTech rows cascade away."""
+    instance._deleted_tech_ids = set(
+        ProjectTech.objects.filter(project=instance).values_list('tech_id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Project)
+def refresh_deleted_project_techs(sender, instance, **kwargs):
+    """Update the facet counts of the tags the deleted project used."""
+    Tech.refresh_counts(getattr(instance, '_deleted_tech_ids', set()))
+
+
+@receiver(post_save, sender=Project)
+def index_saved_project(sender, instance, **kwargs):
+    """Keep the full-text search index current."""
+    search.index_project(instance)
+
+
+@receiver(post_delete, sender=Project)
+def unindex_deleted_project(sender, instance, **kwargs):
+    search.remove_project(instance.pk)
+
+
+@receiver(post_save, sender=ContactMessage)
+def index_saved_message(sender, instance, **kwargs):
+    """Keep the admin search index of contact messages current."""
+    search.index_message(instance)
+
+
+@receiver(post_delete, sender=ContactMessage)
+def unindex_deleted_message(sender, instance, **kwargs):
+    search.remove_message(instance.pk)
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def rebuild_catalog_snapshot(sender, **kwargs):
+    """Have the next API call rebuild the pre-encoded catalog once the edit is committed."""
+    on_commit_once(mark_catalog_stale)
+
+
+@receiver(post_save, sender=GalleryImage)
+@receiver(post_delete, sender=GalleryImage)
+def touch_gallery_project(sender, instance, **kwargs):
+    """
+    A gallery edit changes the project page, so move the project's
+    updated_at and with it the page's ETag and Last-Modified.
+    """
+    Project.objects.filter(pk=instance.project_id).update(updated_at=timezone.now())
+
+
+@receiver(pre_save, sender=Project)
+def flag_related_stale(sender, instance, **kwargs):
+    """Queue the project for `manage.py build_related`."""
+    instance.related_stale = True
+
+
+@receiver(pre_delete, sender=Project)
+def flag_projects_listing_deleted(sender, instance, **kwargs):
+    """Projects showing the deleted one as related need new neighbours."""
+    Project.objects.filter(
+        pk__in=RelatedProject.objects.filter(related=instance).values('project_id')
+    ).update(related_stale=True)
+
+
+@receiver(m2m_changed, sender=Skill.related_projects.through)
+def flag_skill_projects(sender, instance, action, reverse, model, pk_set, **kwargs):
+    """Skills are features of the projects they link to."""
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if reverse:
+        # instance is a project, pk_set its skills
+        projects = Project.objects.filter(pk=instance.pk)
+    elif action == 'pre_clear':
+        projects = instance.related_projects.all()
+    else:
+        projects = Project.objects.filter(pk__in=pk_set)
+    Project.objects.filter(pk__in=projects.values('pk')).update(related_stale=True)
+
+
+@receiver(pre_delete, sender=Skill)
+def flag_deleted_skill_projects(sender, instance, **kwargs):
+    Project.objects.filter(pk__in=instance.related_projects.values('pk')).update(related_stale=True)
+
+
+@receiver(projects_bulk_created, sender=Project)
+def bulk_created_projects(sender, projects, **kwargs):
+    """Do for a bulk_create() batch what post_save does for single saves."""
+    search.index_projects([project for project in projects if project.pk])
+    on_commit_once(mark_catalog_stale)
+    on_commit_once(bump_content_generation)
+
+
+def content_changed(sender, **kwargs):
+    """Invalidate all cached pages once the edit is committed."""
+    on_commit_once(bump_content_generation)
+
+
+def fragments_changed(sender, **kwargs):
+    """Invalidate the cached fragments of the model once the edit is committed."""
+    on_commit_once(FRAGMENT_VERSION_BUMPS[sender])
+
+
+for model in CONTENT_MODELS:
+    post_save.connect(content_changed, sender=model, dispatch_uid=f'content_saved_{model.__name__}')
+    post_delete.connect(content_changed, sender=model, dispatch_uid=f'content_deleted_{model.__name__}')
+
+for model in FRAGMENT_VERSION_BUMPS:
+    post_save.connect(fragments_changed, sender=model, dispatch_uid=f'fragments_saved_{model.__name__}')
+    post_delete.connect(fragments_changed, sender=model, dispatch_uid=f'fragments_deleted_{model.__name__}')
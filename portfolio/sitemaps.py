@@ -2,38 +2,170 @@
 Sitemap Configuration
 
 Sitemaps for SEO optimization.
+
+/sitemap.xml is a sitemap index pointing at one sitemap per page of each
+section (/sitemap-<section>-<page>.xml), so no file ever exceeds the
+protocol's 50,000 URLs. The page list, with the lastmod of each page,
+comes from one aggregate query and is cached until the next content
+edit; pages are streamed from a database iterator instead of rendering
+every URL through a template in memory.
 """
 
+from xml.sax.saxutils import escape
+
+from django.conf import settings
 from django.contrib.sitemaps import Sitemap
+from django.core.cache import cache
+from django.db import connections, router
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
 from django.urls import reverse
 
+from .cache import PAGE_CACHE_TIMEOUT
 from .models import Project
 
 
+# URLs per sitemap page (the protocol allows up to 50,000)
+SITEMAP_PAGE_SIZE = getattr(settings, 'SITEMAP_PAGE_SIZE', 10000)
+
+# Rows fetched (and URLs written) per chunk of a streamed page
+STREAM_CHUNK_SIZE = 500
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+
+
 class StaticViewSitemap(Sitemap):
     """Sitemap for static pages."""
-    
+
     priority = 1.0
     changefreq = 'weekly'
-    
+
     def items(self):
         return ['portfolio:index', 'portfolio:projects_list']
-    
+
     def location(self, item):
         return reverse(item)
 
+    def pages(self, using):
+        """[(first key, lastmod)] of every page of the section."""
+        return [(None, None)]
+
+    def page_items(self, start, using):
+        return self.items()
+
 
 class ProjectSitemap(Sitemap):
     """Sitemap for project detail pages."""
-    
+
     priority = 0.8
     changefreq = 'monthly'
-    
+    limit = SITEMAP_PAGE_SIZE
+
     def items(self):
-        return Project.objects.filter(is_visible=True)
-    
+        return Project.objects.filter(is_visible=True).order_by('pk')
+
     def lastmod(self, obj):
         return obj.updated_at
-    
+
     def location(self, obj):
         return obj.get_absolute_url()
+
+    def pages(self, using):
+        """
+        [(first pk, lastmod)] of every page, numbering the visible projects
+        by pk and grouping them by page in a single query.
+        """
+        numbered = self.items().using(using).values(
+            page_number=(Window(RowNumber(), order_by='pk') - 1) / self.limit,
+            row_pk=F('pk'),
+            row_updated_at=F('updated_at'),
+        )
+        sql, params = numbered.query.sql_with_params()
+        connection = connections[using]
+        updated_at = Project._meta.get_field('updated_at').cached_col
+        converters = connection.ops.get_db_converters(updated_at)
+        with connection.cursor() as cursor:
+            # Window functions cannot be grouped on directly: aggregate the
+            # numbered rows in an outer query
+            cursor.execute(
+                f'SELECT MIN(row_pk), MAX(row_updated_at) FROM ({sql}) numbered '
+                f'GROUP BY page_number ORDER BY page_number',
+                params
+            )
+            pages = []
+            for first_pk, lastmod in cursor.fetchall():
+                for converter in converters:
+                    lastmod = converter(lastmod, updated_at, connection)
+                pages.append((first_pk, lastmod))
+        return pages
+
+    def page_items(self, start, using):
+        return (
+            self.items().using(using)
+            .filter(pk__gte=start)
+            .only('slug', 'updated_at')[:self.limit]
+            .iterator(chunk_size=STREAM_CHUNK_SIZE)
+        )
+
+
+SITEMAPS = {
+    'static': StaticViewSitemap,
+    'projects': ProjectSitemap,
+}
+
+
+def sitemap_pages(generation):
+    """
+    {(section, page number): (first key, lastmod)} of every sitemap page,
+    cached for the content generation.
+    """
+    key = f'portfolio:sitemap_pages:{generation}'
+    pages = cache.get(key)
+    if pages is None:
+        using = router.db_for_read(Project)
+        pages = {
+            (section, number): page
+            for section, sitemap in SITEMAPS.items()
+            for number, page in enumerate(sitemap().pages(using), start=1)
+        }
+        cache.set(key, pages, PAGE_CACHE_TIMEOUT)
+    return pages
+
+
+def render_index(pages, base_url):
+    """The sitemap index listing every page, with its lastmod."""
+    entries = []
+    for (section, number), (start, lastmod) in pages.items():
+        location = reverse('portfolio:sitemap_page', kwargs={'section': section, 'page': number})
+        entry = f'  <sitemap>\n    <loc>{escape(base_url + location)}</loc>\n'
+        if lastmod:
+            entry += f'    <lastmod>{lastmod.isoformat()}</lastmod>\n'
+        entries.append(entry + '  </sitemap>\n')
+    return (
+        XML_HEADER
+        + '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        + ''.join(entries)
+        + '</sitemapindex>\n'
+    ).encode('utf-8')
+
+
+def stream_page(section, start, base_url, using):
+    """Yield the XML of one sitemap page in chunks of STREAM_CHUNK_SIZE URLs."""
+    sitemap = SITEMAPS[section]()
+    yield (
+        XML_HEADER
+        + '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    ).encode('utf-8')
+    chunk = []
+    for item in sitemap.page_items(start, using):
+        entry = f'  <url>\n    <loc>{escape(base_url + sitemap.location(item))}</loc>\n'
+        lastmod = sitemap.lastmod(item) if hasattr(sitemap, 'lastmod') else None
+        if lastmod:
+            entry += f'    <lastmod>{lastmod:%Y-%m-%d}</lastmod>\n'
+        entry += f'    <changefreq>{sitemap.changefreq}</changefreq>\n'
+        entry += f'    <priority>{sitemap.priority}</priority>\n  </url>\n'
+        chunk.append(entry)
+        if len(chunk) >= STREAM_CHUNK_SIZE:
+            yield ''.join(chunk).encode('utf-8')
+            chunk = []
+    yield (''.join(chunk) + '</urlset>\n').encode('utf-8')
@@ -0,0 +1,125 @@
+"""
+Catalog Snapshots
+
+Pre-serialized, pre-compressed JSON of the public project catalog served
+by api_projects for its unfiltered and per-category calls. A committed
+Project edit only marks the snapshot stale; the next API call rebuilds it
+under a cache lock (other callers keep the previous catalog meanwhile)
+and publishes it by swapping a single pointer, so readers never see a
+half-written catalog. The previous variants are deleted once replaced.
+"""
+
+import gzip
+import json
+import uuid
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Project
+
+try:
+    import brotli
+except ImportError:  # brotli is optional
+    brotli = None
+
+
+SNAPSHOT_POINTER_KEY = 'portfolio:catalog:current'
+SNAPSHOT_STALE_KEY = 'portfolio:catalog:stale'
+SNAPSHOT_LOCK_KEY = 'portfolio:catalog:lock'
+
+# Unused snapshots expire on their own; the lock outlives the slowest rebuild
+SNAPSHOT_TIMEOUT = 24 * 60 * 60
+SNAPSHOT_LOCK_TIMEOUT = 5 * 60
+
+# Variant served when no category filter is given
+ALL_CATEGORIES = ''
+
+
+def serialize_project(project):
+    """Public JSON representation of a project used by api_projects."""
+    return {
+        'id': project.id,
+        'title': project.title,
+        'slug': project.slug,
+        'description': project.description,
+        'thumbnail': project.image_thumbnail.url if project.image_thumbnail else '',
+        'tech_stack': project.tech_stack_list,
+        'category': project.category,
+        'external_url': project.external_url,
+        'detail_url': project.get_absolute_url(),
+        'featured': project.featured,
+    }
+
+
+def _encode(projects):
+    body = json.dumps({'projects': projects}, cls=DjangoJSONEncoder).encode('utf-8')
+    variant = {
+        'identity': body,
+        'gzip': gzip.compress(body, compresslevel=9, mtime=0),
+    }
+    if brotli is not None:
+        variant['br'] = brotli.compress(body)
+    return variant
+
+
+def mark_catalog_stale():
+    """Have the next API call rebuild the snapshot (scheduled on commit)."""
+    cache.set(SNAPSHOT_STALE_KEY, True, timeout=None)
+
+
+def build_catalog_snapshot():
+    """Serialize the visible catalog once and publish every variant atomically."""
+    # Cleared before reading: an edit committed meanwhile marks it again
+    cache.delete(SNAPSHOT_STALE_KEY)
+    previous_id = cache.get(SNAPSHOT_POINTER_KEY)
+    by_category = {code: [] for code, label in Project.CATEGORY_CHOICES}
+    everything = []
+    for project in Project.objects.filter(is_visible=True).order_by('order').iterator(chunk_size=500):
+        data = serialize_project(project)
+        everything.append(data)
+        by_category.setdefault(project.category, []).append(data)
+    
+    snapshot_id = uuid.uuid4().hex
+    variants = {ALL_CATEGORIES: _encode(everything)}
+    for category, projects in by_category.items():
+        variants[category] = _encode(projects)
+    
+    cache.set_many(
+        {_variant_key(snapshot_id, name): variant for name, variant in variants.items()},
+        timeout=SNAPSHOT_TIMEOUT
+    )
+    cache.set(SNAPSHOT_POINTER_KEY, snapshot_id, timeout=SNAPSHOT_TIMEOUT)
+    if previous_id and previous_id != snapshot_id:
+        cache.delete_many([_variant_key(previous_id, name) for name in variants])
+    return snapshot_id
+
+
+def get_catalog_variant(category=ALL_CATEGORIES):
+    """
+    Return the encoded bodies for a variant, rebuilding the snapshot if it
+    is missing or stale and no other process is already rebuilding it.
+    Returns None for categories that have no variant, and when there is
+    no snapshot yet and another process is building it (the caller then
+    serializes from the database).
+    """
+    if category != ALL_CATEGORIES and category not in dict(Project.CATEGORY_CHOICES):
+        return None
+    current = cache.get_many([SNAPSHOT_POINTER_KEY, SNAPSHOT_STALE_KEY])
+    snapshot_id = current.get(SNAPSHOT_POINTER_KEY)
+    variant = cache.get(_variant_key(snapshot_id, category)) if snapshot_id else None
+    if variant is not None and SNAPSHOT_STALE_KEY not in current:
+        return variant
+    
+    if not cache.add(SNAPSHOT_LOCK_KEY, True, SNAPSHOT_LOCK_TIMEOUT):
+        # Being rebuilt elsewhere: the previous catalog, if any, meanwhile
+        return variant
+    try:
+        snapshot_id = build_catalog_snapshot()
+    finally:
+        cache.delete(SNAPSHOT_LOCK_KEY)
+    return cache.get(_variant_key(snapshot_id, category))
+
+
+def _variant_key(snapshot_id, category):
+    return f'portfolio:catalog:{snapshot_id}:{category or "all"}'
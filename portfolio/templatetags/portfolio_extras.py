@@ -0,0 +1,145 @@
+"""
+Portfolio Template Tags
+
+Usage:
+    {% load portfolio_extras %}
+    {% responsive_image project.image_thumbnail project.image_thumbnail_variants sizes="(max-width: 768px) 100vw, 33vw" alt=project.title %}
+    {% cached_fragment 'project-card' project %}...{% endcached_fragment %}
+"""
+
+import hashlib
+import os
+from collections.abc import Iterable, Mapping
+
+from django import template
+from django.core.cache import cache
+from django.db import models
+from django.utils.html import format_html, format_html_join
+
+from portfolio.cache import FRAGMENT_CACHE_TIMEOUT, get_model_version
+
+register = template.Library()
+
+
+MIME_TYPES = {
+    'avif': 'image/avif',
+    'webp': 'image/webp',
+}
+
+
+@register.simple_tag
+def responsive_image(image, variants=None, sizes='100vw', alt='', loading='lazy', **attrs):
+    """
+    Render a <picture> with one <source> per modern format and the original
+    image as fallback. Without variants it renders a plain <img>.
+    """
+    if not image:
+        return ''
+    variants = variants or {}
+    
+    img_attrs = {'src': image.url, 'alt': alt, 'loading': loading}
+    if variants.get('width') and variants.get('height'):
+        img_attrs['width'] = variants['width']
+        img_attrs['height'] = variants['height']
+    img_attrs.update(attrs)
+    img = format_html(
+        '<img {}>',
+        format_html_join(' ', '{}="{}"', ((k.replace('_', '-'), v) for k, v in img_attrs.items()))
+    )
+    
+    formats = variants.get('formats') or {}
+    if variants.get('source') != image.name or not any(formats.values()):
+        return img
+    
+    storage = image.storage
+    sources = []
+    for name in MIME_TYPES:
+        entries = formats.get(name)
+        if not entries:
+            continue
+        srcset = ', '.join(f'{storage.url(path)} {width}w' for width, path in entries)
+        sources.append(format_html(
+            '<source type="{}" srcset="{}" sizes="{}">',
+            MIME_TYPES[name], srcset, sizes
+        ))
+    return format_html('<picture>{}{}</picture>', format_html_join('', '{}', ((s,) for s in sources)), img)
+
+
+# render_context key of the model versions read by the current render
+MODEL_VERSIONS = 'portfolio_model_versions'
+
+
+def _dependency_version(value, model_versions):
+    """
+    Describe a fragment dependency: rows by pk and updated_at (or their
+    model version), collections item by item, anything else by value.
+    """
+    if isinstance(value, models.Model):
+        updated_at = getattr(value, 'updated_at', None)
+        if updated_at is not None:
+            return f'{value._meta.label_lower}:{value.pk}:{updated_at.isoformat()}'
+        model = type(value)
+        if model not in model_versions:
+            model_versions[model] = get_model_version(model)
+        return f'{value._meta.label_lower}:{value.pk}:{model_versions[model]}'
+    if isinstance(value, Mapping):
+        return '{%s}' % ','.join(
+            f'{key}={_dependency_version(item, model_versions)}' for key, item in value.items()
+        )
+    if isinstance(value, Iterable) and not isinstance(value, (str, bytes)):
+        return '[%s]' % ','.join(_dependency_version(item, model_versions) for item in value)
+    return repr(value)
+
+
+class CachedFragmentNode(template.Node):
+    def __init__(self, nodelist, name, dependencies, source_version):
+        self.nodelist = nodelist
+        self.name = name
+        self.dependencies = dependencies
+        self.source_version = source_version
+    
+    def render(self, context):
+        # Model versions are read once per template render
+        model_versions = context.render_context.setdefault(MODEL_VERSIONS, {})
+        parts = [str(self.name.resolve(context)), self.source_version] + [
+            _dependency_version(dependency.resolve(context), model_versions)
+            for dependency in self.dependencies
+        ]
+        key = 'portfolio:fragment:' + hashlib.md5('|'.join(parts).encode('utf-8')).hexdigest()
+        content = cache.get(key)
+        if content is None:
+            content = self.nodelist.render(context)
+            cache.set(key, content, FRAGMENT_CACHE_TIMEOUT)
+        return content
+
+
+@register.tag
+def cached_fragment(parser, token):
+    """
+    Cache the enclosed markup until one of its dependencies changes:
+    
+        {% cached_fragment 'project-card' project %}...{% endcached_fragment %}
+    
+    Rows are identified by pk and updated_at (or a model version bumped
+    on every edit); lists, pages and dicts by all of their items. Nest
+    fragments so an outer one (a list) is rebuilt from its cached inner
+    ones (the cards) when a single item changes. The template file's
+    modification time is part of the key, so a deploy never serves
+    fragments rendered by an older template.
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' richiede un nome per il frammento")
+    nodelist = parser.parse(('endcached_fragment',))
+    parser.delete_first_token()
+    
+    origin = getattr(parser, 'origin', None)
+    source_version = ''
+    if origin is not None and origin.name and os.path.exists(origin.name):
+        source_version = f'{origin.name}:{os.path.getmtime(origin.name)}'
+    return CachedFragmentNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        [parser.compile_filter(bit) for bit in bits[2:]],
+        source_version
+    )
@@ -0,0 +1,69 @@
+import base64
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+
+from portfolio.models import Project
+
+
+URL = '/api/v2/projects/'
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ApiProjectsV2Tests(TransactionTestCase):
+    """Committed for real: edits bump the content generation (the ETag) on commit."""
+
+    def setUp(self):
+        cache.clear()
+        now = timezone.now()
+        # Ties on (order, created_at), so only the id tells the rows apart
+        for i, (order, age) in enumerate([(0, 0), (0, 0), (0, 0), (1, 1), (1, 1), (1, 0), (2, 0)]):
+            project = Project.objects.create(title=f'Progetto {i}', description='d', order=order)
+            Project.objects.filter(pk=project.pk).update(created_at=now - timedelta(days=age))
+        Project.objects.create(title='Nascosto', description='d', is_visible=False)
+
+    def walk(self, **params):
+        ids, cursor = [], None
+        while True:
+            query = dict(params, **({'cursor': cursor} if cursor else {}))
+            response = self.client.get(URL, query)
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            ids += [project['id'] for project in body['projects']]
+            cursor = body['next_cursor']
+            if cursor is None:
+                return ids
+
+    def test_pages_cover_every_project_once_when_keys_tie(self):
+        expected = list(
+            Project.objects.filter(is_visible=True).order_by('order', '-created_at', 'id').values_list('id', flat=True)
+        )
+        for limit in (1, 2, 3, 7, 100):
+            with self.subTest(limit=limit):
+                self.assertEqual(self.walk(limit=limit, fields='id'), expected)
+
+    def test_malformed_cursor(self):
+        for cursor in ('non-un-cursore', base64.urlsafe_b64encode(b'[1, 2]').decode(), '!!!'):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(URL, {'cursor': cursor})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json())
+
+    def test_fields_projection(self):
+        response = self.client.get(URL, {'fields': 'id,detail_url', 'limit': 1})
+        project = Project.objects.get(pk=response.json()['projects'][0]['id'])
+
+        self.assertEqual(response.json()['projects'], [{'id': project.pk, 'detail_url': project.get_absolute_url()}])
+        self.assertEqual(self.client.get(URL, {'fields': 'id,password'}).status_code, 400)
+
+    def test_if_none_match(self):
+        response = self.client.get(URL)
+        etag = response['ETag']
+
+        self.assertEqual(self.client.get(URL, headers={'If-None-Match': etag}).status_code, 304)
+        self.assertEqual(self.client.get(URL, {'limit': 2}, headers={'If-None-Match': etag}).status_code, 200)
+
+        Project.objects.filter(is_visible=True).first().save()
+        self.assertEqual(self.client.get(URL, headers={'If-None-Match': etag}).status_code, 200)
@@ -0,0 +1,43 @@
+from django.core.cache import cache
+from django.core.management.base import CommandError
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+
+from portfolio.benchmarks import seed, seed_messages
+from portfolio.management.commands.benchmark import Command
+from portfolio.models import ContactMessage, SiteSettings
+from portfolio.search import message_search_filter
+
+
+class SeedMessagesTests(TestCase):
+
+    def test_seeded_messages_are_searchable(self):
+        seed_messages(30, batch_size=10)
+
+        matches = ContactMessage.objects.filter(message_search_filter('pagamenti report'))
+        # Same words as the 'admin messages?q' benchmark
+        self.assertTrue(matches.exists())
+        self.assertEqual(
+            ContactMessage.objects.filter(message_search_filter('cliente7')).get().email,
+            'cliente7@example.com'
+        )
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class MeasureTests(TransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+        SiteSettings._cached = None
+        seed(5)
+
+    def test_views_with_results_are_measured(self):
+        command = Command()
+        for name, url in command.scenarios():
+            with self.subTest(name=name):
+                command.measure(Client(), url, runs=2)
+
+    def test_empty_result_set_fails(self):
+        command = Command()
+        for url in ('/projects/?tech=Inesistente', '/api/projects/?tech=Inesistente'):
+            with self.subTest(url=url), self.assertRaisesMessage(CommandError, 'non ha restituito risultati'):
+                command.measure(Client(), url, runs=2)
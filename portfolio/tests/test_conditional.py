@@ -0,0 +1,90 @@
+from django.core.cache import cache
+from django.test import TransactionTestCase, override_settings
+
+from portfolio.models import GalleryImage, Project, SiteSettings
+
+
+THUMBNAIL = 'projects/test.jpg'
+
+
+def create_project(title, **fields):
+    return Project.objects.create(
+        title=title,
+        description='Descrizione',
+        image_thumbnail=THUMBNAIL,
+        image_thumbnail_variants={'source': THUMBNAIL, 'formats': {}},
+        **fields
+    )
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ConditionalGetTests(TransactionTestCase):
+    """
+    Committed for real: the async views read their sections from pool
+    threads with their own connections, and edits invalidate on commit.
+    """
+
+    def setUp(self):
+        cache.clear()
+        SiteSettings._cached = None
+        SiteSettings.get_settings()
+        self.project = create_project('Alpha')
+
+    def get(self, url, etag=None):
+        headers = {'If-None-Match': etag} if etag else {}
+        return self.client.get(url, headers=headers)
+
+    def assertRevalidates(self, url):
+        """Return the ETag after checking that it still answers 304."""
+        response = self.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.has_header('Last-Modified'))
+        etag = response['ETag']
+        self.assertEqual(self.get(url, etag).status_code, 304)
+        return etag
+
+    def test_project_detail_edit(self):
+        url = self.project.get_absolute_url()
+        etag = self.assertRevalidates(url)
+
+        self.project.description = 'Nuova descrizione'
+        self.project.save()
+
+        response = self.get(url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Nuova descrizione')
+        self.assertEqual(self.get(url, response['ETag']).status_code, 304)
+
+    def test_project_detail_gallery_edits(self):
+        url = self.project.get_absolute_url()
+        etag = self.assertRevalidates(url)
+
+        image = GalleryImage.objects.create(
+            project=self.project, external_url='https://example.com/a.png', alt='Schermata'
+        )
+        response = self.get(url, etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        image.delete()
+        self.assertEqual(self.get(url, etag).status_code, 200)
+
+    def test_project_detail_site_settings_edit(self):
+        url = self.project.get_absolute_url()
+        etag = self.assertRevalidates(url)
+
+        site_settings = SiteSettings.get_settings()
+        site_settings.site_name = 'Nuovo nome'
+        site_settings.save()
+
+        self.assertEqual(self.get(url, etag).status_code, 200)
+
+    def test_projects_list_new_project(self):
+        url = '/projects/'
+        etag = self.assertRevalidates(url)
+
+        create_project('Beta')
+
+        response = self.get(url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Beta')
@@ -0,0 +1,100 @@
+import os
+import re
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from portfolio.models import GalleryImage, Project, SiteSettings, Skill, Tech, Testimonial, TimelineEvent
+
+
+WRITE = re.compile(r'^\s*(INSERT|UPDATE|DELETE|REPLACE)\b', re.IGNORECASE)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ExportImportRoundTripTests(TransactionTestCase):
+    """Committed for real: flush and the import's on_commit work need real transactions."""
+
+    def setUp(self):
+        cache.clear()
+        SiteSettings._cached = None
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'backup.jsonl')
+
+        # Gaps in the primary keys, which the import must keep
+        for title in ('Scartato', 'Gestionale', 'Portale', 'Nascosto'):
+            Project.objects.create(title=title, description='Descrizione', tech_stack=['Python', 'Django'])
+        Project.objects.filter(title='Scartato').delete()
+        for title, fields in (('Portale', {'tech_stack': ['React']}), ('Nascosto', {'is_visible': False})):
+            project = Project.objects.get(title=title)
+            for name, value in fields.items():
+                setattr(project, name, value)
+            project.save()
+
+        gestionale = Project.objects.get(title='Gestionale')
+        GalleryImage.objects.create(project=gestionale, external_url='https://example.com/a.png', alt='Schermata')
+        GalleryImage.objects.create(project=gestionale, external_url='https://example.com/b.png', alt='Dettaglio')
+        skill = Skill.objects.create(name='Django', category='backend', proficiency=90)
+        skill.related_projects.add(gestionale, Project.objects.get(title='Portale'))
+        Testimonial.objects.create(name='Anna', role='Cliente', quote='Ottimo lavoro')
+        TimelineEvent.objects.create(title='Freelance', description='Inizio', year='2020')
+        site_settings = SiteSettings.get_settings()
+        site_settings.site_name = 'Portfolio di prova'
+        site_settings.projects_completed = 42
+        site_settings.save()
+
+    def snapshot(self):
+        return {
+            'projects': list(Project.objects.order_by('pk').values_list('pk', 'title', 'slug', 'is_visible')),
+            'techs': sorted(Project.techs.through.objects.values_list('project_id', 'tech__name')),
+            'tech_counts': sorted(Tech.objects.values_list('name', 'visible_project_count')),
+            'gallery': list(GalleryImage.objects.order_by('pk').values_list('pk', 'project_id', 'external_url', 'alt')),
+            'skills': sorted(Skill.related_projects.through.objects.values_list('skill_id', 'project_id')),
+            'testimonials': list(Testimonial.objects.values_list('pk', 'name', 'quote')),
+            'timeline': list(TimelineEvent.objects.values_list('pk', 'title', 'year')),
+            'settings': list(SiteSettings.objects.values_list('pk', 'site_name', 'projects_completed')),
+        }
+
+    def test_round_trip_through_an_empty_database(self):
+        before = self.snapshot()
+        call_command('export_portfolio', self.path, stdout=StringIO())
+
+        call_command('flush', interactive=False, verbosity=0)
+        self.assertFalse(Project.objects.exists())
+        call_command('import_portfolio', self.path, stdout=StringIO())
+
+        self.assertEqual(self.snapshot(), before)
+        # The sequences moved past the imported keys
+        self.assertGreater(
+            Project.objects.create(title='Nuovo', description='d').pk,
+            max(pk for pk, *rest in before['projects'])
+        )
+
+    def test_importing_unchanged_data_writes_nothing(self):
+        call_command('export_portfolio', self.path, stdout=StringIO())
+        before = self.snapshot()
+
+        output = StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('import_portfolio', self.path, stdout=output)
+
+        writes = [query['sql'] for query in queries.captured_queries if WRITE.match(query['sql'])]
+        self.assertEqual(writes, [])
+        self.assertEqual(self.snapshot(), before)
+        self.assertIn('Progetti: 0 creati, 0 aggiornati, 3 invariati', output.getvalue())
+
+    def test_import_restores_changed_links(self):
+        call_command('export_portfolio', self.path, stdout=StringIO())
+        before = self.snapshot()
+        skill = Skill.objects.get()
+        skill.related_projects.remove(Project.objects.get(title='Portale'))
+        skill.related_projects.add(Project.objects.get(title='Nascosto'))
+
+        call_command('import_portfolio', self.path, stdout=StringIO())
+
+        self.assertEqual(self.snapshot(), before)
@@ -0,0 +1,175 @@
+from datetime import timedelta
+from io import StringIO
+from smtplib import SMTPException
+from unittest import mock
+
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from portfolio.management.commands.send_outbox import Command as SendOutboxCommand
+from portfolio.models import ContactMessage, OutboxEmail
+
+
+def queue_email(recipient='info@example.com', **fields):
+    return OutboxEmail.objects.create(
+        subject='[Portfolio] Nuovo messaggio',
+        body='Testo',
+        recipient=recipient,
+        **fields
+    )
+
+
+def send_outbox():
+    stdout, stderr = StringIO(), StringIO()
+    call_command('send_outbox', stdout=stdout, stderr=stderr)
+    return stdout.getvalue(), stderr.getvalue()
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    CONTACT_DIGEST_THRESHOLD=0,
+    OUTBOX_MAX_ATTEMPTS=3,
+    OUTBOX_RETRY_BASE_DELAY=30,
+    OUTBOX_LEASE=300,
+)
+class SendOutboxTests(TestCase):
+
+    def test_contact_message_queues_notification(self):
+        message = ContactMessage.objects.create(
+            name='Mario', email='mario@example.com', message='Ciao'
+        )
+
+        email = OutboxEmail.for_contact_message(message)
+
+        self.assertEqual(email.status, OutboxEmail.STATUS_PENDING)
+        self.assertIn('Mario', email.subject)
+
+    def test_sends_due_emails(self):
+        email = queue_email()
+
+        stdout, _ = send_outbox()
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['info@example.com'])
+        self.assertIn('Inviate: 1', stdout)
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboxEmail.STATUS_SENT)
+        self.assertIsNotNone(email.sent_at)
+
+    def test_skips_emails_not_due_yet(self):
+        queue_email(next_attempt_at=timezone.now() + timedelta(minutes=5))
+
+        send_outbox()
+
+        self.assertEqual(mail.outbox, [])
+
+    def test_failure_backs_off_exponentially(self):
+        email = queue_email()
+
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages',
+                        side_effect=SMTPException('server down')):
+            started = timezone.now()
+            _, stderr = send_outbox()
+            email.refresh_from_db()
+            self.assertEqual(email.status, OutboxEmail.STATUS_PENDING)
+            self.assertEqual(email.attempts, 1)
+            self.assertIn('server down', email.last_error)
+            self.assertIn('Invio fallito', stderr)
+            first_delay = email.next_attempt_at - started
+
+            OutboxEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+            started = timezone.now()
+            send_outbox()
+            email.refresh_from_db()
+            second_delay = email.next_attempt_at - started
+
+        self.assertAlmostEqual(first_delay.total_seconds(), 30, delta=5)
+        self.assertAlmostEqual(second_delay.total_seconds(), 60, delta=5)
+        self.assertEqual(email.attempts, 2)
+
+    def test_gives_up_after_max_attempts(self):
+        email = queue_email(attempts=2)
+
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages',
+                        side_effect=SMTPException('server down')):
+            send_outbox()
+
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboxEmail.STATUS_FAILED)
+        self.assertEqual(email.attempts, 3)
+
+    def test_retry_after_failure_is_delivered(self):
+        email = queue_email()
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages',
+                        side_effect=SMTPException('server down')):
+            send_outbox()
+        OutboxEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+
+        send_outbox()
+
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboxEmail.STATUS_SENT)
+        self.assertEqual(email.last_error, '')
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_claimed_email_is_left_to_its_worker_until_the_lease_expires(self):
+        email = queue_email(
+            status=OutboxEmail.STATUS_SENDING,
+            next_attempt_at=timezone.now() + timedelta(minutes=5)
+        )
+        send_outbox()
+        self.assertEqual(mail.outbox, [])
+
+        OutboxEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+        send_outbox()
+
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboxEmail.STATUS_SENT)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_claim_counts_the_attempt(self):
+        email = queue_email()
+
+        claimed, = SendOutboxCommand().claim(10)
+
+        self.assertEqual(claimed.attempts, 1)
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), (OutboxEmail.STATUS_SENDING, 1))
+
+    def test_expired_leases_count_towards_max_attempts(self):
+        email = queue_email()
+        # The worker dies mid-send three times in a row
+        for _ in range(3):
+            self.assertEqual(len(SendOutboxCommand(stderr=StringIO()).claim(10)), 1)
+            OutboxEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+
+        _, stderr = send_outbox()
+
+        self.assertEqual(mail.outbox, [])
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), (OutboxEmail.STATUS_FAILED, 3))
+        self.assertIn('tentativi interrotti', stderr)
+
+    @override_settings(CONTACT_DIGEST_THRESHOLD=3)
+    def test_burst_is_sent_as_one_digest_per_recipient(self):
+        for _ in range(3):
+            queue_email('info@example.com')
+        queue_email('altro@example.com')
+
+        send_outbox()
+
+        self.assertEqual(len(mail.outbox), 2)
+        digest = next(m for m in mail.outbox if m.to == ['info@example.com'])
+        self.assertEqual(digest.subject, '[Portfolio] 3 nuovi messaggi')
+        self.assertFalse(OutboxEmail.objects.exclude(status=OutboxEmail.STATUS_SENT).exists())
+
+    @override_settings(CONTACT_DIGEST_THRESHOLD=5)
+    def test_below_digest_threshold_sends_each_email(self):
+        for _ in range(3):
+            queue_email()
+
+        send_outbox()
+
+        self.assertEqual(len(mail.outbox), 3)
@@ -0,0 +1,76 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+
+from portfolio.models import Project, SiteSettings
+from portfolio.views import PROJECTS_PER_PAGE, listing_projects
+
+
+THUMBNAIL = 'projects/test.jpg'
+FILTERS = [{}, {'category': 'backend'}, {'tech': 'Python'}, {'category': 'backend', 'tech': 'Python'}]
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ProjectsListPaginationTests(TransactionTestCase):
+    """
+    Pages of the projects list compared with the same pages fetched by
+    OFFSET. Committed for real: edits bump the content generation on commit.
+    """
+
+    def setUp(self):
+        cache.clear()
+        SiteSettings._cached = None
+        now = timezone.now()
+        categories = ['backend', 'frontend', 'fullstack']
+        for i in range(40):
+            project = Project.objects.create(
+                title=f'Progetto {i}',
+                description='Descrizione',
+                category=categories[i % 3],
+                tech_stack=['Python'] if i % 2 else ['React'],
+                # Runs of equal (order, created_at): only the id breaks the tie
+                order=i // 8,
+                image_thumbnail=THUMBNAIL,
+                image_thumbnail_variants={'source': THUMBNAIL, 'formats': {}},
+            )
+            Project.objects.filter(pk=project.pk).update(created_at=now - timedelta(days=i % 4 // 2))
+
+    def page_ids(self, page=None, **filters):
+        params = dict(filters, **({'page': page} if page else {}))
+        response = self.client.get('/projects/', params)
+        self.assertEqual(response.status_code, 200)
+        return [project.pk for project in response.context['projects']]
+
+    def offset_pages(self, **filters):
+        paginator = Paginator(listing_projects(**filters).values_list('pk', flat=True), PROJECTS_PER_PAGE)
+        return [list(paginator.page(number)) for number in paginator.page_range]
+
+    def assertMatchesOffset(self, **filters):
+        expected = self.offset_pages(**filters)
+        for number, ids in enumerate(expected, 1):
+            self.assertEqual(self.page_ids(number, **filters), ids, f'pagina {number}')
+        # Out of range falls back to the last page, like Paginator.get_page()
+        self.assertEqual(self.page_ids(len(expected) + 5, **filters), expected[-1])
+
+    def test_pages_match_offset_pagination(self):
+        for filters in FILTERS:
+            with self.subTest(**filters):
+                self.assertMatchesOffset(**filters)
+
+    def test_project_edit_invalidates_page_starts(self):
+        for filters in FILTERS:
+            self.assertMatchesOffset(**filters)
+
+        # Moves a project to the front and shifts every page start after it
+        moved = Project.objects.filter(category='backend', techs__name='Python').last()
+        moved.order = 0
+        moved.save()
+        Project.objects.filter(pk=Project.objects.order_by('pk').first().pk).delete()
+        Project.objects.create(title='Nuovo', description='d', category='backend', tech_stack=['Python'], order=1)
+
+        for filters in FILTERS:
+            with self.subTest(**filters):
+                self.assertMatchesOffset(**filters)
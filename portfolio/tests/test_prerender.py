@@ -0,0 +1,85 @@
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TransactionTestCase, override_settings
+
+from portfolio import prerender as prerender_module
+from portfolio.models import Project, SiteSettings
+from portfolio.prerender import prerender
+from portfolio.sitemaps import ProjectSitemap
+
+
+THUMBNAIL = 'projects/test.jpg'
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class IncrementalPrerenderTests(TransactionTestCase):
+    """Committed for real: the async views read their sections from pool threads."""
+
+    def setUp(self):
+        # Three sitemap pages
+        patcher = mock.patch.object(ProjectSitemap, 'limit', 5)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        cache.clear()
+        SiteSettings._cached = None
+        SiteSettings.get_settings()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = Path(directory.name)
+        # 12 projects: two list pages unfiltered, one per category and tech
+        self.projects = [
+            Project.objects.create(
+                title=f'Progetto {i}',
+                description='Descrizione',
+                category='backend' if i % 2 == 0 else 'frontend',
+                tech_stack=['Python'] if i % 2 == 0 else ['React'],
+                order=i,
+                image_thumbnail=THUMBNAIL,
+                image_thumbnail_variants={'source': THUMBNAIL, 'formats': {}},
+            )
+            for i in range(12)
+        ]
+        prerender(full=True, root=self.root)
+
+    def rendered_urls(self):
+        with mock.patch.object(prerender_module, 'render_page', wraps=prerender_module.render_page) as render_page:
+            prerender(root=self.root)
+        return {call.args[0] for call in render_page.call_args_list}
+
+    def test_nothing_changed(self):
+        self.assertEqual(self.rendered_urls(), set())
+
+    def test_project_edit_renders_only_the_pages_showing_it(self):
+        project = self.projects[4]
+        project.description = 'Nuova descrizione'
+        project.save()
+
+        self.assertEqual(self.rendered_urls(), {
+            '/',
+            project.get_absolute_url(),
+            '/projects/', '/projects/?page=1',
+            '/projects/?category=backend', '/projects/?category=backend&page=1',
+            '/projects/?tech=Python', '/projects/?tech=Python&page=1',
+            # Its lastmod changed
+            '/sitemap.xml', '/sitemap-projects-1.xml',
+        })
+        self.assertIn('Nuova descrizione', (self.root / project.get_absolute_url().lstrip('/') / 'index.html').read_text())
+
+    def test_hidden_project_shifts_its_lists_and_removes_its_page(self):
+        project = self.projects[4]
+        detail = self.root / project.get_absolute_url().lstrip('/') / 'index.html'
+        self.assertTrue(detail.exists())
+        project.is_visible = False
+        project.save()
+
+        rendered = self.rendered_urls()
+
+        self.assertFalse(detail.exists())
+        self.assertTrue({
+            '/projects/?page=2', '/sitemap-projects-2.xml', '/sitemap-projects-3.xml',
+        } <= rendered)
+        self.assertFalse({'/projects/?category=frontend', '/projects/?tech=React'} & rendered)
+        self.assertFalse({project.get_absolute_url() for project in self.projects[5:]} & rendered)
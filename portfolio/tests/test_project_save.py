@@ -0,0 +1,53 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from portfolio.models import Project, Tech
+
+
+THUMBNAIL = 'projects/test.jpg'
+
+
+class ProjectSaveUpdateFieldsTests(TestCase):
+
+    def setUp(self):
+        self.project = Project.objects.create(
+            title='Alpha',
+            description='Descrizione',
+            tech_stack=['Python', 'Django'],
+            image_thumbnail=THUMBNAIL,
+            image_thumbnail_variants={'source': THUMBNAIL, 'formats': {}},
+        )
+
+    def test_other_fields_skip_techs_and_images(self):
+        self.project.order = 5
+        with CaptureQueriesContext(connection) as queries:
+            self.project.save(update_fields=['order'])
+
+        touched = ' '.join(query['sql'] for query in queries.captured_queries)
+        self.assertNotIn('portfolio_tech', touched)
+        self.assertNotIn('image_thumbnail_variants', touched)
+
+    def test_unsaved_fields_are_not_synced(self):
+        self.project.tech_stack = ['Rust']
+        self.project.image_thumbnail = 'projects/altra.jpg'
+        self.project.save(update_fields=['title'])
+
+        self.assertEqual(sorted(self.project.techs.values_list('name', flat=True)), ['Django', 'Python'])
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.image_thumbnail_variants['source'], THUMBNAIL)
+
+    def test_listed_fields_are_synced(self):
+        self.project.tech_stack = ['Rust']
+        self.project.image_thumbnail = 'projects/altra.jpg'
+        self.project.save(update_fields=['tech_stack', 'image_thumbnail'])
+
+        self.assertEqual(list(self.project.techs.values_list('name', flat=True)), ['Rust'])
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.image_thumbnail_variants['source'], 'projects/altra.jpg')
+
+    def test_visibility_refreshes_tag_counts(self):
+        self.project.is_visible = False
+        self.project.save(update_fields=['is_visible'])
+
+        self.assertEqual(Tech.objects.get(name='Python').visible_project_count, 0)
@@ -0,0 +1,79 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from portfolio.ratelimit import TokenBucket
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class TokenBucketTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.now = 1_000_000.0
+        patcher = mock.patch('portfolio.ratelimit.time')
+        patcher.start().time.side_effect = lambda: self.now
+        self.addCleanup(patcher.stop)
+        self.bucket = TokenBucket('test', capacity=3, refill_seconds=10)
+
+    def test_burst_up_to_capacity(self):
+        results = [self.bucket.consume('ip')[0] for _ in range(4)]
+
+        self.assertEqual(results, [True, True, True, False])
+
+    def test_retry_after_until_next_token(self):
+        for _ in range(3):
+            self.bucket.consume('ip')
+
+        self.now += 4
+        allowed, retry_after = self.bucket.consume('ip')
+
+        self.assertFalse(allowed)
+        self.assertEqual(retry_after, 6)
+
+    def test_refills_one_token_per_interval(self):
+        for _ in range(3):
+            self.bucket.consume('ip')
+
+        self.now += 10
+        self.assertEqual(self.bucket.consume('ip'), (True, 0))
+        self.assertFalse(self.bucket.consume('ip')[0])
+
+    def test_refill_is_capped_at_capacity(self):
+        self.bucket.consume('ip')
+
+        self.now += 3600
+        results = [self.bucket.consume('ip')[0] for _ in range(4)]
+
+        self.assertEqual(results, [True, True, True, False])
+
+    def test_keys_have_separate_buckets(self):
+        for _ in range(3):
+            self.bucket.consume('a')
+
+        self.assertFalse(self.bucket.consume('a')[0])
+        self.assertTrue(self.bucket.consume('b')[0])
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    CONTACT_RATELIMIT={'IP_CAPACITY': 1, 'IP_REFILL_SECONDS': 60},
+)
+class ContactRateLimitTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_flood_is_rejected_before_validation(self):
+        url = reverse('portfolio:contact_submit')
+
+        first = self.client.post(url, {}, REMOTE_ADDR='203.0.113.5')
+        second = self.client.post(url, {}, REMOTE_ADDR='203.0.113.5')
+        other_ip = self.client.post(url, {}, REMOTE_ADDR='203.0.113.6')
+
+        self.assertEqual(first.status_code, 400)
+        self.assertEqual(second.status_code, 429)
+        self.assertEqual(second['Retry-After'], '60')
+        self.assertEqual(other_ip.status_code, 400)
@@ -0,0 +1,133 @@
+import random
+from fractions import Fraction
+
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+
+from portfolio.models import Project, RelatedProject, Skill
+from portfolio.related import RELATED_PROJECTS_COUNT, Signatures, build_related, nearest_neighbours
+
+
+def create_project(title, category, techs, **fields):
+    return Project.objects.create(
+        title=title, description='Descrizione', category=category, tech_stack=techs, **fields
+    )
+
+
+def related_titles(project):
+    return list(
+        RelatedProject.objects.filter(project=project).order_by('rank').values_list('related__title', flat=True)
+    )
+
+
+class BuildRelatedTests(TestCase):
+
+    def setUp(self):
+        self.alpha = create_project('Alpha', 'backend', ['Python', 'Django', 'PostgreSQL'], order=1)
+        self.beta = create_project('Beta', 'backend', ['Python', 'Django', 'PostgreSQL', 'Redis'], order=2)
+        self.gamma = create_project('Gamma', 'backend', ['Python', 'Django'], order=3)
+        self.delta = create_project('Delta', 'frontend', ['React', 'TypeScript'], order=4)
+        self.epsilon = create_project('Epsilon', 'frontend', ['React'], order=5)
+        create_project('Nascosto', 'backend', ['Python', 'Django', 'PostgreSQL'], order=0, is_visible=False)
+
+    def test_most_similar_first_without_unrelated_or_hidden_projects(self):
+        build_related(full=True)
+
+        self.assertEqual(related_titles(self.alpha), ['Beta', 'Gamma'])
+        self.assertEqual(related_titles(self.delta), ['Epsilon'])
+        self.assertFalse(RelatedProject.objects.filter(related__is_visible=False).exists())
+
+    def test_ties_go_to_the_project_listed_first(self):
+        first = create_project('Primo', 'design', ['Figma', 'Sass'], order=6)
+        second = create_project('Secondo', 'design', ['Figma', 'Sass'], order=7)
+        third = create_project('Terzo', 'design', ['Figma', 'Sass'], order=8)
+        source = create_project('Sorgente', 'design', ['Figma'], order=9)
+        build_related(full=True)
+
+        self.assertEqual(related_titles(source), ['Primo', 'Secondo', 'Terzo'])
+        # Equal projects list each other, never themselves
+        self.assertEqual(related_titles(second), ['Primo', 'Terzo', 'Sorgente'])
+        self.assertEqual(related_titles(first)[:2], ['Secondo', 'Terzo'])
+        self.assertNotIn('Terzo', related_titles(third))
+
+    def test_skills_count_towards_similarity(self):
+        skill = Skill.objects.create(name='Python', category='backend', proficiency=80)
+        skill.related_projects.add(self.alpha, self.gamma)
+        build_related(full=True)
+
+        self.assertEqual(related_titles(self.alpha), ['Gamma', 'Beta'])
+
+    def test_incremental_run_matches_full_rebuild(self):
+        build_related(full=True)
+        self.epsilon.category = 'backend'
+        self.epsilon.tech_stack = ['Python', 'Django', 'PostgreSQL']
+        self.epsilon.save()
+        self.beta.is_visible = False
+        self.beta.save()
+
+        build_related()
+        incremental = sorted(RelatedProject.objects.values_list('project_id', 'rank', 'related_id'))
+        build_related(full=True)
+        full = sorted(RelatedProject.objects.values_list('project_id', 'rank', 'related_id'))
+
+        self.assertEqual(incremental, full)
+        self.assertEqual(related_titles(self.alpha), ['Epsilon', 'Gamma'])
+
+
+class NearestNeighboursTests(SimpleTestCase):
+    """
+    The candidate search against every pair scored exactly: a small
+    vocabulary makes most projects overlap, so the full scan fallback
+    runs too.
+    """
+
+    def random_features(self, seed, projects=300, techs=8, skills=5):
+        rng = random.Random(seed)
+        weights = [1.0] * (3 + techs) + [0.5] * skills
+        row_columns = []
+        for _ in range(projects):
+            columns = {rng.randrange(3)}
+            columns.update(3 + tech for tech in rng.sample(range(techs), rng.randint(0, 4)))
+            columns.update(3 + techs + skill for skill in rng.sample(range(skills), rng.choice([0, 0, 0, 1, 2])))
+            row_columns.append(tuple(sorted(columns)))
+        return row_columns, weights
+
+    def expected(self, row_columns, weights):
+        """Best rows per row by squared cosine as exact fractions, ties to the lower row."""
+        squared = [Fraction(weight) ** 2 for weight in weights]
+        norms = [sum(squared[column] for column in columns) for columns in row_columns]
+        expected = []
+        for row, columns in enumerate(row_columns):
+            scored = []
+            for other, other_columns in enumerate(row_columns):
+                overlap = sum(squared[column] for column in set(columns) & set(other_columns))
+                if other != row and overlap:
+                    scored.append((-overlap * overlap / (norms[row] * norms[other]), other))
+            expected.append([other for _, other in sorted(scored)[:RELATED_PROJECTS_COUNT]])
+        return expected
+
+    def assertMatchesExhaustiveSearch(self, row_columns, weights):
+        signatures = Signatures(row_columns, weights, [weight == 1.0 for weight in weights])
+        neighbours, scores = nearest_neighbours(signatures, np.arange(len(row_columns)))
+
+        found = [
+            [neighbour for neighbour, score in zip(row_neighbours, row_scores) if score > 0]
+            for row_neighbours, row_scores in zip(neighbours.tolist(), scores.tolist())
+        ]
+        self.assertEqual(found, self.expected(row_columns, weights))
+
+    def test_random_projects(self):
+        for seed in range(3):
+            with self.subTest(seed=seed):
+                self.assertMatchesExhaustiveSearch(*self.random_features(seed))
+
+    def test_subset_of_sources(self):
+        row_columns, weights = self.random_features(3)
+        signatures = Signatures(row_columns, weights, [weight == 1.0 for weight in weights])
+        sources = np.array([5, 17, 200], dtype=np.int64)
+
+        neighbours, scores = nearest_neighbours(signatures, sources)
+        all_neighbours, all_scores = nearest_neighbours(signatures, np.arange(len(row_columns)))
+
+        np.testing.assert_array_equal(neighbours, all_neighbours[sources])
+        np.testing.assert_array_equal(scores, all_scores[sources])
@@ -0,0 +1,85 @@
+from django.test import TestCase
+
+from portfolio.models import ContactMessage, Project
+from portfolio.search import message_search_filter, project_search_filter, search_projects
+
+
+def create_project(title, description='Descrizione', **fields):
+    return Project.objects.create(title=title, description=description, **fields)
+
+
+def found_titles(query):
+    hits = search_projects(query)
+    projects = Project.objects.in_bulk([pk for pk, rank, highlights in hits])
+    return [projects[pk].title for pk, rank, highlights in hits]
+
+
+class SearchProjectsTests(TestCase):
+
+    def test_title_match_ranks_above_description_match(self):
+        create_project('Gestionale magazzino', 'Inventario con scanner')
+        create_project('Sito vetrina', 'Con un piccolo gestionale integrato')
+        create_project('Blog personale')
+
+        self.assertEqual(found_titles('gestionale'), ['Gestionale magazzino', 'Sito vetrina'])
+
+    def test_every_word_or_prefix_must_match(self):
+        create_project('Dashboard Django', tech_stack=['Python'])
+        create_project('Dashboard React')
+
+        self.assertEqual(found_titles('dash djan'), ['Dashboard Django'])
+        self.assertEqual(found_titles('dashboard python'), ['Dashboard Django'])
+
+    def test_hidden_projects_are_not_found(self):
+        create_project('Progetto riservato', is_visible=False)
+
+        self.assertEqual(search_projects('riservato'), [])
+        self.assertTrue(Project.objects.filter(project_search_filter('riservato')).exists())
+
+    def test_matches_are_marked_and_the_rest_escaped(self):
+        create_project('Django <script> tool', 'Un pannello scritto con Django e HTMX')
+
+        (pk, rank, highlights), = search_projects('django')
+
+        self.assertEqual(highlights['title'], '<mark>Django</mark> &lt;script&gt; tool')
+        self.assertIn('<mark>Django</mark>', highlights['snippet'])
+        self.assertGreater(rank, 0)
+
+    def test_api_returns_the_highlights(self):
+        create_project('Portale prenotazioni')
+
+        response = self.client.get('/api/search/', {'q': 'prenot'})
+
+        result, = response.json()['results']
+        self.assertEqual(result['highlights']['title'], 'Portale <mark>prenotazioni</mark>')
+
+
+class SearchIndexTests(TestCase):
+
+    def test_save_reindexes_the_project(self):
+        project = create_project('Applicazione meteo')
+        project.title = 'Applicazione mappe'
+        project.save()
+
+        self.assertEqual(found_titles('meteo'), [])
+        self.assertEqual(found_titles('mappe'), ['Applicazione mappe'])
+
+    def test_delete_removes_the_project(self):
+        project = create_project('Applicazione meteo')
+        project.delete()
+
+        self.assertEqual(search_projects('meteo'), [])
+        self.assertFalse(Project.objects.filter(project_search_filter('meteo')).exists())
+
+    def test_contact_messages_follow_saves_and_deletes(self):
+        message = ContactMessage.objects.create(
+            name='Mario Rossi', email='mario@example.com', subject='Preventivo', message='Serve un sito'
+        )
+        self.assertEqual(ContactMessage.objects.filter(message_search_filter('preventivo mario')).get(), message)
+
+        message.subject = 'Collaborazione'
+        message.save()
+        self.assertFalse(ContactMessage.objects.filter(message_search_filter('preventivo')).exists())
+
+        message.delete()
+        self.assertFalse(ContactMessage.objects.filter(message_search_filter('collaborazione')).exists())
@@ -0,0 +1,109 @@
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TransactionTestCase, override_settings
+
+from portfolio.models import Project, SiteSettings
+from portfolio.sitemaps import ProjectSitemap
+
+
+NS = {'sm': 'http://www.sitemaps.org/schemas/sitemap/0.9'}
+INDEX_URL = '/sitemap.xml'
+
+
+def page_url(number, section='projects'):
+    return f'/sitemap-{section}-{number}.xml'
+
+
+def body(response):
+    return b''.join(response.streaming_content) if response.streaming else response.content
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+@mock.patch.object(ProjectSitemap, 'limit', 3)
+class SitemapTests(TransactionTestCase):
+    """Committed for real: edits bump the content generation on commit."""
+
+    def setUp(self):
+        cache.clear()
+        SiteSettings._cached = None
+        self.base = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+        self.projects = []
+        for i in range(7):
+            project = Project.objects.create(title=f'Progetto {i}', description='d')
+            # Newest edit in the middle of each page
+            Project.objects.filter(pk=project.pk).update(updated_at=self.base + timedelta(days=(i % 3 == 1) * 10 + i))
+            self.projects.append(project)
+        Project.objects.create(title='Nascosto', description='d', is_visible=False)
+
+    def index_entries(self):
+        response = self.client.get(INDEX_URL)
+        self.assertEqual(response.status_code, 200)
+        root = ET.fromstring(response.content)
+        return [
+            (entry.find('sm:loc', NS).text, getattr(entry.find('sm:lastmod', NS), 'text', None))
+            for entry in root.findall('sm:sitemap', NS)
+        ]
+
+    def page_locations(self, number, section='projects'):
+        response = self.client.get(page_url(number, section))
+        self.assertEqual(response.status_code, 200)
+        return [loc.text for loc in ET.fromstring(body(response)).findall('sm:url/sm:loc', NS)]
+
+    def test_index_lists_every_page_with_its_lastmod(self):
+        lastmods = [(self.base + timedelta(days=day)).isoformat() for day in (11, 14, 6)]
+
+        self.assertEqual(self.index_entries(), [
+            ('http://testserver' + page_url(1, 'static'), None),
+            ('http://testserver' + page_url(1), lastmods[0]),
+            ('http://testserver' + page_url(2), lastmods[1]),
+            ('http://testserver' + page_url(3), lastmods[2]),
+        ])
+
+    def test_pages_split_the_visible_projects(self):
+        pages = [self.page_locations(number) for number in (1, 2, 3)]
+
+        self.assertEqual(
+            pages,
+            [
+                ['http://testserver' + project.get_absolute_url() for project in self.projects[start:start + 3]]
+                for start in (0, 3, 6)
+            ]
+        )
+
+    def test_new_project_adds_a_page(self):
+        self.assertEqual(len(self.index_entries()), 4)
+        for i in range(3):
+            Project.objects.create(title=f'Nuovo {i}', description='d')
+
+        self.assertEqual(len(self.index_entries()), 5)
+
+    def test_page_cached_under_the_byte_cap(self):
+        self.page_locations(1)
+
+        self.assertFalse(self.client.get(page_url(1)).streaming)
+
+    @override_settings(SITEMAP_CACHE_MAX_BYTES=200)
+    def test_page_over_the_byte_cap_is_not_cached(self):
+        first = self.client.get(page_url(1))
+        second = self.client.get(page_url(1))
+
+        self.assertTrue(second.streaming)
+        self.assertEqual(body(second), body(first))
+
+    def test_conditional_get(self):
+        for url in (INDEX_URL, page_url(1)):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                body(response)
+                etag = response['ETag']
+                self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 304)
+                self.assertEqual(
+                    self.client.get(url, headers={'If-Modified-Since': response['Last-Modified']}).status_code, 304
+                )
+
+        etag = self.client.get(INDEX_URL)['ETag']
+        self.projects[0].save()
+        self.assertEqual(self.client.get(INDEX_URL, headers={'If-None-Match': etag}).status_code, 200)
@@ -0,0 +1,53 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from portfolio.models import Project
+
+
+def make_project(title, **fields):
+    return Project(title=title, description='Descrizione', **fields)
+
+
+class SlugAllocationTests(TestCase):
+
+    def test_first_free_suffix(self):
+        Project.objects.create(title='Alpha', description='d', slug='alpha')
+        Project.objects.create(title='Alpha', description='d', slug='alpha-1')
+
+        project = make_project('Alpha')
+        project.save()
+
+        self.assertEqual(project.slug, 'alpha-2')
+
+    def test_batch_gets_distinct_slugs(self):
+        Project.objects.create(title='Alpha', description='d', slug='alpha')
+        projects = [make_project('Alpha'), make_project('Alpha'), make_project('Beta')]
+
+        Project.allocate_slugs(projects)
+
+        self.assertEqual([p.slug for p in projects], ['alpha-1', 'alpha-2', 'beta'])
+
+    def test_bulk_create_allocates_slugs(self):
+        created = Project.objects.bulk_create([make_project('Gamma'), make_project('Gamma')])
+
+        self.assertEqual(sorted(p.slug for p in created), ['gamma', 'gamma-1'])
+
+    def test_save_retries_when_a_concurrent_insert_takes_the_slug(self):
+        allocate_slugs = Project.allocate_slugs.__func__
+        calls = []
+
+        def racing_allocate(cls, projects):
+            allocate_slugs(cls, projects)
+            calls.append(projects[0].slug)
+            if len(calls) == 1:
+                # Another request saves the same slug between our read and insert
+                Project.objects.create(title='Rival', description='d', slug=projects[0].slug)
+
+        project = make_project('Delta')
+        with mock.patch.object(Project, 'allocate_slugs', classmethod(racing_allocate)):
+            project.save()
+
+        self.assertEqual(calls, ['delta', 'delta-1'])
+        self.assertEqual(Project.objects.get(pk=project.pk).slug, 'delta-1')
+        self.assertEqual(Project.objects.filter(slug='delta').count(), 1)
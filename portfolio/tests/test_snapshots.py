@@ -0,0 +1,95 @@
+import gzip
+import json
+
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, TransactionTestCase, override_settings
+
+from portfolio.models import Project
+from portfolio.snapshots import SNAPSHOT_LOCK_KEY
+from portfolio.views import _encoded_json_response
+
+
+URL = '/api/projects/'
+
+
+def titles(response):
+    return [project['title'] for project in json.loads(response.content)['projects']]
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class CatalogSnapshotTests(TransactionTestCase):
+    """Committed for real: edits mark the snapshot stale on commit."""
+
+    def setUp(self):
+        cache.clear()
+        self.project = Project.objects.create(title='Alpha', description='d', category='backend', order=1)
+        Project.objects.create(title='Beta', description='d', category='frontend', order=2)
+
+    def test_rebuilt_after_a_project_change(self):
+        self.assertEqual(titles(self.client.get(URL)), ['Alpha', 'Beta'])
+        self.assertEqual(titles(self.client.get(URL, {'category': 'backend'})), ['Alpha'])
+
+        self.project.title = 'Alfa'
+        self.project.category = 'frontend'
+        self.project.save()
+
+        self.assertEqual(titles(self.client.get(URL)), ['Alfa', 'Beta'])
+        self.assertEqual(titles(self.client.get(URL, {'category': 'backend'})), [])
+        self.assertEqual(titles(self.client.get(URL, {'category': 'frontend'})), ['Alfa', 'Beta'])
+
+    def test_previous_snapshot_served_while_another_process_rebuilds(self):
+        self.client.get(URL)
+        self.project.title = 'Alfa'
+        self.project.save()
+
+        cache.add(SNAPSHOT_LOCK_KEY, True)
+        self.assertEqual(titles(self.client.get(URL)), ['Alpha', 'Beta'])
+
+        cache.delete(SNAPSHOT_LOCK_KEY)
+        self.assertEqual(titles(self.client.get(URL)), ['Alfa', 'Beta'])
+
+    def test_database_answers_before_the_first_snapshot_exists(self):
+        cache.add(SNAPSHOT_LOCK_KEY, True)
+
+        response = self.client.get(URL)
+
+        self.assertEqual(titles(response), ['Alpha', 'Beta'])
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_gzip_variant(self):
+        identity = self.client.get(URL).content
+        response = self.client.get(URL, headers={'Accept-Encoding': 'gzip, deflate'})
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), identity)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+
+class EncodingSelectionTests(SimpleTestCase):
+    variant = {'identity': b'identity', 'gzip': b'gzip', 'br': b'br'}
+
+    def encoding(self, accept_encoding, variant=None):
+        request = RequestFactory().get(URL, headers={'Accept-Encoding': accept_encoding} if accept_encoding else {})
+        response = _encoded_json_response(request, variant or self.variant)
+        self.assertEqual(response.content.decode(), response.get('Content-Encoding', 'identity'))
+        return response.get('Content-Encoding', 'identity')
+
+    def test_best_accepted_encoding(self):
+        cases = [
+            ('', 'identity'),
+            ('identity', 'identity'),
+            ('gzip, deflate', 'gzip'),
+            ('gzip, deflate, br', 'br'),
+            ('br;q=0.5, gzip', 'gzip'),
+            ('BR;Q=1, gzip;q=0.8', 'br'),
+            ('br;q=0, gzip;q=0', 'identity'),
+            ('*', 'br'),
+            ('*;q=0.1, gzip', 'gzip'),
+            ('gzip;q=oops, br;q=0', 'identity'),
+        ]
+        for accept_encoding, expected in cases:
+            with self.subTest(accept_encoding=accept_encoding):
+                self.assertEqual(self.encoding(accept_encoding), expected)
+
+    def test_brotli_not_installed(self):
+        self.assertEqual(self.encoding('br, gzip', {'identity': b'identity', 'gzip': b'gzip'}), 'gzip')
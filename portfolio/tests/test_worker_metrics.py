@@ -0,0 +1,62 @@
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+
+def run_without_django(code, **env):
+    """Run code in a fresh interpreter, like the Gunicorn master without preload_app."""
+    environ = {name: value for name, value in os.environ.items() if name != 'DJANGO_SETTINGS_MODULE'}
+    environ.update(env)
+    return subprocess.run(
+        [sys.executable, '-c', code],
+        cwd=settings.BASE_DIR,
+        env=environ,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+
+
+class WorkerMetricsTests(SimpleTestCase):
+
+    def setUp(self):
+        self.metrics_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.metrics_dir.cleanup)
+
+    def test_child_exit_hook_runs_without_django_settings(self):
+        result = run_without_django(
+            'from portfolio.worker_metrics import worker_exited\n'
+            'worker_exited(123456)\n'
+            'worker_exited(123457)\n'
+            'from prometheus_client import CollectorRegistry, multiprocess\n'
+            'registry = CollectorRegistry()\n'
+            'multiprocess.MultiProcessCollector(registry)\n'
+            'print(registry.get_sample_value("portfolio_worker_restarts_total"))\n',
+            PROMETHEUS_MULTIPROC_DIR=self.metrics_dir.name,
+        )
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), '2.0')
+
+    def test_config_cleans_stale_samples_once_per_master(self):
+        stale = Path(self.metrics_dir.name) / 'counter_1.db'
+        stale.write_bytes(b'')
+        result = run_without_django(
+            'import importlib, pathlib\n'
+            f'stale = pathlib.Path({str(stale)!r})\n'
+            'import gunicorn_config\n'
+            'print(stale.exists())\n'
+            'stale.write_bytes(b"")\n'
+            # A HUP re-reads the config in the same master
+            'importlib.reload(gunicorn_config)\n'
+            'print(stale.exists())\n',
+            PROMETHEUS_MULTIPROC_DIR=self.metrics_dir.name,
+        )
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.split(), ['False', 'True'])
@@ -16,8 +16,18 @@ urlpatterns = [
     path('project/<slug:slug>/', views.project_detail, name='project_detail'),
     
     # Contact form
+    path('contact/csrf/', views.contact_csrf, name='contact_csrf'),
     path('contact/submit/', views.contact_submit, name='contact_submit'),
     
     # API endpoints
     path('api/projects/', views.api_projects, name='api_projects'),
+    path('api/v2/projects/', views.api_projects_v2, name='api_projects_v2'),
+    path('api/search/', views.api_search, name='api_search'),
+    
+    # Sitemaps (index and one file per page of each section)
+    path('sitemap.xml', views.sitemap_index, name='sitemap_index'),
+    path('sitemap-<slug:section>-<int:page>.xml', views.sitemap_page, name='sitemap_page'),
+    
+    # Monitoring (Prometheus)
+    path('metrics', views.metrics, name='metrics'),
 ]
@@ -5,25 +5,119 @@ This module contains all views for the portfolio website,
 including homepage, project detail, and contact form handling.
 """
 
-from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
-from django.views.decorators.http import require_POST
-from django.core.mail import send_mail
+import hashlib
+from urllib.parse import quote, urlencode
+
+from asgiref.sync import sync_to_async
+from django.shortcuts import render
 from django.conf import settings
-from django.core.paginator import Paginator
+from django.core.cache import cache
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.http import condition, require_GET, require_POST
+from django.views.decorators.csrf import ensure_csrf_cookie
+from django.middleware.csrf import get_token
+from django.db import router, transaction
+from django.urls import reverse
 
+from .cache import (
+    PAGE_CACHE_TIMEOUT,
+    cache_public_page,
+    conditional_page,
+    get_content_generation,
+    get_last_change,
+    get_site_settings_version,
+    page_cache_key,
+)
+from .concurrency import gather_sections
+from .pagination import (
+    PROJECT_KEYSET_ORDERING,
+    InvalidCursor,
+    KeysetPaginator,
+    encode_cursor,
+    keyset_after,
+)
 from .models import (
     Project, 
+    GalleryImage,
+    Tech,
     Testimonial, 
     Skill, 
     TimelineEvent, 
     SiteSettings,
-    ContactMessage
+    RelatedProject,
+    ContactMessage,
+    OutboxEmail
 )
 from .forms import ContactForm
+from .metrics import CONTACT_SUBMISSIONS, render_latest
+from .ratelimit import check_contact_rate
+from .routers import replica_reads
+from .search import search_projects
+from .sitemaps import render_index, sitemap_pages, stream_page
+from .snapshots import ALL_CATEGORIES, get_catalog_variant, serialize_project
+
+
+# Projects shown per page of the projects list
+PROJECTS_PER_PAGE = 9
+
+# Addresses of scrapers running on the server itself
+LOCAL_ADDRESSES = ('127.0.0.1', '::1')
+
+
+def listing_projects(category=None, tech=None):
+    """Visible projects of the projects list, filtered, in keyset order."""
+    projects = Project.objects.filter(is_visible=True).order_by(*PROJECT_KEYSET_ORDERING)
+    if category:
+        projects = projects.filter(category=category)
+    if tech:
+        projects = projects.filter(techs__name=tech)
+    return projects
+
+
+def listing_query(**params):
+    """Query string of a projects list URL, encoded like the template links."""
+    return urlencode({name: value for name, value in params.items() if value}, quote_via=quote)
+
 
+def content_validators(request, *args, **kwargs):
+    """
+    Validators of the pages built from all content (homepage, projects
+    list): every edit bumps the content generation or the SiteSettings
+    version and records the time, all read from the cache.
+    """
+    return f'{get_content_generation()}-{get_site_settings_version()}', get_last_change()
+
+
+def project_detail_validators(request, slug):
+    """
+    Validators of a project page: the project, the related projects it
+    shows and the SiteSettings version, in one query. None for a missing
+    project.
+    """
+    rows = list(
+        Project.objects.filter(slug=slug, is_visible=True)
+        .order_by('related_links__rank')
+        .values_list(
+            'updated_at',
+            'related_links__related_id',
+            'related_links__related__updated_at',
+            'related_links__related__is_visible',
+        )
+    )
+    if not rows:
+        return None
+    updated_at = rows[0][0]
+    related = [(pk, related_updated_at) for _, pk, related_updated_at, is_visible in rows if is_visible]
+    raw = f'{updated_at.isoformat()}|{related}|{get_site_settings_version()}'.encode('utf-8')
+    last_modified = max([updated_at] + [related_updated_at for _, related_updated_at in related])
+    return hashlib.sha256(raw).hexdigest()[:32], last_modified.timestamp()
 
-def index(request):
+
+@replica_reads
+@conditional_page(content_validators)
+@cache_public_page
+async def index(request):
     """
     Homepage view.
     
@@ -37,31 +131,33 @@ def index(request):
     - Stats
     - Work process
     - Contact CTA
+    
+    The sections don't depend on each other and are fetched concurrently.
     """
-    # Get site settings
-    site_settings = SiteSettings.get_settings()
-    
-    # Get featured project for hero showcase
-    featured_project = Project.objects.filter(
-        featured=True, 
-        is_visible=True
-    ).first()
-    
-    # Get all visible projects
-    projects = Project.objects.filter(is_visible=True).order_by('order', '-created_at')
-    
-    # Get unique tech stack for filters
-    all_tech = set()
-    for project in projects:
-        for tech in project.tech_stack_list:
-            all_tech.add(tech)
-    tech_filters = sorted(list(all_tech))
-    
-    # Get testimonials
-    testimonials = Testimonial.objects.filter(is_visible=True).order_by('order')
-    
-    # Get skills grouped by category
-    skills = Skill.objects.filter(is_visible=True).order_by('category', 'order')
+    (
+        site_settings,
+        featured_project,
+        projects,
+        tech_filters,
+        testimonials,
+        skills,
+        timeline_events,
+    ) = await gather_sections(
+        SiteSettings.get_settings,
+        # Featured project for hero showcase
+        Project.objects.filter(featured=True, is_visible=True).first,
+        # All visible projects
+        lambda: list(Project.objects.filter(is_visible=True).order_by('order', '-created_at')),
+        # Unique tech stack for filters
+        Tech.filter_names,
+        lambda: list(
+            Testimonial.objects.filter(is_visible=True).select_related('project').order_by('order')
+        ),
+        lambda: list(Skill.objects.filter(is_visible=True).order_by('category', 'order')),
+        lambda: list(TimelineEvent.objects.filter(is_visible=True).order_by('order')),
+    )
+    
+    # Group skills by category
     skills_by_category = {}
     for skill in skills:
         category = skill.get_category_display()
@@ -69,9 +165,6 @@ def index(request):
             skills_by_category[category] = []
         skills_by_category[category].append(skill)
     
-    # Get timeline events
-    timeline_events = TimelineEvent.objects.filter(is_visible=True).order_by('order')
-    
     # Contact form
     contact_form = ContactForm()
     
@@ -86,76 +179,102 @@ def index(request):
         'contact_form': contact_form,
     }
     
-    return render(request, 'portfolio/index.html', context)
+    return await sync_to_async(render)(request, 'portfolio/index.html', context)
 
 
-def project_detail(request, slug):
+@replica_reads
+@conditional_page(project_detail_validators)
+@cache_public_page
+async def project_detail(request, slug):
     """
     Project detail view.
     
     Renders a detailed case study page for a single project,
     including full description, gallery, and related projects.
-    """
-    project = get_object_or_404(Project, slug=slug, is_visible=True)
-    
-    # Get related projects (same category, excluding current)
-    related_projects = Project.objects.filter(
-        category=project.category,
-        is_visible=True
-    ).exclude(pk=project.pk).order_by('order')[:3]
     
-    # Get site settings for navigation
-    site_settings = SiteSettings.get_settings()
+    Gallery and related projects are looked up by slug, so they are
+    fetched concurrently with the project itself.
+    """
+    visible = Project.objects.filter(is_visible=True)
+    project, gallery_images, related_projects, site_settings = await gather_sections(
+        visible.filter(slug=slug).first,
+        lambda: list(GalleryImage.objects.filter(project__slug=slug, project__is_visible=True)),
+        # Related projects, precomputed by manage.py build_related
+        lambda: [
+            link.related for link in RelatedProject.objects.filter(
+                project__slug=slug, related__is_visible=True
+            ).select_related('related').order_by('rank')
+        ],
+        # Site settings for navigation
+        SiteSettings.get_settings,
+    )
+    if project is None:
+        raise Http404('No Project matches the given query.')
     
     context = {
         'project': project,
+        'gallery_images': gallery_images,
         'related_projects': related_projects,
         'site_settings': site_settings,
     }
     
-    return render(request, 'portfolio/project_detail.html', context)
+    return await sync_to_async(render)(request, 'portfolio/project_detail.html', context)
 
 
-def projects_list(request):
+@replica_reads
+@conditional_page(content_validators)
+@cache_public_page
+async def projects_list(request):
     """
     All projects list view with filtering and pagination.
-    """
-    projects = Project.objects.filter(is_visible=True).order_by('order', '-created_at')
     
-    # Filter by category
+    Pages are fetched by keyset with a cached count per filter, so the
+    last page costs the same as the first. The page, the tech filters and
+    the site settings are fetched concurrently.
+    """
     category = request.GET.get('category')
-    if category:
-        projects = projects.filter(category=category)
-    
-    # Filter by tech
     tech = request.GET.get('tech')
-    if tech:
-        projects = projects.filter(tech_stack__contains=tech)
+    
+    # Keep the active filters in the pagination links
+    filter_query = listing_query(category=category, tech=tech)
     
     # Pagination
-    paginator = Paginator(projects, 9)  # 9 projects per page
     page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
     
-    # Get unique tech stack for filters
-    all_projects = Project.objects.filter(is_visible=True)
-    all_tech = set()
-    for project in all_projects:
-        for t in project.tech_stack_list:
-            all_tech.add(t)
-    tech_filters = sorted(list(all_tech))
+    def get_page():
+        paginator = KeysetPaginator(listing_projects(category, tech), PROJECTS_PER_PAGE, filter_query)
+        return paginator.get_page(page_number)
     
-    site_settings = SiteSettings.get_settings()
+    page_obj, tech_filters, site_settings = await gather_sections(
+        get_page,
+        # Unique tech stack for filters
+        Tech.filter_names,
+        SiteSettings.get_settings,
+    )
     
     context = {
         'projects': page_obj,
+        'page_numbers': page_obj.paginator.page_window(page_obj.number),
         'tech_filters': tech_filters,
         'current_category': category,
         'current_tech': tech,
+        'filter_query': filter_query + '&' if filter_query else '',
         'site_settings': site_settings,
     }
     
-    return render(request, 'portfolio/projects_list.html', context)
+    return await sync_to_async(render)(request, 'portfolio/projects_list.html', context)
+
+
+@require_GET
+@ensure_csrf_cookie
+def contact_csrf(request):
+    """
+    Return a CSRF token for the contact form.
+    
+    Cached pages embed a token that belongs to another visitor, so the
+    form script fetches a fresh one (and its cookie) before submitting.
+    """
+    return JsonResponse({'csrfToken': get_token(request)})
 
 
 @require_POST
@@ -163,50 +282,42 @@ def contact_submit(request):
     """
     Handle contact form submission.
     
-    Validates form, saves message to database, and sends email notification.
-    Returns JSON response for AJAX handling.
+    Validates form, saves message to database, and queues the email
+    notification in the outbox. Returns JSON response for AJAX handling.
+    
+    Floods are rejected by the rate limiter before the form is even built.
     """
+    retry_after = check_contact_rate(request)
+    if retry_after:
+        CONTACT_SUBMISSIONS.labels('rate_limited').inc()
+        response = JsonResponse({
+            'success': False,
+            'errors': {'__all__': ['Troppi messaggi inviati. Riprova più tardi.']}
+        }, status=429)
+        response['Retry-After'] = str(retry_after)
+        return response
+    
     form = ContactForm(request.POST)
     
     if form.is_valid():
-        # Save to database
-        message = ContactMessage.objects.create(
-            name=form.cleaned_data['name'],
-            email=form.cleaned_data['email'],
-            subject=form.cleaned_data.get('subject', ''),
-            message=form.cleaned_data['message']
-        )
-        
-        # Send email notification
-        try:
-            subject = f"[Portfolio] Nuovo messaggio da {form.cleaned_data['name']}"
-            email_message = f"""
-Nuovo messaggio dal portfolio:
-
-Nome: {form.cleaned_data['name']}
-Email: {form.cleaned_data['email']}
-Oggetto: {form.cleaned_data.get('subject', 'Nessun oggetto')}
-
-Messaggio:
-{form.cleaned_data['message']}
-            """
-            
-            send_mail(
-                subject,
-                email_message,
-                settings.DEFAULT_FROM_EMAIL,
-                [settings.CONTACT_EMAIL],
-                fail_silently=True,
+        # Save to database and queue the email notification together;
+        # the send_outbox command delivers it outside the request
+        with transaction.atomic():
+            message = ContactMessage.objects.create(
+                name=form.cleaned_data['name'],
+                email=form.cleaned_data['email'],
+                subject=form.cleaned_data.get('subject', ''),
+                message=form.cleaned_data['message']
             )
-        except Exception as e:
-            # Log error but don't fail the request
-            pass
+            OutboxEmail.for_contact_message(message)
         
+        CONTACT_SUBMISSIONS.labels('accepted').inc()
         return JsonResponse({
             'success': True,
             'message': 'Grazie per il tuo messaggio! Ti risponderò presto.'
         })
     else:
+        CONTACT_SUBMISSIONS.labels('invalid').inc()
         return JsonResponse({
             'success': False,
             'errors': form.errors
@@ -224,36 +335,296 @@ def custom_500(request):
 
 
 # API Views (for potential AJAX usage)
-def api_projects(request):
+@replica_reads
+async def api_projects(request):
     """
     API endpoint to get projects as JSON.
     Useful for dynamic filtering without page reload.
+    
+    Calls without a tech filter are answered from the pre-encoded catalog
+    snapshot without touching the ORM or the JSON encoder.
     """
+    tech = request.GET.get('tech')
+    category = request.GET.get('category')
+    if not tech:
+        variant = await sync_to_async(get_catalog_variant)(category or ALL_CATEGORIES)
+        if variant is not None:
+            return _encoded_json_response(request, variant)
+    
     projects = Project.objects.filter(is_visible=True).order_by('order')
     
     # Filter by tech if provided
-    tech = request.GET.get('tech')
     if tech:
-        projects = projects.filter(tech_stack__contains=tech)
+        projects = projects.filter(techs__name=tech)
     
     # Filter by category
+    if category:
+        projects = projects.filter(category=category)
+    
+    data = [serialize_project(project) async for project in projects]
+    
+    return JsonResponse({'projects': data})
+
+
+def _accepted_encodings(header):
+    """{content-coding: q-value} of an Accept-Encoding header."""
+    accepted = {}
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def _encoded_json_response(request, variant):
+    """Serve pre-encoded JSON, picking the best encoding the client accepts."""
+    accepted = _accepted_encodings(request.headers.get('Accept-Encoding', ''))
+    encoding = 'identity'
+    best = 0.0
+    # Preference order on equal q-values; q=0 means "not acceptable"
+    for candidate in ('br', 'gzip'):
+        quality = accepted.get(candidate, accepted.get('*', 0.0))
+        if candidate in variant and quality > best:
+            encoding, best = candidate, quality
+    
+    response = HttpResponse(variant[encoding], content_type='application/json')
+    if encoding != 'identity':
+        response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+# Public fields of API v2 and the database columns each one needs
+API_V2_FIELDS = {
+    'id': ('id',),
+    'title': ('title',),
+    'slug': ('slug',),
+    'description': ('description',),
+    'thumbnail': ('image_thumbnail',),
+    'tech_stack': ('tech_stack',),
+    'category': ('category',),
+    'external_url': ('external_url',),
+    'github_url': ('github_url',),
+    'detail_url': ('slug',),
+    'featured': ('featured',),
+    'created_at': ('created_at',),
+    'updated_at': ('updated_at',),
+}
+API_V2_DEFAULT_FIELDS = (
+    'id', 'title', 'slug', 'description', 'thumbnail',
+    'tech_stack', 'category', 'external_url', 'detail_url', 'featured',
+)
+API_V2_DEFAULT_LIMIT = 20
+API_V2_MAX_LIMIT = 100
+
+
+def _api_v2_etag(request):
+    """
+    Strong ETag for API v2: the body only depends on the query string and
+    the content generation, so it can be computed without touching the DB.
+    """
+    params = sorted(request.GET.lists())
+    raw = f"{get_content_generation()}|{params}".encode('utf-8')
+    return hashlib.sha256(raw).hexdigest()[:32]
+
+
+@replica_reads
+@require_GET
+@condition(etag_func=_api_v2_etag)
+def api_projects_v2(request):
+    """
+    Versioned projects API.
+    
+    Query parameters:
+    - fields: comma-separated list of fields to return (projection in SQL)
+    - cursor: opaque token from the previous page's next_cursor
+    - limit: page size (max 100)
+    - category, tech: filters
+    """
+    requested = request.GET.get('fields')
+    fields = [f.strip() for f in requested.split(',') if f.strip()] if requested else list(API_V2_DEFAULT_FIELDS)
+    unknown = [f for f in fields if f not in API_V2_FIELDS]
+    if unknown:
+        return JsonResponse({'error': f"Campi non validi: {', '.join(unknown)}"}, status=400)
+    
+    try:
+        limit = min(max(int(request.GET.get('limit', API_V2_DEFAULT_LIMIT)), 1), API_V2_MAX_LIMIT)
+    except ValueError:
+        return JsonResponse({'error': 'Parametro limit non valido'}, status=400)
+    
+    projects = Project.objects.filter(is_visible=True).order_by(*PROJECT_KEYSET_ORDERING)
+    
     category = request.GET.get('category')
     if category:
         projects = projects.filter(category=category)
     
+    tech = request.GET.get('tech')
+    if tech:
+        projects = projects.filter(techs__name=tech)
+    
+    cursor = request.GET.get('cursor')
+    if cursor:
+        try:
+            projects = keyset_after(projects, cursor)
+        except InvalidCursor as exc:
+            return JsonResponse({'error': str(exc)}, status=400)
+    
+    # Only the requested columns plus the keyset columns are selected
+    columns = {'order', 'created_at', 'id'}
+    for field in fields:
+        columns.update(API_V2_FIELDS[field])
+    rows = list(projects.values(*columns)[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    
+    # Resolve the storage and the detail URL prefix once, not per row
+    storage = Project._meta.get_field('image_thumbnail').storage
+    detail_url = reverse('portfolio:project_detail', kwargs={'slug': 'slug'})[:-len('slug/')]
+    
     data = []
-    for project in projects:
-        data.append({
-            'id': project.id,
-            'title': project.title,
-            'slug': project.slug,
-            'description': project.description,
-            'thumbnail': project.image_thumbnail.url if project.image_thumbnail else '',
-            'tech_stack': project.tech_stack_list,
-            'category': project.category,
-            'external_url': project.external_url,
-            'detail_url': project.get_absolute_url(),
-            'featured': project.featured,
+    for row in rows:
+        item = {}
+        for field in fields:
+            if field == 'thumbnail':
+                item[field] = storage.url(row['image_thumbnail']) if row['image_thumbnail'] else ''
+            elif field == 'detail_url':
+                item[field] = f"{detail_url}{row['slug']}/"
+            elif field == 'tech_stack':
+                item[field] = Project.normalize_tech_stack(row['tech_stack'])
+            else:
+                item[field] = row[field]
+        data.append(item)
+    
+    return JsonResponse({
+        'projects': data,
+        'next_cursor': encode_cursor(rows[-1]) if has_more else None,
+    })
+
+
+@replica_reads
+@require_GET
+def api_search(request):
+    """
+    Full-text project search.
+    
+    Returns the visible projects matching ?q=, ranked, with the matched
+    terms wrapped in <mark> in the title and in a content snippet.
+    """
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = min(max(int(request.GET.get('limit', 20)), 1), 50)
+    except ValueError:
+        limit = 20
+    
+    hits = search_projects(query, limit) if query else []
+    projects = Project.objects.in_bulk([pk for pk, rank, highlights in hits])
+    
+    results = []
+    for pk, rank, highlights in hits:
+        project = projects.get(pk)
+        if project is None:
+            continue
+        results.append({
+            **serialize_project(project),
+            'rank': float(rank),
+            'highlights': highlights,
         })
     
-    return JsonResponse({'projects': data})
+    return JsonResponse({'query': query, 'results': results})
+
+
+def _cached_sitemap(request, generation):
+    if not getattr(settings, 'PAGE_CACHE_ENABLED', True):
+        return None, None
+    key = page_cache_key(request, generation)
+    content = cache.get(key)
+    if content is None:
+        return key, None
+    return key, HttpResponse(content, content_type='application/xml')
+
+
+def _caching_stream(chunks, key):
+    """
+    Pass the chunks through, then cache the whole page once it is complete.
+    A page over SITEMAP_CACHE_MAX_BYTES stops being buffered and is not
+    cached, so a worker never holds more than that in memory.
+    """
+    limit = getattr(settings, 'SITEMAP_CACHE_MAX_BYTES', 1024 * 1024)
+    written = [] if key else None
+    size = 0
+    for chunk in chunks:
+        if written is not None:
+            size += len(chunk)
+            if size > limit:
+                written = None
+            else:
+                written.append(chunk)
+        yield chunk
+    if written is not None:
+        cache.set(key, b''.join(written), PAGE_CACHE_TIMEOUT)
+
+
+@replica_reads
+@require_GET
+@conditional_page(content_validators)
+def sitemap_index(request):
+    """Sitemap index with one entry (and lastmod) per sitemap page."""
+    generation = get_content_generation()
+    key, response = _cached_sitemap(request, generation)
+    if response is not None:
+        return response
+    
+    content = render_index(sitemap_pages(generation), f'{request.scheme}://{request.get_host()}')
+    if key:
+        cache.set(key, content, PAGE_CACHE_TIMEOUT)
+    return HttpResponse(content, content_type='application/xml')
+
+
+@replica_reads
+@require_GET
+@conditional_page(content_validators)
+def sitemap_page(request, section, page):
+    """One page of a sitemap section, streamed from the database on a cache miss."""
+    generation = get_content_generation()
+    key, response = _cached_sitemap(request, generation)
+    if response is not None:
+        return response
+    
+    pages = sitemap_pages(generation)
+    if (section, page) not in pages:
+        raise Http404('Pagina della sitemap inesistente')
+    start = pages[section, page][0]
+    # The stream is consumed after the view returns: pin the database now
+    chunks = stream_page(
+        section, start, f'{request.scheme}://{request.get_host()}', router.db_for_read(Project)
+    )
+    return StreamingHttpResponse(_caching_stream(chunks, key), content_type='application/xml')
+
+
+@require_GET
+def metrics(request):
+    """
+    Prometheus metrics of every Gunicorn worker, in text format.
+    
+    Served to scrapers on the server itself (direct connection to
+    Gunicorn, not proxied by nginx) and to logged-in staff.
+    """
+    is_local = (
+        request.META.get('REMOTE_ADDR') in LOCAL_ADDRESSES
+        and 'HTTP_X_FORWARDED_FOR' not in request.META
+    )
+    if not (is_local or request.user.is_staff):
+        return HttpResponse(status=403)
+    
+    body, content_type = render_latest()
+    return HttpResponse(body, content_type=content_type)
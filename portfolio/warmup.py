@@ -0,0 +1,93 @@
+"""
+Process Warmup
+
+Work every process would otherwise do on its first requests: compiling
+the public templates into the cached template loader and building the
+URL resolver (patterns, reverse lookups). Gunicorn runs it once in the
+master with preload_app, so forked workers start warm and share these
+objects copy-on-write; without preloading each worker runs it before
+accepting requests.
+"""
+
+import time
+from pathlib import Path
+
+from django.db import connections
+from django.template import engines
+from django.template.utils import get_app_template_dirs
+from django.urls import URLResolver, get_resolver, reverse
+
+
+# Templates compiled by warm_up(), besides portfolio/*.html
+WARMUP_TEMPLATES = ['base.html', '404.html', '500.html']
+
+
+def template_names():
+    """Names of the templates to compile: WARMUP_TEMPLATES and portfolio/*.html."""
+    engine = engines['django'].engine
+    names = set(WARMUP_TEMPLATES)
+    for directory in list(engine.dirs) + list(get_app_template_dirs('templates')):
+        names.update(
+            path.relative_to(directory).as_posix()
+            for path in Path(directory).glob('portfolio/*.html')
+        )
+    return sorted(names)
+
+
+def _compile_patterns(resolver):
+    """Compile the regex of every URL pattern (compiled lazily on first match)."""
+    count = 0
+    for pattern in resolver.url_patterns:
+        pattern.pattern.regex  # compiled and cached on first access
+        count += 1
+        if isinstance(pattern, URLResolver):
+            count += _compile_patterns(pattern)
+    return count
+
+
+def warm_up():
+    """
+    Compile the templates and build the URL resolver. Returns
+    (templates compiled, URL patterns compiled, seconds).
+    """
+    started = time.monotonic()
+    engine = engines['django']
+    names = template_names()
+    for name in names:
+        engine.get_template(name)
+
+    resolver = get_resolver()
+    patterns = _compile_patterns(resolver)
+    # Builds the reverse and namespace dictionaries
+    reverse('portfolio:index')
+
+    # Nothing here should query, but a forked worker must never inherit
+    # an open connection
+    connections.close_all()
+    return len(names), patterns, time.monotonic() - started
+
+
+def memory_usage():
+    """
+    Memory of the current process in KiB from /proc/self/smaps_rollup:
+    rss, pss (shared pages divided among the processes sharing them),
+    shared and private. Empty where /proc is not available.
+    """
+    fields = {
+        'Rss': 'rss',
+        'Pss': 'pss',
+        'Shared_Clean': 'shared',
+        'Shared_Dirty': 'shared',
+        'Private_Clean': 'private',
+        'Private_Dirty': 'private',
+    }
+    usage = {}
+    try:
+        with open('/proc/self/smaps_rollup') as rollup:
+            for line in rollup:
+                name, _, value = line.partition(':')
+                if name in fields:
+                    usage[fields[name]] = usage.get(fields[name], 0) + int(value.split()[0])
+    except OSError:
+        return {}
+    return usage
@@ -0,0 +1,24 @@
+"""
+Worker Restart Metrics
+
+Called from the Gunicorn master (child_exit hook), where Django is not
+configured without preload_app: this module must only depend on
+prometheus_client, never on Django settings or the rest of the app.
+"""
+
+import os
+
+from prometheus_client import Counter, multiprocess
+
+
+WORKER_RESTARTS = Counter(
+    'portfolio_worker_restarts_total',
+    'Gunicorn workers that exited and were replaced'
+)
+
+
+def worker_exited(pid):
+    """Gunicorn child_exit hook: count the restart and drop the worker's live gauges."""
+    WORKER_RESTARTS.inc()
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid)
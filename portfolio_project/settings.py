@@ -40,6 +40,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'portfolio.metrics.MetricsMiddleware',  # Prometheus metrics on /metrics
+    'portfolio.instrumentation.ServerTimingMiddleware',  # Only active with SERVER_TIMING_ENABLED
+    'portfolio.routers.ReplicaRoutingMiddleware',  # Public views read from the replica
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Static files serving
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -74,17 +77,56 @@ WSGI_APPLICATION = 'portfolio_project.wsgi.application'
 
 # Database
 # Usa PostgreSQL se DB_NAME è impostato, altrimenti SQLite per sviluppo
+
+# Threads (and database connections) per worker that async views use to
+# run the independent queries of a page in parallel
+CONCURRENT_QUERY_THREADS = int(os.environ.get('CONCURRENT_QUERY_THREADS', 8))
+
+# Gunicorn workers (exported by gunicorn_config.py; 1 under runserver)
+GUNICORN_WORKERS = int(os.environ.get('GUNICORN_WORKERS', 1))
+
+# Alias of the read-only replica (None when not configured)
+DATABASE_REPLICA = None
+
 if os.environ.get('DB_NAME'):
-    DATABASES = {
-        'default': {
+    # Per-process connection pool (psycopg 3): at most one connection per
+    # worker thread, without exceeding DB_MAX_CONNECTIONS across all workers
+    DB_POOL_SIZE = max(2, min(
+        CONCURRENT_QUERY_THREADS + 1,
+        int(os.environ.get('DB_MAX_CONNECTIONS', 80)) // GUNICORN_WORKERS
+    ))
+    
+    def postgres_database(host, port, name):
+        return {
             'ENGINE': 'django.db.backends.postgresql',
-            'NAME': os.environ.get('DB_NAME'),
+            'NAME': name,
             'USER': os.environ.get('DB_USER', 'postgres'),
             'PASSWORD': os.environ.get('DB_PASSWORD', ''),
-            'HOST': os.environ.get('DB_HOST', 'localhost'),
-            'PORT': os.environ.get('DB_PORT', '5432'),
+            'HOST': host,
+            'PORT': port,
+            'OPTIONS': {
+                'pool': {'min_size': 1, 'max_size': DB_POOL_SIZE, 'timeout': 10},
+            },
         }
+    
+    DATABASES = {
+        'default': postgres_database(
+            os.environ.get('DB_HOST', 'localhost'),
+            os.environ.get('DB_PORT', '5432'),
+            os.environ.get('DB_NAME'),
+        )
     }
+    # Streaming replica (or a second local database for testing)
+    if os.environ.get('DB_REPLICA_HOST') or os.environ.get('DB_REPLICA_NAME'):
+        DATABASE_REPLICA = 'replica'
+        DATABASES['replica'] = {
+            **postgres_database(
+                os.environ.get('DB_REPLICA_HOST', DATABASES['default']['HOST']),
+                os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+                os.environ.get('DB_REPLICA_NAME', DATABASES['default']['NAME']),
+            ),
+            'TEST': {'MIRROR': 'default'},
+        }
 else:
     # SQLite per sviluppo locale
     DATABASES = {
@@ -93,6 +135,24 @@ else:
             'NAME': BASE_DIR / 'db.sqlite3',
         }
     }
+    # To try the replica locally: a copy of the database file
+    if os.environ.get('SQLITE_REPLICA_PATH'):
+        DATABASE_REPLICA = 'replica'
+        DATABASES['replica'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / os.environ['SQLITE_REPLICA_PATH'],
+            'TEST': {'MIRROR': 'default'},
+        }
+
+DATABASE_ROUTERS = ['portfolio.routers.ReplicaRouter']
+
+# After a content edit (and for whoever made it) reads stay on the primary
+# for this many seconds, while the replica catches up
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 10))
+
+
+# Text search configuration for PostgreSQL full-text search (SQLite uses FTS5)
+SEARCH_TS_CONFIG = os.environ.get('SEARCH_TS_CONFIG', 'italian')
 
 
 # Password validation
@@ -140,6 +200,51 @@ else:
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Widths (px) of the WebP/AVIF variants generated when an image is uploaded
+RESPONSIVE_IMAGE_WIDTHS = (320, 640, 960, 1280, 1920)
+
+
+# Cache
+# The backend must be shared between Gunicorn workers (file or Redis),
+# otherwise invalidation after an admin edit stays local to one worker.
+# E.g. Redis: CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+#            CACHE_LOCATION=redis://127.0.0.1:6379/1
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', str(BASE_DIR / '.cache')),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 10000)),
+        },
+    }
+}
+
+# Full-page cache for anonymous visitors (invalidated on every content edit)
+PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE_ENABLED', 'True') == 'True'
+PAGE_CACHE_TIMEOUT = int(os.environ.get('PAGE_CACHE_TIMEOUT', 60 * 60))
+
+# Cached template fragments ({% cached_fragment %}), keyed on the rows they
+# render: the timeout only bounds how long unused entries linger
+FRAGMENT_CACHE_TIMEOUT = int(os.environ.get('FRAGMENT_CACHE_TIMEOUT', 24 * 60 * 60))
+
+# URLs per sitemap page listed by the /sitemap.xml index (protocol limit: 50,000)
+SITEMAP_PAGE_SIZE = int(os.environ.get('SITEMAP_PAGE_SIZE', 10000))
+# Largest streamed sitemap page kept in the cache (memcached rejects items over 1 MB)
+SITEMAP_CACHE_MAX_BYTES = int(os.environ.get('SITEMAP_CACHE_MAX_BYTES', 1024 * 1024))
+
+# Seconds a worker trusts its in-memory SiteSettings before re-checking the version
+SITE_SETTINGS_CACHE_TTL = int(os.environ.get('SITE_SETTINGS_CACHE_TTL', 5))
+
+# Server-Timing header and per-request log (logs/performance.log) for a
+# sampled share of requests: the default 0.05 measures 5%
+SERVER_TIMING_ENABLED = os.environ.get('SERVER_TIMING_ENABLED', 'False') == 'True'
+SERVER_TIMING_SAMPLE_RATE = float(os.environ.get('SERVER_TIMING_SAMPLE_RATE', 0.05))
+
+# Public pages pre-rendered by `manage.py prerender` and served by nginx
+PRERENDER_ROOT = Path(os.environ.get('PRERENDER_ROOT', BASE_DIR / 'prerendered'))
+# Scheme and host of the absolute URLs in the pre-rendered pages
+PRERENDER_BASE_URL = os.environ.get('PRERENDER_BASE_URL', 'http://localhost:8000')
+
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -157,6 +262,23 @@ EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'  # Development
 DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'noreply@luigimeli.work')
 CONTACT_EMAIL = os.environ.get('CONTACT_EMAIL', 'info@luigimeli.work')
 
+# Contact outbox (delivered by `python manage.py send_outbox --loop`)
+# When a pass finds at least N queued emails they are merged into one digest (0 = disabled)
+CONTACT_DIGEST_THRESHOLD = int(os.environ.get('CONTACT_DIGEST_THRESHOLD', 0))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 8))
+OUTBOX_RETRY_BASE_DELAY = int(os.environ.get('OUTBOX_RETRY_BASE_DELAY', 30))  # seconds
+OUTBOX_LEASE = int(os.environ.get('OUTBOX_LEASE', 300))  # seconds a claimed email stays reserved
+
+# Contact form flood protection (token buckets shared between workers through the cache)
+CONTACT_RATELIMIT = {
+    'ENABLED': os.environ.get('CONTACT_RATELIMIT_ENABLED', 'True') == 'True',
+    'IP_CAPACITY': 5,
+    'IP_REFILL_SECONDS': 120,
+    'GLOBAL_CAPACITY': 60,
+    'GLOBAL_REFILL_SECONDS': 2,
+    'TRUST_X_FORWARDED_FOR': True,
+}
+
 
 # Security Settings for Production
 if not DEBUG:
@@ -199,6 +321,10 @@ LOGGING = {
             'format': '{levelname} {asctime} {module} {message}',
             'style': '{',
         },
+        'timestamped': {
+            'format': '{asctime} {message}',
+            'style': '{',
+        },
     },
     'handlers': {
         'file': {
@@ -211,6 +337,12 @@ LOGGING = {
             'class': 'logging.StreamHandler',
             'formatter': 'verbose',
         },
+        'performance': {
+            'level': 'INFO',
+            'class': 'logging.FileHandler',
+            'filename': BASE_DIR / 'logs' / 'performance.log',
+            'formatter': 'timestamped',
+        },
     },
     'loggers': {
         'django': {
@@ -218,6 +350,11 @@ LOGGING = {
             'level': 'INFO',
             'propagate': True,
         },
+        'portfolio.performance': {
+            'handlers': ['performance'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
 
@@ -159,6 +159,66 @@ RestartSec=3
 WantedBy=multi-user.target
 EOF
 
+# Worker che invia le email del form contatti dalla outbox
+sudo tee /etc/systemd/system/portfolio-outbox.service > /dev/null <<EOF
+[Unit]
+Description=Portfolio contact outbox sender
+After=network.target
+
+[Service]
+User=$APP_USER
+Group=$APP_USER
+WorkingDirectory=$APP_DIR
+Environment="PATH=$VENV_DIR/bin"
+ExecStart=$VENV_DIR/bin/python manage.py send_outbox --loop
+
+Restart=always
+RestartSec=10
+
+[Install]
+WantedBy=multi-user.target
+EOF
+
+# Worker che mantiene aggiornate le pagine pre-renderizzate (prerendered/)
+sudo tee /etc/systemd/system/portfolio-prerender.service > /dev/null <<EOF
+[Unit]
+Description=Portfolio static page pre-rendering
+After=network.target
+
+[Service]
+User=$APP_USER
+Group=$APP_USER
+WorkingDirectory=$APP_DIR
+Environment="PATH=$VENV_DIR/bin"
+ExecStart=$VENV_DIR/bin/python manage.py prerender --all --loop
+
+Restart=always
+RestartSec=10
+
+[Install]
+WantedBy=multi-user.target
+EOF
+
+# Worker che ricalcola i progetti correlati dopo ogni modifica
+sudo tee /etc/systemd/system/portfolio-related.service > /dev/null <<EOF
+[Unit]
+Description=Portfolio related projects
+After=network.target
+
+[Service]
+User=$APP_USER
+Group=$APP_USER
+WorkingDirectory=$APP_DIR
+Environment="PATH=$VENV_DIR/bin"
+ExecStart=$VENV_DIR/bin/python manage.py build_related --loop
+
+Restart=always
+RestartSec=10
+
+[Install]
+WantedBy=multi-user.target
+EOF
+
 # 10. CONFIGURAZIONE NGINX
 echo -e "${GREEN}[10/12] Configurazione Nginx...${NC}"
 sudo tee /etc/nginx/sites-available/$APP_NAME > /dev/null <<'EOF'
@@ -166,6 +226,12 @@ upstream portfolio_app {
     server 127.0.0.1:8000 fail_timeout=0;
 }
 
+# Query string nel nome del file pre-renderizzato (/projects/?page=2 -> projects/index.page=2.html)
+map $args $prerender_args {
+    ""      "";
+    default ".$args";
+}
+
 server {
     listen 80;
     server_name luigimeli.work www.luigimeli.work 38.242.208.240;
@@ -189,8 +255,18 @@ server {
         expires 30d;
     }
 
-    # Proxy to Gunicorn
+    # Pagine pre-renderizzate (manage.py prerender); il resto va a Gunicorn
     location / {
+        root /home/portfolio/portfolio_project/prerendered;
+        try_files $uri ${uri}index${prerender_args}.html @django;
+    }
+
+    location = /.manifest.json {
+        return 404;
+    }
+
+    # Proxy to Gunicorn
+    location @django {
         proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;
         proxy_set_header X-Forwarded-Proto $scheme;
         proxy_set_header Host $http_host;
@@ -345,11 +345,16 @@ const ContactForm = {
         
         try {
             const formData = new FormData(form);
+            // The page may come from the cache with another visitor's token:
+            // send the token bound to our own CSRF cookie instead.
+            formData.delete('csrfmiddlewaretoken');
+            const csrfToken = await this.getCsrfToken(form);
             const response = await fetch(form.action, {
                 method: 'POST',
                 body: formData,
                 headers: {
-                    'X-Requested-With': 'XMLHttpRequest'
+                    'X-Requested-With': 'XMLHttpRequest',
+                    'X-CSRFToken': csrfToken
                 }
             });
             
@@ -371,6 +376,17 @@ const ContactForm = {
         }
     },
     
+    async getCsrfToken(form) {
+        const match = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]+)/);
+        if (match) return decodeURIComponent(match[1]);
+        
+        const response = await fetch(form.dataset.csrfUrl, {
+            credentials: 'same-origin'
+        });
+        const data = await response.json();
+        return data.csrfToken;
+    },
+    
     showStatus(type, message) {
         if (!DOM.formStatus) return;
         